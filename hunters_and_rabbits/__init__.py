@@ -1 +1,22 @@
- 
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Hunters and Rabbits.
+
+The game itself (hr_graph, hr_logic, hr_io) only needs the standard library
+and can be imported on its own, e.g., by batch jobs:
+from hunters_and_rabbits.hr_graph import Graph
+
+The Dash app is only imported when main() is first looked up, since Dash,
+plotly, and networkx take most of a second to load.
+"""
+
+def __getattr__(name):
+    # Lazily expose the app's entry point (PEP 562)
+    if name == "main":
+        from .hunters_and_rabbits import main
+        return main
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,302 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""JSON-over-HTTP game API, for bots rather than browsers.
+
+The Dash app takes clicks and sends whole figures back; bots only need the
+black set. This is a small asyncio HTTP/1.1 server (keep-alive, no
+dependencies) hosting any number of games in one process, each a BitGraph
+(see hr_bitset) and a black-set mask, so a turn costs a few big-int ops.
+
+Vertices are referred to by index into the game's "ids" list and black sets
+are sent as hex bitmasks over it (bit i for ids[i]):
+
+POST /games {"k": 2, "vertices": ["a", "b", "c"], "edges": [["a", "b"],
+                                                             ["b", "c"]]}
+    -> 201 {"game": "3f2a...", "ids": ["a", "b", "c"], "k": 2, "turn": 0,
+            "black": "7", "cleared": false}
+    ("black", a list of ids, starts those black; all are by default)
+GET /games/<game> -> 200 {"turn": 0, "black": "7", "cleared": false}
+POST /games/<game>/shots {"shots": [1]} (or {"shot_ids": ["b"]}), at most
+    k of them: they're shot and the graph recolored.
+    -> 200 {"turn": 1, "black": "5", "cleared": false}
+DELETE /games/<game> -> 204
+
+Errors are {"error": message} with status 400, 404, 405, 409 (over
+MAX_GAMES), 413 (body over MAX_BODY) or 500 (a bug).
+
+Usage:
+hr-api --host 127.0.0.1 --port 8060
+"""
+import argparse
+import asyncio
+import json
+import uuid
+
+from .hr_bitset import BitGraph
+
+# Games hosted at once
+MAX_GAMES = 100000
+# Largest request body accepted, in bytes
+MAX_BODY = 16 << 20
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content",
+            400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+class ApiError(Exception):
+    """A request that can't be served, with its HTTP status."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Game:
+    """One game: a BitGraph, its hunters and its black set."""
+    def __init__(self, bitgraph, k, black):
+        self.bitgraph = bitgraph
+        self.k = k
+        self.black = black
+        self.turn = 0
+
+    def state(self):
+        return {"turn": self.turn, "black": format(self.black, "x"),
+                "cleared": self.black == 0}
+
+    def shoot(self, shots):
+        """Play a turn: shoot the vertex indices in 'shots' and recolor."""
+        mask = 0
+        for i in shots:
+            mask |= 1 << i
+
+        self.black = self.bitgraph.neighborhood(self.black & ~mask)
+        self.turn += 1
+
+def _bitgraph(vertices, edges):
+    """Return the BitGraph of lists of vertex ids and [id, id] edges."""
+    index = dict((id, i) for i, id in enumerate(vertices))
+    if len(index) != len(vertices):
+        raise ApiError(400, "Repeated vertex id!")
+
+    if not isinstance(edges, list):
+        raise ApiError(400, "\"edges\" must be a list of [id, id] pairs!")
+
+    neighbor_masks = [0] * len(vertices)
+    for edge in edges:
+        try:
+            a, b = (index[id] for id in edge)
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "Bad edge: " + json.dumps(edge) + "!")
+        neighbor_masks[a] |= 1 << b
+        neighbor_masks[b] |= 1 << a
+
+    return BitGraph(vertices, neighbor_masks)
+
+class GameServer:
+    """The games and the API's request handling, apart from HTTP."""
+    def __init__(self, max_games=MAX_GAMES):
+        self.max_games = max_games
+        self.games = dict()
+
+    def handle(self, method, path, body):
+        """Return (status, payload) for a request; payload is a dict to send
+        as JSON, or None.
+
+        Anything unexpected raised while handling it is a 500 reply rather
+        than a dropped connection.
+        """
+        try:
+            return self._route(method, path.split("?")[0].strip("/").split("/"),
+                               body)
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": "Internal error: " + type(e).__name__ + "!"}
+
+    def _route(self, method, parts, body):
+        if parts == ["games"]:
+            if method != "POST":
+                raise ApiError(405, "Use POST to create a game!")
+            return 201, self.create(_json(body))
+
+        if (len(parts) < 2) or (parts[0] != "games") or (len(parts) > 3):
+            raise ApiError(404, "No such resource!")
+
+        game = self.games.get(parts[1])
+        if game is None:
+            raise ApiError(404, "No game \"" + parts[1] + "\"!")
+
+        if len(parts) == 3:
+            if parts[2] != "shots":
+                raise ApiError(404, "No such resource!")
+            if method != "POST":
+                raise ApiError(405, "Use POST to submit shots!")
+            return 200, self.shoot(game, _json(body))
+
+        if method == "GET":
+            return 200, game.state()
+        if method == "DELETE":
+            del self.games[parts[1]]
+            return 204, None
+        raise ApiError(405, "Use GET or DELETE on a game!")
+
+    def create(self, spec):
+        """Create a game from a POST /games body; return its first state."""
+        try:
+            vertices = [str(id) for id in spec["vertices"]]
+            edges = spec.get("edges", [])
+            k = int(spec["k"])
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "A game needs \"vertices\" and \"k\"!")
+        if k < 0:
+            raise ApiError(400, "k must not be negative!")
+
+        bitgraph = _bitgraph(vertices, edges)
+        black = bitgraph.full
+        if "black" in spec:
+            black = bitgraph.mask_from_ids(
+                _checked_ids(bitgraph, spec["black"], "black"))
+
+        if len(self.games) >= self.max_games:
+            raise ApiError(409, "Too many games!")
+
+        game = Game(bitgraph, k, black)
+        game_id = uuid.uuid4().hex
+        self.games[game_id] = game
+
+        return dict(game.state(), game=game_id, ids=list(bitgraph.ids), k=k)
+
+    def shoot(self, game, spec):
+        """Play a POST /games/<game>/shots body; return the new state."""
+        if "shot_ids" in spec:
+            shots = [game.bitgraph.index[id] for id in
+                     _checked_ids(game.bitgraph, spec["shot_ids"],
+                                     "shot_ids")]
+        else:
+            shots = spec.get("shots")
+            if (not isinstance(shots, list)) or \
+               any((not isinstance(i, int)) or isinstance(i, bool) or
+                   (not 0 <= i < game.bitgraph.get_vert_count())
+                   for i in shots):
+                raise ApiError(400, "\"shots\" must be a list of vertex " +\
+                               "indices!")
+
+        if len(set(shots)) > game.k:
+            raise ApiError(400, f"At most {game.k} shots a turn!")
+
+        game.shoot(shots)
+        return game.state()
+
+def _json(body):
+    try:
+        spec = json.loads(body or b"{}")
+    except ValueError:
+        raise ApiError(400, "Body isn't JSON!")
+    if not isinstance(spec, dict):
+        raise ApiError(400, "Body must be a JSON object!")
+
+    return spec
+
+def _checked_ids(bitgraph, ids, field):
+    """Check that 'ids' is a list of the graph's vertex ids and return it."""
+    if (not isinstance(ids, list)) or \
+       any(str(id) not in bitgraph.index for id in ids):
+        raise ApiError(400, "\"" + field + "\" must be a list of vertex ids!")
+
+    return [str(id) for id in ids]
+
+async def _handle_connection(server, reader, writer):
+    """Serve HTTP/1.1 requests on one connection until either side closes
+    it.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+
+            try:
+                method, path, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break # Not HTTP
+
+            headers = dict()
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                length = -1
+
+            if not 0 <= length <= MAX_BODY:
+                status, payload = (400, {"error": "Bad Content-Length!"}) \
+                    if length < 0 else (413, {"error": "Body too large!"})
+                keep_alive = False # The body can't be skipped
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload = server.handle(method, path, body)
+                keep_alive = (version == "HTTP/1.1") and \
+                    (headers.get("connection", "").lower() != "close")
+
+            data = b"" if payload is None else json.dumps(payload).encode()
+            writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                         "Content-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                         "\r\n\r\n".encode() + data)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def start_server(host="127.0.0.1", port=8060, server=None):
+    """Start serving the API and return the asyncio.Server (port 0 picks a
+    free port; see its 'sockets').
+    """
+    if server is None:
+        server = GameServer()
+
+    return await asyncio.start_server(
+        lambda reader, writer: _handle_connection(server, reader, writer),
+        host, port)
+
+def parse_args(argv=None):
+    """Parse command line arguments for main()."""
+    parser = argparse.ArgumentParser(
+        prog="hr-api",
+        description="Serve Hunters and Rabbits games over a JSON HTTP API " +\
+                    "for bots"
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to bind (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8060,
+                        help="port to listen on (default: %(default)s)")
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    async def serve():
+        http_server = await start_server(args.host, args.port)
+        async with http_server:
+            await http_server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
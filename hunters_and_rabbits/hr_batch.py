@@ -0,0 +1,313 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Headless batch runs: parameter sweeps of games, without the Dash app.
+
+A job spec is a JSON file; every combination of its graphs, hunter counts,
+strategies and seeds is one task:
+
+{
+    "graphs": ["example_graph.xml"], # Paths relative to the spec file
+    "k": [1, 2],
+    "strategies": ["greedy", "recommend", "random", "solver"],
+    "seeds": [0, 1, 2],
+    "turns": 50, # Most turns a strategy plays (default 100)
+    "rabbits": 10000, # Simulated rabbits per task (default 1000)
+    "depth": 2, # hr_recommend look-ahead for "recommend" (default 1)
+    "memory_budget": 4096 # MiB a graph may take (default: half of RAM)
+}
+
+A task plays its strategy from all black for up to "turns" turns, then runs
+hr_montecarlo's rabbits against the shots with the task's seed, and writes one
+JSON line (its graph is loaded as an hr_compact.CompactGraph alone if an
+hr_graph.Graph would go over the memory budget; see hr_memory, and only the
+"solver" strategy needs the Graph):
+
+{"task": "example_graph.xml|2|greedy|0", "graph": ..., "k": 2,
+ "strategy": "greedy", "seed": 0, "turns": 7, "cleared_turn": 7,
+ "capture_fraction": 1.0, "mean_capture_turn": 3.1, "seconds": 0.012}
+
+Tasks are sent to worker processes in chunks of --chunk-size, with a few
+chunks per worker in flight, and lines are written as chunks finish, so
+they're in no particular order. With --output, the file is appended to and
+tasks already in it are skipped: an interrupted sweep picks up where it left
+off.
+
+Usage:
+hr-batch sweep.json --output results.jsonl --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import product
+
+import numpy as np
+
+from . import hr_io
+from . import hr_memory
+from .hr_compact import CompactGraph
+from .hr_frozen import DerivedCache
+from .hr_montecarlo import simulate, schedule_from_policy, recommend_policy
+from .hr_recommend import greedy_shots
+
+STRATEGIES = ("greedy", "recommend", "random", "solver")
+# Chunks in flight per worker; keeps workers busy between writes
+CHUNKS_PER_WORKER = 2
+
+# Most graphs a worker keeps loaded; tasks come graph-major (see
+# load_spec()), so a chunk spans at most a graph's last tasks and the next
+# one's first
+GRAPH_CACHE_ENTRIES = 2
+# Graphs a worker has loaded, by path; tasks on one graph share it
+_graphs = DerivedCache(max_entries=GRAPH_CACHE_ENTRIES)
+# Keys of the graphs' structure, by path: the structural hash (see hr_frozen)
+# and vertex order (which breaks the strategies' ties) of each loaded as a
+# Graph, so graph files with the same vertices and edges share schedules, or
+# the path of each too big for that
+_graph_keys = dict()
+# Shots of the strategies that don't depend on the seed, by graph key and
+# parameters; each seed of a task's graph, k and strategy replays them
+_schedules = DerivedCache(max_entries=256)
+
+class Task:
+    """One game of a sweep.
+
+    'graph' is the graph's path as the spec gives it and 'path' the path to
+    load it from. 'memory_budget' is in bytes (None for no limit).
+    """
+    def __init__(self, graph, path, k, strategy, seed, turns, rabbits, depth,
+                 memory_budget=None):
+        self.graph = graph
+        self.path = path
+        self.k = k
+        self.strategy = strategy
+        self.seed = seed
+        self.turns = turns
+        self.rabbits = rabbits
+        self.depth = depth
+        self.memory_budget = memory_budget
+
+    @property
+    def key(self):
+        """The task's id in output lines."""
+        return f"{self.graph}|{self.k}|{self.strategy}|{self.seed}"
+
+def load_spec(path):
+    """Return the Tasks of the job spec at 'path', in a fixed order."""
+    with open(path) as spec_file:
+        spec = json.load(spec_file)
+
+    base = os.path.dirname(os.path.abspath(path))
+    budget = hr_memory.default_budget()
+    if "memory_budget" in spec:
+        budget = int(spec["memory_budget"] * (1 << 20)) or None
+    strategies = spec.get("strategies", ["recommend"])
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError("load_spec(" + path + "): Unknown strategy \"" +\
+                             str(strategy) + "\"!")
+
+    return [Task(graph, os.path.join(base, graph), k, strategy, seed,
+                 spec.get("turns", 100), spec.get("rabbits", 1000),
+                 spec.get("depth", 1), budget)
+            for graph, k, strategy, seed in
+            product(spec["graphs"], spec["k"], strategies,
+                    spec.get("seeds", [0]))]
+
+def _compact(path, budget=None):
+    """Return (Graph, CompactGraph) of a graph file, loaded once per worker;
+    the Graph is None if it wouldn't fit in 'budget'.
+    """
+    return _graphs.get(path, lambda: _load(path, budget))
+
+def _load(path, budget):
+    """Return _compact()'s (Graph, CompactGraph), loading it from the file."""
+    estimate = hr_memory.estimate_file(path)
+    if hr_memory.choose_representation(estimate, budget) == "graph":
+        g = hr_io.load_graph(path)
+        frozen = g.freeze()
+        _graph_keys[path] = (frozen.structural_hash(), hash(frozen.ids))
+
+        return g, CompactGraph.from_graph(g)
+
+    _graph_keys[path] = ("path", os.path.abspath(path))
+
+    return None, hr_io.load_compact_graph(path)[0]
+
+def _shots(task, g, cg):
+    """Return the task's strategy's shots, as lists of vertex indices."""
+    if task.strategy == "solver":
+        from .hr_solver import solve
+
+        if g is None:
+            raise RuntimeError("run_task(" + task.key + "): The solver " +\
+                               "needs the graph, which is over the " +\
+                               "memory budget!")
+
+        schedule = solve(g, task.k) or []
+        return [[cg.index[id] for id in shots]
+                for shots in schedule[:task.turns]]
+
+    if task.strategy == "recommend":
+        policy = recommend_policy(task.k, task.depth)
+    elif task.strategy == "greedy":
+        policy = lambda cg, black, turn: greedy_shots(cg, black, task.k)[0]
+    else:
+        rng = np.random.default_rng(task.seed)
+        policy = lambda cg, black, turn: rng.choice(
+            np.flatnonzero(black), size=min(task.k, int(black.sum())),
+            replace=False)
+
+    return [list(s) for s in schedule_from_policy(cg, policy, task.turns)]
+
+def _cached_shots(task, g, cg):
+    """Return _shots(), from _schedules if the strategy doesn't depend on the
+    seed.
+    """
+    if task.strategy == "random":
+        return _shots(task, g, cg)
+
+    key = (_graph_keys[task.path], task.strategy, task.k, task.depth,
+           task.turns)
+
+    return _schedules.get(key, lambda: _shots(task, g, cg))
+
+def run_task(task):
+    """Play one Task and return its output record."""
+    started = time.perf_counter()
+    g, cg = _compact(task.path, task.memory_budget)
+    shots = _cached_shots(task, g, cg)
+
+    # The black set under the shots, for when (if ever) it empties
+    black = np.ones(cg.get_vert_count(), dtype=bool)
+    cleared_turn = 0 if not black.any() else None
+    for turn, turn_shots in enumerate(shots, 1):
+        black[turn_shots] = False
+        black = cg.neighborhood(black)
+        if (cleared_turn is None) and (not black.any()):
+            cleared_turn = turn
+
+    stats = simulate(cg, [[cg.ids[i] for i in s] for s in shots],
+                     task.rabbits, turns=max(len(shots), 1), seed=task.seed,
+                     workers=1)
+
+    return {
+        "task": task.key,
+        "graph": task.graph,
+        "k": task.k,
+        "strategy": task.strategy,
+        "seed": task.seed,
+        "turns": len(shots),
+        "cleared_turn": cleared_turn,
+        "capture_fraction": stats.capture_fraction(),
+        "mean_capture_turn": stats.mean_capture_turn(),
+        "seconds": time.perf_counter() - started,
+    }
+
+def run_chunk(tasks):
+    """Play a list of Tasks; return their records."""
+    return [run_task(task) for task in tasks]
+
+def finished_tasks(path):
+    """Return the task ids in an output file, first cutting off a partial
+    last line left by an interrupted run.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "rb+") as output:
+        data = output.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            output.truncate(complete)
+
+    for line in data[:complete].splitlines():
+        if line.strip():
+            done.add(json.loads(line)["task"])
+
+    return done
+
+def run_batch(tasks, output, workers=None, chunk_size=16):
+    """Play Tasks on 'workers' processes (the CPU count by default; with 1,
+    none are started), writing each record to the 'output' file object as a
+    JSON line as soon as its chunk is done. Return the number of records.
+    """
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    written = 0
+
+    def write(records):
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+        output.flush()
+        return len(records)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    if workers == 1:
+        for chunk in chunks:
+            written += write(run_chunk(chunk))
+        return written
+
+    # Only a few chunks are submitted ahead, so a huge sweep doesn't queue
+    # all its futures at once.
+    pending = iter(chunks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for chunk in pending:
+            in_flight.add(executor.submit(run_chunk, chunk))
+            if len(in_flight) >= CHUNKS_PER_WORKER * workers:
+                break
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                written += write(future.result())
+                chunk = next(pending, None)
+                if chunk is not None:
+                    in_flight.add(executor.submit(run_chunk, chunk))
+
+    return written
+
+def parse_args(argv=None):
+    """Parse command line arguments for main()."""
+    parser = argparse.ArgumentParser(
+        prog="hr-batch",
+        description="Run a sweep of Hunters and Rabbits games headless, " +\
+                    "writing results as JSON lines"
+    )
+    parser.add_argument("spec", help="job spec JSON file")
+    parser.add_argument("--output", "-o", default=None,
+                        help="JSON lines file to append to, skipping tasks " +\
+                             "already in it (default: standard output)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=16,
+                        help="tasks sent to a worker at a time " +\
+                             "(default: %(default)s)")
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    tasks = load_spec(args.spec)
+
+    if args.output is None:
+        run_batch(tasks, sys.stdout, args.workers, args.chunk_size)
+        return
+
+    done = finished_tasks(args.output)
+    tasks = [task for task in tasks if task.key not in done]
+
+    with open(args.output, "a") as output:
+        run_batch(tasks, output, args.workers, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Vertex sets as Python int bitmasks, for exhaustive search.
+
+Searching over black sets needs them hashable, cheap to compare and cheap to
+copy, which rules out both sets of Vertex objects and NumPy arrays. Bit i of a
+mask stands for vertex ids[i] of a BitGraph.
+
+Usage:
+bg = BitGraph.from_graph(g)
+black = bg.black_mask(g)
+next_black = bg.neighborhood(black) # hr_logic.recolor(), on a bitmask
+symmetry = MaskSymmetry.from_graph(bg, g)
+symmetry.canonical(black) # Same for black sets that are images of each other
+"""
+import itertools
+
+from .hr_compact import CompactGraph
+
+# Bits of a mask looked up at once by BitGraph.neighborhood()
+CHUNK_BITS = 8
+
+def popcount(mask):
+    """Return the number of set bits in a non-negative int."""
+    return bin(mask).count("1")
+
+def bit_indices(mask):
+    """Return the indices of the set bits in a non-negative int, ascending."""
+    indices = []
+
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+
+    return indices
+
+def submasks_of_size(mask, k):
+    """Yield every mask made of exactly k of the set bits of 'mask'."""
+    for bits in itertools.combinations(bit_indices(mask), k):
+        sub = 0
+        for i in bits:
+            sub |= 1 << i
+        yield sub
+
+class BitGraph:
+    """Read-only graph topology for vertex sets stored as int bitmasks.
+
+    'neighbor_masks[i]' is the mask of the neighbors of vertex ids[i].
+    neighborhood() ORs these together CHUNK_BITS mask bits at a time through
+    precomputed tables, so a recolor costs O(|V| / CHUNK_BITS) big-int ORs
+    rather than one per black vertex.
+    """
+    def __init__(self, ids, neighbor_masks):
+        self.ids = tuple(ids)
+        self.index = dict((id, i) for i, id in enumerate(self.ids))
+        self.neighbor_masks = tuple(neighbor_masks)
+        self.full = (1 << len(self.ids)) - 1
+
+        # _tables[c][b]: neighbors of the vertices in byte value b of chunk c
+        self._tables = []
+        for start in range(0, len(self.ids), CHUNK_BITS):
+            chunk = self.neighbor_masks[start:start + CHUNK_BITS]
+            table = [0] * (1 << len(chunk))
+            for b in range(1, len(table)):
+                low = b & -b
+                table[b] = table[b ^ low] | chunk[low.bit_length() - 1]
+            self._tables.append(table)
+
+    # O(|V|+|E|)
+    @classmethod
+    def from_compact(cls, cg):
+        """Return the BitGraph of an hr_compact.CompactGraph, with the same
+        vertex numbering.
+        """
+        neighbor_masks = []
+
+        for i in range(cg.get_vert_count()):
+            mask = 0
+            for j in cg.indices[cg.indptr[i]:cg.indptr[i + 1]].tolist():
+                mask |= 1 << j
+            neighbor_masks.append(mask)
+
+        return cls(cg.ids, neighbor_masks)
+
+    # O(|V|+|E|)
+    @classmethod
+    def from_graph(cls, g):
+        """Return the BitGraph of an hr_graph.Graph.
+
+        Vertices are numbered in the graph's iteration order.
+        """
+        return cls.from_compact(CompactGraph.from_graph(g))
+
+    def get_vert_count(self):
+        """Return the number of vertices in the graph."""
+        return len(self.ids)
+
+    def black_mask(self, g):
+        """Return the black vertices of an hr_graph.Graph with the same ids
+        as a mask.
+        """
+        return self.mask_from_ids(v.id for v in g if v.color == "black")
+
+    def mask_from_ids(self, ids):
+        """Return the mask with the vertices of the given ids set."""
+        mask = 0
+        for id in ids:
+            mask |= 1 << self.index[id]
+
+        return mask
+
+    def ids_from_mask(self, mask):
+        """Return the ids of the vertices set in a mask."""
+        return [self.ids[i] for i in bit_indices(mask)]
+
+    # O(|V| / CHUNK_BITS)
+    def neighborhood(self, mask):
+        """Return the mask of vertices with at least one neighbor in 'mask'.
+
+        This is the black set after hr_logic.recolor().
+        """
+        result = 0
+        chunk_mask = (1 << CHUNK_BITS) - 1
+
+        for table in self._tables:
+            if not mask:
+                break
+            result |= table[mask & chunk_mask]
+            mask >>= CHUNK_BITS
+
+        return result
+
+    def sides(self, g):
+        """Return the masks of the two sides of the bipartite hr_graph.Graph
+        this BitGraph was built from (see Graph.bipartition()), or None if it
+        isn't bipartite.
+        """
+        sides = g.bipartition()
+        if sides is None:
+            return None
+
+        return self.mask_from_ids(sides[0]), self.mask_from_ids(sides[1])
+
+class ParityBoard:
+    """Black set of a bipartite graph, kept as its two parity classes.
+
+    Recoloring moves every black vertex's blackness to the other side, so the
+    black vertices that started on side 0 and those that started on side 1
+    never mix: at any turn one class lies wholly on each side. Each class is
+    stepped as its own, at most half-size, mask.
+
+    Usage:
+    board = ParityBoard(bg, bg.sides(g), bg.black_mask(g))
+    board.shoot(bg.mask_from_ids(["1", "4"]))
+    board.recolor()
+    board.black # Both classes' vertices
+    """
+    def __init__(self, bitgraph, sides, black):
+        self.bitgraph = bitgraph
+        self.classes = [black & sides[0], black & sides[1]]
+
+    @property
+    def black(self):
+        """The mask of all black vertices."""
+        return self.classes[0] | self.classes[1]
+
+    def shoot(self, mask):
+        """Turn the vertices in 'mask' white."""
+        self.classes = [c & ~mask for c in self.classes]
+
+    def recolor(self):
+        """hr_logic.recolor(), one parity class at a time."""
+        self.classes = [self.bitgraph.neighborhood(c) for c in self.classes]
+
+class MaskSymmetry:
+    """Automorphism group of a BitGraph, acting on masks.
+
+    Black sets that an automorphism maps onto each other are as hard to
+    clear as each other, with the shots mapped the same way, so a search
+    only needs one of each orbit. canonical() picks the smallest mask of the
+    orbit, each permutation applied CHUNK_BITS bits at a time through tables
+    like BitGraph.neighborhood()'s.
+
+    'permutations' map bit i to bit p[i] and include the identity.
+    """
+    def __init__(self, bitgraph, permutations):
+        self.bitgraph = bitgraph
+        self.order = len(permutations)
+
+        # _tables[p][c][b]: image under permutation p of byte value b of
+        # chunk c; the identity needs none.
+        self._tables = []
+        for p in permutations:
+            if list(p) == list(range(len(p))):
+                continue
+
+            tables = []
+            for start in range(0, len(p), CHUNK_BITS):
+                images = [1 << j for j in p[start:start + CHUNK_BITS]]
+                table = [0] * (1 << len(images))
+                for b in range(1, len(table)):
+                    low = b & -b
+                    table[b] = table[b ^ low] | images[low.bit_length() - 1]
+                tables.append(table)
+            self._tables.append(tables)
+
+    @classmethod
+    def from_graph(cls, bitgraph, g, max_order=None):
+        """Return the MaskSymmetry of the hr_graph.Graph a BitGraph was built
+        from, or None if its group has more than 'max_order' elements
+        (hr_canon.MAX_LEAVES by default).
+        """
+        from .hr_canon import automorphisms, MAX_LEAVES
+
+        group = automorphisms(g, MAX_LEAVES if max_order is None else max_order)
+        if group is None:
+            return None
+
+        # hr_canon numbers vertices in the graph's iteration order
+        ids = [v.id for v in g]
+        position = dict((id, i) for i, id in enumerate(ids))
+        index = bitgraph.index
+
+        return cls(bitgraph, [tuple(index[ids[p[position[id]]]]
+                                    for id in bitgraph.ids) for p in group])
+
+    # O(order * |V| / CHUNK_BITS)
+    def canonical(self, mask):
+        """Return the smallest image of 'mask' under the group."""
+        best = mask
+        chunk_mask = (1 << CHUNK_BITS) - 1
+
+        for tables in self._tables:
+            image = 0
+            rest = mask
+            for table in tables:
+                if not rest:
+                    break
+                image |= table[rest & chunk_mask]
+                rest >>= CHUNK_BITS
+
+            if image < best:
+                best = image
+
+        return best
@@ -0,0 +1,225 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Polynomial-time bounds on the hunter number, to narrow the search for it.
+
+Lower bounds:
+"edge": 1 if there's an edge.
+"cycle": 2 if there's a cycle (not counting self-loops), as cycles need 2.
+"degeneracy": the largest minimum degree of any subgraph. If H has minimum
+degree d, any black vertex of H leaves at least d of H black next turn, so
+fewer than d hunters never clear it.
+
+Upper bounds, the first three with schedules:
+"vertices": |V| - 1 (|V| with a self-loop): shoot all but a vertex v, then
+v's neighbors.
+"bipartite": the smaller side of a bipartite graph: shoot it twice.
+"greedy": the fewest hunters hr_recommend's greedy shots cleared it with.
+"vertex separation": pathwidth + 1 hunters suffice, and the vertex
+separation of any vertex order bounds the pathwidth; a few BFS orders are
+tried.
+
+Usage:
+bounds = hunter_bounds(g)
+bounds.lower, bounds.upper
+bounds.lower_by, bounds.upper_by # Which bounds those were
+"""
+import heapq
+import itertools
+
+class Bounds:
+    """Lower and upper bounds on a graph's hunter number.
+
+    'lower_by' and 'upper_by' name the bounds that gave them (see the module
+    docstring) and 'schedule', if not None, is a schedule for 'upper'
+    hunters.
+    """
+    def __init__(self, lower, lower_by, upper, upper_by, schedule):
+        self.lower = lower
+        self.lower_by = lower_by
+        self.upper = upper
+        self.upper_by = upper_by
+        self.schedule = schedule
+
+    def __repr__(self):
+        return f"Bounds({self.lower} by {self.lower_by}, " +\
+            f"{self.upper} by {self.upper_by})"
+
+# O(|E| log |V|)
+def degeneracy(g):
+    """Return the largest minimum degree of any subgraph of an
+    hr_graph.Graph (a self-loop adds 1 to its vertex's degree).
+    """
+    degree = dict((v, len(neighbors)) for v, neighbors in g.items())
+    # The counter keeps ties from comparing vertices
+    tiebreak = itertools.count()
+    heap = [(d, next(tiebreak), v) for v, d in degree.items()]
+    heapq.heapify(heap)
+    removed = set()
+    best = 0
+
+    # Repeatedly remove a vertex of minimum degree
+    while heap:
+        d, _, v = heapq.heappop(heap)
+        if (v in removed) or (d != degree[v]):
+            continue # Stale entry
+
+        best = max(best, d)
+        removed.add(v)
+
+        for n in g[v]:
+            if n not in removed:
+                degree[n] -= 1
+                heapq.heappush(heap, (degree[n], next(tiebreak), n))
+
+    return best
+
+def _has_cycle(g):
+    """Return whether a graph has a cycle of 3 or more vertices."""
+    loops = sum(v in neighbors for v, neighbors in g.items())
+    edges = g.get_edge_count() - loops
+
+    # A forest has |V| - (number of components) edges
+    return edges > len(g) - len(g.components())
+
+# O(|V|+|E|)
+def vertex_separation(g, order):
+    """Return the vertex separation of an order of g's vertices (Vertex
+    objects): the most vertices at or before any point with a neighbor
+    after it.
+    """
+    position = dict((v, i) for i, v in enumerate(order))
+    # Vertices turn active at their position and stop at their last
+    # neighbor's
+    changes = [0] * (len(order) + 1)
+
+    for v, i in position.items():
+        last = max((position[n] for n in g[v]), default=i)
+        if last > i:
+            changes[i] += 1
+            changes[last] -= 1
+
+    best = 0
+    active = 0
+    for change in changes:
+        active += change
+        best = max(best, active)
+
+    return best
+
+def _bfs_order(g, start):
+    """Return g's vertices in BFS order from 'start', then from the first
+    unreached vertex, and so on.
+    """
+    order = []
+    seen = set()
+
+    for root in [start] + list(g):
+        if root in seen:
+            continue
+
+        seen.add(root)
+        i = len(order)
+        order.append(root)
+
+        while i < len(order):
+            for n in g[order[i]]:
+                if n not in seen:
+                    seen.add(n)
+                    order.append(n)
+            i += 1
+
+    return order
+
+def _vertex_separation_bound(g):
+    """Return the smallest vertex separation of a few BFS orders: from a
+    vertex of minimum degree, and from the last vertex of that order (a
+    vertex far from it), both ways.
+    """
+    start = min(g, key=lambda v: len(g[v]))
+    first = _bfs_order(g, start)
+    second = _bfs_order(g, first[-1])
+
+    return min(vertex_separation(g, order)
+               for order in (first, first[::-1], second, second[::-1]))
+
+def greedy_schedule(g, k, max_turns=None):
+    """Return a schedule for k hunters made of hr_recommend's greedy shots
+    from all black, or None if it hasn't cleared the graph within
+    'max_turns' (2 |V| + 2 by default) or comes back to a black set.
+    """
+    from .hr_compact import CompactGraph
+    from .hr_recommend import greedy_shots
+
+    cg = CompactGraph.from_graph(g)
+    black = cg.black_mask(g)
+    black[:] = True
+    seen = set()
+    schedule = []
+
+    if max_turns is None:
+        max_turns = 2 * cg.get_vert_count() + 2
+
+    for _ in range(max_turns):
+        if not black.any():
+            return schedule
+
+        key = black.tobytes()
+        if key in seen:
+            return None # Going around in circles
+        seen.add(key)
+
+        shots, _ = greedy_shots(cg, black, k)
+        schedule.append([cg.ids[i] for i in shots])
+        black = black.copy()
+        black[shots] = False
+        black = cg.neighborhood(black)
+
+    return schedule if not black.any() else None
+
+def hunter_bounds(g):
+    """Return the Bounds of an hr_graph.Graph's hunter number."""
+    n = g.get_vert_count()
+
+    if g.get_edge_count() == 0:
+        return Bounds(0, "edge", 0, "edge", [[]] if n else [])
+
+    lower, lower_by = 1, "edge"
+    if _has_cycle(g):
+        lower, lower_by = 2, "cycle"
+    d = degeneracy(g)
+    if d > lower:
+        lower, lower_by = d, "degeneracy"
+
+    # Shoot all but a vertex of least degree, then its neighbors
+    v = min(g, key=lambda v: len(g[v]))
+    if v in g[v]:
+        upper, upper_by = n, "vertices"
+        schedule = [[u.id for u in g]]
+    else:
+        upper, upper_by = n - 1, "vertices"
+        schedule = [[u.id for u in g if u != v], [u.id for u in g[v]]]
+
+    sides = g.bipartition()
+    if sides is not None:
+        side = min(sides, key=len)
+        if len(side) < upper:
+            upper, upper_by = len(side), "bipartite"
+            schedule = [list(side), list(side)]
+
+    if upper > lower:
+        separation = _vertex_separation_bound(g) + 1
+        if separation < upper:
+            upper, upper_by = separation, "vertex separation"
+            schedule = None
+
+    # Greedy play can only prove what it manages to do
+    for k in range(lower, upper):
+        greedy = greedy_schedule(g, k)
+        if greedy is not None:
+            upper, upper_by, schedule = k, "greedy", greedy
+            break
+
+    return Bounds(lower, lower_by, upper, upper_by, schedule)
@@ -0,0 +1,245 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Canonical forms of graphs, for recognizing isomorphic ones.
+
+canonical_form() returns a key that's equal for two graphs exactly when
+they're isomorphic, along with a canonical order of each graph's vertex ids:
+isomorphic graphs' orders line up vertex for vertex, so a result worked out
+on one (e.g., a shot schedule) can be carried over to the other.
+
+Trees get the AHU encoding (rooted at the tree's center) in near-linear time.
+Other graphs go through individualization-refinement: color refinement, then,
+while some vertices still share a color, trying each vertex of the first such
+color as unique and refining again; the smallest edge list over all the
+resulting vertex orders is the canonical one. That's exponential for very
+symmetric graphs, so it gives up after MAX_LEAVES orders.
+
+The same search gives a graph's automorphisms: two vertex orders with the
+smallest edge list differ by one, and every automorphism is found that way,
+so automorphisms() returns the whole group (if it has at most MAX_LEAVES
+elements).
+
+Usage:
+form = canonical_form(g)
+if form is not None:
+    key, order = form
+group = automorphisms(g) # e.g., [(0, 1, 2), (2, 1, 0)] for a path
+"""
+from .hr_frozen import FrozenGraph
+
+# Vertex orders individualization-refinement tries before giving up
+MAX_LEAVES = 2000
+
+class _BudgetExceeded(Exception):
+    pass
+
+def _adjacency(g):
+    """Return (ids, adj): the vertex ids of an hr_graph.Graph (or
+    hr_frozen.FrozenGraph) and, for each, the indices of its neighbors.
+    """
+    if isinstance(g, FrozenGraph):
+        return list(g.ids), g.neighbors
+
+    ids = [v.id for v in g]
+    index = dict((id, i) for i, id in enumerate(ids))
+    adj = [[index[n.id] for n in neighbors] for neighbors in g.values()]
+
+    return ids, adj
+
+def _is_tree(adj):
+    n = len(adj)
+    ends = sum(len(neighbors) for neighbors in adj)
+
+    if (n == 0) or (ends != 2 * (n - 1)) or \
+       any(v in neighbors for v, neighbors in enumerate(adj)):
+        return False
+
+    seen = {0}
+    frontier = [0]
+    while frontier:
+        for u in adj[frontier.pop()]:
+            if u not in seen:
+                seen.add(u)
+                frontier.append(u)
+
+    return len(seen) == n
+
+def _tree_centers(adj):
+    """Return the one or two centers of a tree, by peeling off leaves."""
+    n = len(adj)
+    degree = [len(neighbors) for neighbors in adj]
+    leaves = [v for v in range(n) if degree[v] <= 1]
+    remaining = n
+
+    while remaining > 2:
+        remaining -= len(leaves)
+        next_leaves = []
+
+        for leaf in leaves:
+            for u in adj[leaf]:
+                degree[u] -= 1
+                if degree[u] == 1:
+                    next_leaves.append(u)
+
+        leaves = next_leaves
+
+    return leaves
+
+def _rooted_tree_form(adj, root):
+    """Return (key, order) of a tree rooted at 'root' (AHU).
+
+    Vertices are labeled level by level, deepest first, by the rank of their
+    sorted children's labels among their level's, and the key is every
+    level's sorted child-label lists.
+    """
+    parent = {root: None}
+    levels = [[root]]
+
+    while True:
+        level = []
+        for v in levels[-1]:
+            for u in adj[v]:
+                if u not in parent:
+                    parent[u] = v
+                    level.append(u)
+        if not level:
+            break
+        levels.append(level)
+
+    label = dict()
+    children = dict((v, []) for v in parent)
+    key = []
+
+    for level in reversed(levels):
+        signatures = dict(
+            (v, tuple(sorted(label[c] for c in children[v]))) for v in level)
+        ranks = dict((s, i) for i, s in enumerate(sorted(set(signatures.values()))))
+
+        for v in level:
+            label[v] = ranks[signatures[v]]
+            if parent[v] is not None:
+                children[parent[v]].append(v)
+
+        key.append(tuple(sorted(signatures.values())))
+
+    # Preorder, children by label: equal labels mean isomorphic subtrees,
+    # so their relative order doesn't matter.
+    order = []
+    stack = [root]
+    while stack:
+        v = stack.pop()
+        order.append(v)
+        stack.extend(sorted(children[v], key=lambda c: label[c], reverse=True))
+
+    return tuple(key), order
+
+def _refine(adj, colors):
+    """Return the coarsest stable refinement of a vertex coloring (lists of
+    ints), colors numbered by rank of (color, sorted neighbor colors).
+    """
+    cells = len(set(colors))
+
+    while True:
+        signatures = [(colors[v], tuple(sorted(colors[u] for u in adj[v])))
+                      for v in range(len(adj))]
+        ranks = dict((s, i) for i, s in enumerate(sorted(set(signatures))))
+        colors = [ranks[s] for s in signatures]
+
+        if len(ranks) == cells:
+            return colors
+        cells = len(ranks)
+
+class _Leaves:
+    """Best certificate so far in an individualization-refinement search."""
+    def __init__(self, max_leaves):
+        self.max_leaves = max_leaves
+        self.count = 0
+        self.certificate = None
+        # Every coloring with the best certificate
+        self.best = []
+
+    def visit(self, adj, colors):
+        self.count += 1
+        if self.count > self.max_leaves:
+            raise _BudgetExceeded()
+
+        certificate = tuple(sorted((colors[v], colors[u])
+                                   for v in range(len(adj)) for u in adj[v]))
+        if (self.certificate is None) or (certificate < self.certificate):
+            self.certificate = certificate
+            self.best = [colors]
+        elif certificate == self.certificate:
+            self.best.append(colors)
+
+def _individualize(adj, colors, leaves):
+    colors = _refine(adj, colors)
+
+    if len(set(colors)) == len(colors):
+        leaves.visit(adj, colors)
+        return
+
+    # The lowest color shared by several vertices
+    counts = dict()
+    for c in colors:
+        counts[c] = counts.get(c, 0) + 1
+    target = min(c for c, count in counts.items() if count > 1)
+
+    for v in range(len(colors)):
+        if colors[v] == target:
+            _individualize(adj, [2 * c + (c == target and u != v)
+                                 for u, c in enumerate(colors)], leaves)
+
+def canonical_form(g, max_leaves=MAX_LEAVES):
+    """Return (key, order) for an hr_graph.Graph (or FrozenGraph), or None
+    if its form wasn't found within 'max_leaves' vertex orders.
+
+    'key' is hashable and equal for isomorphic graphs only; 'order' lists
+    the graph's vertex ids in canonical order.
+    """
+    ids, adj = _adjacency(g)
+
+    if _is_tree(adj):
+        key, order = min(_rooted_tree_form(adj, root)
+                         for root in _tree_centers(adj))
+        return ("tree", key), [ids[v] for v in order]
+
+    leaves = _Leaves(max_leaves)
+    try:
+        _individualize(adj, [0] * len(adj), leaves)
+    except _BudgetExceeded:
+        return None
+
+    order = [None] * len(ids)
+    for v, c in enumerate(leaves.best[0] if leaves.best else []):
+        order[c] = ids[v]
+
+    return ("graph", len(ids), leaves.certificate), order
+
+def automorphisms(g, max_leaves=MAX_LEAVES):
+    """Return the automorphism group of an hr_graph.Graph as a list of
+    permutations of vertex indices (in the graph's iteration order), or None
+    if it wasn't found within 'max_leaves' vertex orders.
+
+    Permutation p maps vertex i to vertex p[i]; the identity comes first.
+    """
+    ids, adj = _adjacency(g)
+
+    leaves = _Leaves(max_leaves)
+    try:
+        _individualize(adj, [0] * len(adj), leaves)
+    except _BudgetExceeded:
+        return None
+
+    if not leaves.best:
+        return [()]
+
+    # Each best coloring relabels the graph the same way, so going through
+    # one and back through the first is an automorphism.
+    first = [None] * len(ids)
+    for v, c in enumerate(leaves.best[0]):
+        first[c] = v
+
+    return [tuple(first[c] for c in colors) for colors in leaves.best]
@@ -0,0 +1,149 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import sys
+
+import numpy as np
+
+class CompactGraph:
+    """Read-only CSR (compressed sparse row) adjacency of a graph, for
+    vectorized work with NumPy.
+
+    Vertices are numbered 0..n-1 in the order of 'ids'. The neighbors of
+    vertex i are indices[indptr[i]:indptr[i + 1]], and rows[j] is the vertex
+    whose neighbor list holds indices[j], so (rows, indices) lists every edge
+    in both directions (self-loops once).
+
+    Vertex sets, like the black vertices, are NumPy bool arrays of length n.
+
+    Usage:
+    cg = CompactGraph.from_graph(g)
+    black = cg.black_mask(g)
+    next_black = cg.neighborhood(black) # hr_logic.recolor(), vectorized
+
+    Memory use is O(|V|+2|E|) machine words, several times less than the
+    hr_graph.Graph it's built from.
+    """
+    def __init__(self, ids, indptr, indices):
+        self.ids = tuple(ids)
+        self.index = dict((id, i) for i, id in enumerate(self.ids))
+        self.indptr = np.array(indptr, dtype=np.intp)
+        self.indices = np.array(indices, dtype=np.intp)
+        self.degree = np.diff(self.indptr)
+        self.rows = np.repeat(np.arange(len(self.ids), dtype=np.intp),
+                              self.degree)
+
+        for a in (self.indptr, self.indices, self.degree, self.rows):
+            a.flags.writeable = False
+
+    # O(|V|+|E|)
+    @classmethod
+    def from_graph(cls, g):
+        """Return the CompactGraph of an hr_graph.Graph.
+
+        Vertices are numbered in the graph's iteration order.
+        """
+        ids = [v.id for v in g]
+        index = dict((id, i) for i, id in enumerate(ids))
+        indptr = np.zeros(len(ids) + 1, dtype=np.intp)
+        indices = []
+
+        for i, neighbors in enumerate(g.values()):
+            indices.extend(sorted(index[n.id] for n in neighbors))
+            indptr[i + 1] = len(indices)
+
+        return cls(ids, indptr, indices)
+
+    # O(|V|+|E|)
+    @classmethod
+    def from_edges(cls, ids, edges):
+        """Return the CompactGraph of vertex ids and (id, id) edges, without
+        building an hr_graph.Graph.
+
+        Raise like hr_graph.Graph would: ValueError for a repeated vertex or
+        edge, KeyError for an edge to a missing vertex.
+        """
+        index = dict((id, i) for i, id in enumerate(ids))
+        if len(index) != len(ids):
+            raise ValueError("CompactGraph.from_edges(): Vertex already in " +\
+                             "graph!")
+
+        try:
+            ends = np.array([(index[a], index[b]) for a, b in edges],
+                            dtype=np.intp).reshape(-1, 2)
+        except KeyError:
+            raise KeyError("CompactGraph.from_edges(): One or both edge " +\
+                           "endpoints are not vertices in the graph!")
+
+        ends.sort(axis=1)
+        if len(np.unique(ends, axis=0)) != len(ends):
+            raise ValueError("CompactGraph.from_edges(): Edge already in " +\
+                             "graph!")
+
+        # Both directions of each edge, self-loops once
+        loops = ends[:, 0] == ends[:, 1]
+        rows = np.concatenate((ends[:, 0], ends[~loops, 1]))
+        indices = np.concatenate((ends[:, 1], ends[~loops, 0]))
+        order = np.lexsort((indices, rows))
+        indptr = np.zeros(len(ids) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=len(ids)), out=indptr[1:])
+
+        return cls(ids, indptr, indices[order])
+
+    def get_vert_count(self):
+        """Return the number of vertices in the graph."""
+        return len(self.degree)
+
+    def get_edge_count(self):
+        """Return the number of edges in the graph."""
+        loops = np.count_nonzero(self.rows == self.indices)
+        return (len(self.indices) - loops) // 2 + loops
+
+    # O(|V|)
+    def memory_footprint(self):
+        """Return about how many bytes the graph takes: its arrays, ids and
+        id index.
+        """
+        arrays = (self.indptr, self.indices, self.degree, self.rows)
+
+        return sum(a.nbytes for a in arrays) + sys.getsizeof(self.ids) + \
+            sys.getsizeof(self.index) + \
+            sum(sys.getsizeof(id) for id in self.ids)
+
+    def black_mask(self, g):
+        """Return the black vertices of an hr_graph.Graph with the same ids
+        as a bool array.
+        """
+        black = np.zeros(self.get_vert_count(), dtype=bool)
+        for v in g:
+            if v.color == "black":
+                black[self.index[v.id]] = True
+
+        return black
+
+    def mask_from_ids(self, ids):
+        """Return a bool array with the vertices of the given ids set."""
+        mask = np.zeros(self.get_vert_count(), dtype=bool)
+        mask[[self.index[id] for id in ids]] = True
+
+        return mask
+
+    def ids_from_mask(self, mask):
+        """Return the ids of the vertices set in a bool array."""
+        return [self.ids[i] for i in np.flatnonzero(mask)]
+
+    # O(|V|+|E|)
+    def black_neighbor_counts(self, black):
+        """Return how many black neighbors each vertex has."""
+        return np.bincount(self.rows, weights=black[self.indices],
+                           minlength=self.get_vert_count()).astype(np.intp)
+
+    # O(|V|+|E|)
+    def neighborhood(self, black):
+        """Return the vertices with at least one neighbor in 'black'.
+
+        This is the black set after hr_logic.recolor().
+        """
+        return self.black_neighbor_counts(black) > 0
@@ -0,0 +1,115 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Optimal schedules for graph families with known hunter numbers, built in
+linear time instead of searched for.
+
+Caterpillars (and so paths and stars) need 1 hunter. Let s_1, ..., s_m be
+the path of non-leaf vertices and give a rabbit on s_j position j and one on
+a leaf of s_j position j - 1. A move changes a rabbit's position by exactly
+one, so shooting s_1, s_2, ..., s_m in turn catches every rabbit whose
+position has the parity of the shot vertex's: it can't jump over the shots,
+and one on the leaf just ahead steps onto the next shot vertex. A second
+sweep, a turn later if m is even, catches the other parity.
+
+Cycles need 2 hunters: shooting one vertex every turn walls it off, and the
+other hunter sweeps the path of the rest. Spiders with 3 or more legs of
+length 3 or more need 2 too, as 1 can't clear the spider with three legs of
+length 3: the first hunter walls off the center while the second sweeps the
+legs one by one. Other trees are left to the search in hr_solver.
+
+Usage:
+result = family_schedule(g)
+if result is not None:
+    family, k, schedule = result
+"""
+def _walk(g, start, allowed):
+    """Return the ids of the path of 'allowed' vertices from 'start', an end
+    of it, to its other end.
+    """
+    order = [start.id]
+    previous = None
+    vert = start
+
+    while True:
+        step = [n for n in g[vert] if (n in allowed) and (n != previous)]
+        if (not step) or (step[0] == start):
+            return order
+        previous, vert = vert, step[0]
+        order.append(vert.id)
+
+def path_schedule(order):
+    """Return a 1-hunter schedule for the path with vertex ids 'order'."""
+    if len(order) == 1:
+        return [[]] # Nowhere to move
+    if len(order) == 2:
+        return [[order[0]], [order[0]]]
+
+    # The non-leaf vertices, swept twice
+    sweep = [[id] for id in order[1:-1]]
+    pause = [[order[1]]] if len(sweep) % 2 == 0 else []
+
+    return sweep + pause + sweep
+
+def caterpillar_schedule(g):
+    """Return a 1-hunter schedule for a caterpillar (see Graph.family())."""
+    body = set(v for v, neighbors in g.items() if len(neighbors) > 1)
+    if not body:
+        return path_schedule([v.id for v in g])
+
+    ends = [v for v in body if sum(n in body for n in g[v]) <= 1]
+    sweep = [[id] for id in _walk(g, ends[0], body)]
+    pause = [sweep[0]] if len(sweep) % 2 == 0 else []
+
+    return sweep + pause + sweep
+
+def cycle_schedule(g):
+    """Return a 2-hunter schedule for a cycle (see Graph.family())."""
+    start = next(iter(g))
+    rest = set(g)
+    rest.remove(start)
+    end = next(iter(g[start]))
+
+    return [[start.id] + shots for shots in path_schedule(_walk(g, end, rest))]
+
+def spider_legs(g):
+    """Return the center of a spider and its legs, as lists of ids from the
+    center out.
+    """
+    center = next(v for v, neighbors in g.items() if len(neighbors) > 2)
+    rest = set(g)
+    rest.remove(center)
+
+    return center, [_walk(g, n, rest) for n in g[center]]
+
+def spider_schedule(g):
+    """Return a 2-hunter schedule for a spider (see Graph.family())."""
+    center, legs = spider_legs(g)
+    schedule = []
+
+    for leg in legs:
+        schedule.extend([center.id] + shots for shots in path_schedule(leg))
+
+    return schedule
+
+def family_schedule(g):
+    """Return (family, hunter number, optimal schedule) for a connected
+    hr_graph.Graph of a family with a closed-form strategy, or None.
+    """
+    family = g.family()
+
+    if family in ("path", "caterpillar"):
+        k = 1 if g.get_edge_count() else 0
+        return family, k, caterpillar_schedule(g)
+
+    if family == "cycle":
+        return family, 2, cycle_schedule(g)
+
+    if family == "spider":
+        _, legs = spider_legs(g)
+        if sum(len(leg) >= 3 for leg in legs) >= 3:
+            return family, 2, spider_schedule(g)
+
+    return None
@@ -0,0 +1,215 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Frozen graph snapshots, with structural hashes to key derived data by.
+
+An hr_graph.Graph is a mutable dict, with no cheap way to tell whether two
+graphs (or one graph before and after an edit) have the same structure.
+Graph.freeze() returns a FrozenGraph: its vertex ids, neighbor tuples and
+degree array, which can't change, and two structural hashes worked out on
+first use and kept:
+
+structural_hash()                The same for graphs with the same ids and
+                                 edges, whatever order they were added in
+structural_hash(invariant=True)  The same for isomorphic graphs, whatever
+                                 their ids (from hr_canon's canonical form;
+                                 None if that's not found)
+
+Hashes are hex BLAKE2b digests, so they're the same in every process and
+run, and small enough to keep many of as keys. Colors aren't part of a
+snapshot: layouts, solver results, components and degree statistics depend
+on the structure alone.
+
+Usage:
+frozen = g.freeze()
+frozen.structural_hash(), frozen.structural_hash(invariant=True)
+layouts = DerivedCache(max_entries=16)
+positions = layouts.get(frozen.structural_hash(), lambda: layout(g))
+"""
+import functools
+import hashlib
+from array import array
+
+# Bytes of the hashes' BLAKE2b digests
+HASH_BYTES = 16
+
+class FrozenGraph:
+    """Immutable snapshot of an hr_graph.Graph's structure.
+
+    'ids' are the vertex ids in the graph's order, and vertex i's neighbors
+    are 'neighbors'[i], a sorted tuple of vertex indices; 'degree' is the
+    (read-only) NumPy array of their lengths. Frozen graphs are equal when
+    their ids and edges are, and hash by structural_hash(), so they can be
+    dict keys themselves.
+    """
+    def __init__(self, ids, neighbors):
+        import numpy as np
+
+        degree = np.fromiter((len(n) for n in neighbors), dtype=np.intp,
+                             count=len(neighbors))
+        degree.flags.writeable = False
+
+        object.__setattr__(self, "ids", tuple(ids))
+        object.__setattr__(self, "neighbors", tuple(neighbors))
+        object.__setattr__(self, "degree", degree)
+
+    # O(|V|+|E|log(v°))
+    @classmethod
+    def from_graph(cls, g):
+        """Return the snapshot of an hr_graph.Graph."""
+        index = dict((v, i) for i, v in enumerate(g))
+
+        return cls([v.id for v in g],
+                   [tuple(sorted(index[n] for n in neighbors))
+                    for neighbors in g.values()])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenGraph(): Frozen graphs can't be changed!")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenGraph(): Frozen graphs can't be changed!")
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return (self.structural_hash() == other.structural_hash()) and \
+            (set(self.ids) == set(other.ids)) and \
+            (self._labelled_edges() == other._labelled_edges())
+
+    def __hash__(self):
+        return hash(self.structural_hash())
+
+    def __len__(self):
+        return len(self.ids)
+
+    @functools.cached_property
+    def index(self):
+        """The dict of vertex id: index."""
+        return dict((id, i) for i, id in enumerate(self.ids))
+
+    @functools.cached_property
+    def edge_count(self):
+        loops = sum(v in neighbors for v, neighbors in enumerate(self.neighbors))
+
+        return (int(self.degree.sum()) - loops) // 2 + loops
+
+    def get_vert_count(self):
+        """Return the number of vertices in the graph."""
+        return len(self.ids)
+
+    def get_edge_count(self):
+        """Return the number of edges in the graph."""
+        return self.edge_count
+
+    def has_edge(self, id0, id1):
+        """Return whether two vertices by id share an edge."""
+        index = self.index
+
+        return (id0 in index) and (id1 in index) and \
+            (index[id1] in self.neighbors[index[id0]])
+
+    def _labelled_edges(self):
+        """Return the edges as a sorted list of pairs of vertex id reprs."""
+        labels = [repr(id) for id in self.ids]
+
+        return sorted(tuple(sorted((labels[v], labels[u])))
+                      for v, neighbors in enumerate(self.neighbors)
+                      for u in neighbors if v <= u)
+
+    # O(|V|log|V|+|E|log|E|) the first time, then O(1)
+    @functools.cached_property
+    def _labelled_hash(self):
+        labels = [repr(id) for id in self.ids]
+        order = sorted(range(len(labels)), key=labels.__getitem__)
+        rank = [0] * len(order)
+        for r, v in enumerate(order):
+            rank[v] = r
+
+        # The ids by repr, then the edges as pairs of their ranks
+        edges = sorted((min(rank[v], rank[u]), max(rank[v], rank[u]))
+                       for v, neighbors in enumerate(self.neighbors)
+                       for u in neighbors if v <= u)
+        digest = hashlib.blake2b(digest_size=HASH_BYTES)
+        digest.update("\0".join(labels[v] for v in order).encode("utf-8"))
+        digest.update(b"\0\0")
+        digest.update(array("q", [r for edge in edges for r in edge]).tobytes())
+
+        return digest.hexdigest()
+
+    @functools.cached_property
+    def _canonical_form(self):
+        from .hr_canon import canonical_form
+
+        return canonical_form(self)
+
+    @functools.cached_property
+    def _invariant_hash(self):
+        form = self._canonical_form
+        if form is None:
+            return None
+
+        return hashlib.blake2b(repr(form[0]).encode("utf-8"),
+                               digest_size=HASH_BYTES).hexdigest()
+
+    def structural_hash(self, invariant=False):
+        """Return the graph's id-labelled structural hash or, with
+        'invariant', its isomorphism-invariant one (None if hr_canon gives up
+        on the graph, e.g., a big very symmetric one).
+        """
+        if invariant:
+            return self._invariant_hash
+
+        return self._labelled_hash
+
+    def canonical_order(self):
+        """Return the vertex ids in hr_canon's canonical order (lining up
+        with any isomorphic graph's), or None as structural_hash(invariant=
+        True).
+        """
+        form = self._canonical_form
+
+        return None if form is None else form[1]
+
+class DerivedCache:
+    """Values derived from graphs, by key (e.g., a structural hash and the
+    parameters they were derived with); holds at most 'max_entries', dropping
+    the oldest first.
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._values = dict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, compute):
+        """Return the value for 'key', calling compute() for it (and keeping
+        it) if there's none.
+        """
+        if key in self._values:
+            return self._values[key]
+
+        value = compute()
+        self.put(key, value)
+
+        return value
+
+    def lookup(self, key):
+        """Return the value for 'key', or None if there's none."""
+        return self._values.get(key)
+
+    def put(self, key, value):
+        """Keep 'value' for 'key'."""
+        self._values.pop(key, None)
+        if len(self._values) >= self.max_entries:
+            del self._values[next(iter(self._values))] # Oldest
+        self._values[key] = value
+
+    def clear(self):
+        self._values.clear()
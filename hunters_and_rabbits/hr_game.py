@@ -0,0 +1,114 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Many games on one graph: light game states over a shared topology.
+
+An hr_graph.Graph keeps every vertex's color in its Vertex object, so each
+game on a graph needs its own copy of the whole graph. Here the topology is
+an hr_compact.CompactGraph, which is read-only (and can be shared between
+processes with hr_shm), and a game is a GameState: its black set packed
+eight vertices a byte, its turn and its pending shots. A game on a
+10^6-vertex graph takes 125 kB, so a thousand of them take 125 MB next to
+the one copy of the topology.
+
+Usage:
+cg = CompactGraph.from_graph(g) # Or hr_shm.attach(handle)
+games = [GameState.new(cg) for _ in range(1000)]
+games[0].shoot([3, 7]) # Vertex indices
+recolor(cg, games[0]) # Shoot, then recolor as hr_logic.recolor() does
+games[0].black_mask() # Bool array, as CompactGraph uses
+"""
+import numpy as np
+
+from .hr_hooks import HOOKS, RECOLOR_DONE
+
+class GameState:
+    """The state of one game on a topology of 'n' vertices: 'black' (the
+    black set as np.packbits() of a bool array), 'turn' and 'shots' (the
+    vertex indices shot so far this turn).
+    """
+    __slots__ = ("n", "black", "turn", "shots")
+
+    def __init__(self, n, black, turn=0, shots=()):
+        self.n = n
+        self.black = black
+        self.turn = turn
+        self.shots = list(shots)
+
+    @classmethod
+    def new(cls, topology, black=None):
+        """Return a game at turn 0 on a CompactGraph, starting from a bool
+        array 'black' (all black by default).
+        """
+        n = topology.get_vert_count()
+        if black is None:
+            black = np.ones(n, dtype=bool)
+        elif len(black) != n:
+            raise ValueError("GameState.new(): 'black' must have one entry " +\
+                             "per vertex!")
+
+        return cls(n, np.packbits(black))
+
+    # O(|V|)
+    @classmethod
+    def from_graph(cls, topology, g):
+        """Return a game at turn 0 on a CompactGraph, colored as the
+        hr_graph.Graph 'g' with the same ids.
+        """
+        return cls.new(topology, topology.black_mask(g))
+
+    @property
+    def nbytes(self):
+        """Bytes of the packed black set."""
+        return self.black.nbytes
+
+    def copy(self):
+        """Return an independent copy of the game."""
+        return GameState(self.n, self.black.copy(), self.turn, self.shots)
+
+    def black_mask(self):
+        """Return the black set as a bool array."""
+        return np.unpackbits(self.black, count=self.n).astype(bool)
+
+    def set_black_mask(self, black):
+        """Replace the black set with a bool array's."""
+        self.black = np.packbits(black)
+
+    def black_count(self):
+        """Return the number of black vertices."""
+        return int(np.unpackbits(self.black, count=self.n).sum())
+
+    def is_cleared(self):
+        """Return whether no vertex is black (the rabbit's been caught)."""
+        return not self.black.any()
+
+    def shoot(self, indices):
+        """Add vertex indices to this turn's shots."""
+        indices = [int(i) for i in indices]
+        if any(not 0 <= i < self.n for i in indices):
+            raise ValueError("GameState.shoot(): Vertex index out of range!")
+
+        self.shots.extend(i for i in indices if i not in self.shots)
+
+# O(|V|+|E|)
+def recolor(topology, state):
+    """Play a GameState's turn on its CompactGraph: whiten its shots, recolor
+    as hr_logic.recolor() does, and move to the next turn with no shots.
+    Return the state.
+    """
+    black = state.black_mask()
+    black[state.shots] = False
+    next_black = topology.neighborhood(black)
+
+    state.black = np.packbits(next_black)
+    state.turn += 1
+    state.shots = []
+
+    if HOOKS.active:
+        HOOKS.emit(RECOLOR_DONE, graph=topology,
+                   black=int(next_black.sum()),
+                   changed=int((next_black != black).sum()))
+
+    return state
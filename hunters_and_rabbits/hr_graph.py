@@ -3,6 +3,12 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 #
 # Contact: 01101011@tuta.io
+import sys
+
+# Bytes of a Vertex object with its two attributes, not counting their values
+# (CPython 3.11, 64-bit; sys.getsizeof() leaves out the attribute storage)
+VERTEX_BYTES = 88
+
 class Vertex:
     """Vertex with an id and color field.
 
@@ -44,6 +50,9 @@ class Graph(dict):
     g.add_vert('c')
     g.add_edge(('a', 'c'))
     a_neighbors = g['a']
+    g.add_edges([('b', 'c'), ('c', 'd')]) # Batched: all or none
+    g.contract_edges([('a', 'b')]) # b merges into a
+    g.del_verts(['c', 'd'])
 
     Adjacency list graphs are best for SPARSE graphs (low edge:vertex ratio)
     since they use O(|V|+2|E|) memory, where |V| and |E| are the number of verts
@@ -61,6 +70,20 @@ class Graph(dict):
         for e in edges:
             self.add_edge(e)
 
+    def __index(self):
+        """Return the graph's dict of id: Vertex.
+
+        It's built on first use, so graphs filled in directly as dicts (e.g.,
+        by unpickling a graph pickled before there was an index) get one too,
+        and is kept up to date by the methods below. Adding or deleting
+        vertices directly afterward would leave it stale.
+        """
+        try:
+            return self.__verts
+        except AttributeError:
+            self.__verts = dict((v.id, v) for v in self)
+            return self.__verts
+
     # Avg O(1), worst O(|E|)
     def add_vert(self, vert):
         """Add a vertex to the graph."""
@@ -68,6 +91,7 @@ class Graph(dict):
             raise ValueError("Graph.add_vert(): Vertex already in graph!")
 
         self[vert] = set()
+        self.__index()[vert.id] = vert
 
     # Avg O(1), worst O(|V|)
     def add_edge(self, id0, id1):
@@ -89,50 +113,194 @@ class Graph(dict):
         self[v1].add(v0)
         self.__edge_count += 1
 
-    # Avg O(v°), worst O(|V|^2)
+    # Avg O(v°)
     def del_vert(self, id):
         """Delete a vertex in the graph by its id."""
         if not self.has_vert(id):
             raise KeyError("Graph.del_vert(): Vertex not in graph!")
 
-        vert = self.get_vert(id)
-        # Shallow copy adj list to avoid list change during iteration
-        neighbors_copy = self[vert].copy()
-
-        for n in neighbors_copy:
-            self.del_edge(vert, n)
-
-        del self[vert]
+        self.__del_verts([self.get_vert(id)])
 
-    # Avg O(1), worst O(|E|)
+    # Avg O(1)
     def del_edge(self, v0, v1):
         """Delete an edge between two vertices, v0 and v1, in the graph.
 
         v0 and v1 can either be Vertex objects or vertex ids.
-        When used with ids, the necessary calls to get_vert() incur an expensive
-        linear search.
         """
         # Vertices, as called by del_vert()
         if ((type(v0) == Vertex) and
             (type(v1) == Vertex)):
-            if not self.has_edge(v0.id, v1.id):
-                raise ValueError("Graph.del_edge(): Edge not in graph!")
-
-            self[v0].remove(v1)
-            self[v1].remove(v0)
-        # ids
-        else:
-            if not self.has_edge(v0, v1):
-                raise ValueError("Graph.del_edge(): Edge not in graph!")
+            v0 = v0.id
+            v1 = v1.id
 
-            vert0 = self.get_vert(v0)
-            vert1 = self.get_vert(v1)
+        if not self.has_edge(v0, v1):
+            raise ValueError("Graph.del_edge(): Edge not in graph!")
 
-            self[vert0].remove(vert1)
-            self[vert1].remove(vert0)
+        vert0 = self.get_vert(v0)
+        vert1 = self.get_vert(v1)
 
+        self[vert0].discard(vert1)
+        self[vert1].discard(vert0)
         self.__edge_count -= 1
 
+    # Batched mutations ######################################################
+    # Each checks its whole batch before changing anything, so a batch with a
+    # bad entry leaves the graph as it was.
+
+    # Avg O(batch)
+    def add_verts(self, verts):
+        """Add many vertices to the graph."""
+        verts = list(verts)
+        ids = set(v.id for v in verts)
+
+        if (len(ids) != len(verts)) or any(self.has_vert(id) for id in ids):
+            raise ValueError("Graph.add_verts(): Vertex repeated or already " +\
+                             "in graph!")
+
+        index = self.__index()
+        for vert in verts:
+            self[vert] = set()
+            index[vert.id] = vert
+
+    def __edge_batch(self, name, edges):
+        """Return a batch of edges (pairs of ids) as pairs of vertices,
+        checking that their endpoints are in the graph and that none is
+        repeated.
+        """
+        index = self.__index()
+        pairs = []
+        seen = set()
+
+        for id0, id1 in edges:
+            if (id0 not in index) or (id1 not in index):
+                raise KeyError("Graph." + name + "(): One or both edge " +\
+                               "endpoints are not vertices in the graph!")
+            key = frozenset((id0, id1))
+            if key in seen:
+                raise ValueError("Graph." + name + "(): Edge repeated!")
+            seen.add(key)
+            pairs.append((index[id0], index[id1]))
+
+        return pairs
+
+    # Avg O(batch)
+    def add_edges(self, edges):
+        """Add many edges, given as pairs of ids, to the graph."""
+        pairs = self.__edge_batch("add_edges", edges)
+
+        if any(v1 in self[v0] for v0, v1 in pairs):
+            raise ValueError("Graph.add_edges(): Edge already in graph!")
+
+        for v0, v1 in pairs:
+            self[v0].add(v1)
+            self[v1].add(v0)
+        self.__edge_count += len(pairs)
+
+    # Avg O(batch + the deleted vertices' degrees)
+    def del_verts(self, ids):
+        """Delete many vertices, and their edges, by id."""
+        ids = set(ids)
+
+        if not all(self.has_vert(id) for id in ids):
+            raise KeyError("Graph.del_verts(): One or more vertices not in " +\
+                           "graph!")
+
+        self.__del_verts([self.get_vert(id) for id in ids])
+
+    def __del_verts(self, verts):
+        index = self.__index()
+
+        for vert in verts:
+            # An edge between two of the vertices is gone from the second's
+            # neighbors by the time it's deleted, so it's counted once.
+            for n in self[vert]:
+                if n is not vert:
+                    self[n].discard(vert)
+            self.__edge_count -= len(self[vert])
+
+            del self[vert]
+            del index[vert.id]
+
+    # Avg O(batch)
+    def del_edges(self, edges):
+        """Delete many edges, given as pairs of ids, from the graph."""
+        pairs = self.__edge_batch("del_edges", edges)
+
+        if not all(v1 in self[v0] for v0, v1 in pairs):
+            raise ValueError("Graph.del_edges(): Edge not in graph!")
+
+        for v0, v1 in pairs:
+            self[v0].discard(v1)
+            self[v1].discard(v0)
+        self.__edge_count -= len(pairs)
+
+    # Avg O(batch + the merged vertices' degrees)
+    def contract_edges(self, edges):
+        """Contract many edges, given as pairs of ids, in order.
+
+        Contracting (id0, id1) merges vertex id1 into vertex id0: id1's edges
+        become id0's (an edge both had is kept once) and the edge between
+        them goes. id0 turns black if id1 was black, since the rabbit may be
+        on either. An id merged by an earlier pair stands for the vertex it
+        was merged into. Return the dict of merged id: id it's now part of.
+        """
+        pairs = self.__edge_batch("contract_edges", edges)
+
+        if not all(v1 in self[v0] for v0, v1 in pairs):
+            raise ValueError("Graph.contract_edges(): Edge not in graph!")
+        if any(v0 is v1 for v0, v1 in pairs):
+            raise ValueError("Graph.contract_edges(): Can't contract a " +\
+                             "self-loop!")
+
+        index = self.__index()
+        merged_into = dict() # Merged vertex: vertex it was merged into
+
+        def find(vert):
+            while vert in merged_into:
+                vert = merged_into[vert]
+            return vert
+
+        for v0, v1 in pairs:
+            v0 = find(v0)
+            v1 = find(v1)
+            if v0 is v1:
+                continue # Already merged by an earlier pair
+
+            # Edges between vertices stay edges between what they merge into,
+            # so (v0, v1) is still an edge here.
+            self[v0].discard(v1)
+            self.__edge_count -= len(self[v1])
+
+            for n in self[v1]:
+                if n is v0:
+                    continue
+                if n is not v1:
+                    self[n].discard(v1)
+                n = v0 if n is v1 else n # A self-loop stays one
+                if n not in self[v0]:
+                    self[v0].add(n)
+                    self[n].add(v0)
+                    self.__edge_count += 1
+
+            if v1.color == "black":
+                v0.color = "black"
+
+            del self[v1]
+            del index[v1.id]
+            merged_into[v1] = v0
+
+        return dict((v.id, find(v).id) for v in merged_into)
+
+    # O(|V|+|E|log(v°))
+    def freeze(self):
+        """Return an immutable hr_frozen.FrozenGraph snapshot of the graph's
+        vertex ids and edges (not its colors), to key data derived from its
+        structure by.
+        """
+        from .hr_frozen import FrozenGraph
+
+        return FrozenGraph.from_graph(self)
+
     def get_vert_count(self):
         """Return the number of vertices in the graph."""
         return len(self)
@@ -141,35 +309,181 @@ class Graph(dict):
         """Return the number of edges in the graph."""
         return self.__edge_count
 
+    # O(|V|)
+    def memory_footprint(self):
+        """Return about how many bytes the graph takes: its dict, id index,
+        neighbor sets, Vertex objects and ids (colors are shared strings).
+        """
+        size = sys.getsizeof(self) + sys.getsizeof(self.__index())
+
+        for vert, neighbors in self.items():
+            size += VERTEX_BYTES + sys.getsizeof(vert.id) + \
+                sys.getsizeof(neighbors)
+
+        return size
+
     def has_vert(self, id):
         """Return whether a vertex is in the graph by its id."""
-        # Graph is a dict, Python dicts are hash tables, and vertices are
-        # hashed by id, so we can do fast lookup with a dummy vertex possessing
-        # the same id.
-        return Vertex(id, "dummy") in self
+        return id in self.__index()
 
     def has_edge(self, id0, id1):
         """Return whether two vertices by id (v0 and v1) share an edge."""
-        return ((self.has_vert(id0)) and
-            (self.has_vert(id1)) and
-            (Vertex(id1, "dummy") in self[Vertex(id0, "dummy")]) and
-            (Vertex(id0, "dummy") in self[Vertex(id1, "dummy")]))
+        index = self.__index()
 
-    # Avg and worst O(|V|)
+        return ((id0 in index) and
+            (id1 in index) and
+            (index[id1] in self[index[id0]]))
+
+    # Avg O(1)
     def get_vert(self, id):
         """Return a vertex by its id."""
-        if not self.has_vert(id):
+        try:
+            return self.__index()[id]
+        except KeyError:
             raise KeyError("Graph.get_vert(): Vertex not in graph!")
 
-        for k in self.keys():
-            if k.id == id:
-                return k
-        raise RuntimeError("Graph.get_vert(): Fatal disagreement with " +\
-                           "has_vert()! This must be a bug.")
-
     def neighbors(self, id):
         """Return a vertex's neighbors as a set. Vertex specified by its id."""
         if not self.has_vert(id):
             raise KeyError("Graph.neighbors(): Vertex not in graph!")
 
         return self[Vertex(id, "dummy")]
+
+    # O(|V|+|E|)
+    def bipartition(self):
+        """Return the graph's vertex ids split into two sets so that every edge
+        joins the two, or None if the graph isn't bipartite.
+
+        A graph is bipartite if and only if it has no odd cycle (a self-loop
+        counts as one). Each connected component's sides are chosen
+        independently; isolated vertices go in the first set.
+        """
+        sides = (set(), set())
+        side_of = dict()
+
+        for start in self:
+            if start in side_of:
+                continue
+
+            side_of[start] = 0
+            frontier = [start]
+
+            while frontier:
+                vert = frontier.pop()
+                sides[side_of[vert]].add(vert.id)
+
+                for n in self[vert]:
+                    if n not in side_of:
+                        side_of[n] = 1 - side_of[vert]
+                        frontier.append(n)
+                    elif side_of[n] == side_of[vert]:
+                        return None # Odd cycle
+
+        return sides
+
+    def is_bipartite(self):
+        """Return whether the graph has no odd cycle. See bipartition()."""
+        return self.bipartition() is not None
+
+    # O(|V|+|E|)
+    def components(self):
+        """Return the graph's connected components as a list of sets of
+        vertex ids, in the order their first vertices are iterated.
+        """
+        components = []
+        seen = set()
+
+        for start in self:
+            if start in seen:
+                continue
+
+            seen.add(start)
+            frontier = [start]
+            component = set()
+
+            while frontier:
+                vert = frontier.pop()
+                component.add(vert.id)
+
+                for n in self[vert]:
+                    if n not in seen:
+                        seen.add(n)
+                        frontier.append(n)
+
+            components.append(component)
+
+        return components
+
+    # Avg O(batch + the batch's degrees)
+    def induced_subgraph(self, ids):
+        """Return a new graph of the vertices with the given ids and the edges
+        between them.
+
+        The new graph's vertices are copies, so recoloring them leaves this
+        graph alone. They're in the order of 'ids'.
+        """
+        ids = list(dict.fromkeys(ids)) # Without repeats
+
+        if not all(self.has_vert(id) for id in ids):
+            raise KeyError("Graph.induced_subgraph(): One or more ids are " +\
+                           "not vertices in the graph!")
+
+        copies = dict()
+        sub = Graph()
+
+        for id in ids:
+            vert = self.get_vert(id)
+            copies[vert] = Vertex(vert.id, vert.color)
+        sub.add_verts(copies.values())
+
+        # Neighbor sets are filled in directly rather than with add_edges(),
+        # which would check each edge.
+        ends = 0
+        loops = 0
+        for vert, copy in copies.items():
+            for n in self[vert]:
+                if n in copies:
+                    sub[copy].add(copies[n])
+                    ends += 1
+                    loops += n == vert
+
+        sub.__edge_count = (ends - loops) // 2 + loops
+
+        return sub
+
+    # O(|V|+|E|)
+    def family(self):
+        """Return the most specific of these families the graph is in, or
+        None if it's in none (e.g., it's disconnected, or empty):
+
+        "path": a tree with no vertex of degree 3 or more
+        "cycle": connected, with every vertex of degree 2
+        "caterpillar": a tree whose non-leaf vertices form a path
+        "spider": a tree with one vertex of degree 3 or more
+        "tree": connected, with no cycles (self-loops included)
+        """
+        if (not self) or (len(self.components()) != 1):
+            return None
+
+        if any(vert in neighbors for vert, neighbors in self.items()):
+            return None # Self-loop
+
+        max_degree = max(len(neighbors) for neighbors in self.values())
+
+        if self.get_edge_count() == len(self):
+            return "cycle" if max_degree == 2 else None
+        if self.get_edge_count() != len(self) - 1:
+            return None
+
+        if max_degree <= 2:
+            return "path"
+
+        # Non-leaf vertices with at most 2 non-leaf neighbors form a path
+        if all(sum(len(self[n]) > 1 for n in neighbors) <= 2
+               for neighbors in self.values() if len(neighbors) > 1):
+            return "caterpillar"
+
+        if sum(len(neighbors) > 2 for neighbors in self.values()) == 1:
+            return "spider"
+
+        return "tree"
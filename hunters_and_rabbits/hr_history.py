@@ -0,0 +1,168 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Turn history of a game, for undo, redo and jumping to any turn.
+
+Each turn's black set is kept as a bitmask over the game's vertices (bit i
+for ids[i], as in hr_bitset), stored as a tuple of CHUNK_BYTES-byte chunks.
+A chunk that's the same as the previous turn's is that very bytes object,
+so a turn costs a tuple of |V| / (8 * CHUNK_BYTES) references plus the
+chunks that changed, and a quiet corner of a big graph is stored once for
+the whole game. Restoring any turn joins its chunks: O(|V|/64) word
+operations, however far back it is, with no replaying.
+
+Recording a turn after undoing some drops the undone turns, as in an
+editor.
+
+Usage:
+history = TurnHistory.from_graph(g) # Turn 0
+hr_logic.recolor(g)
+history.record_graph(g) # Turn 1
+history.undo() # Turn 0's black set; history.apply(g) recolors g with it
+history.jump(1)
+"""
+import sys
+
+# Bytes per chunk of a stored black set (4096 vertices)
+CHUNK_BYTES = 512
+
+def _mask_from_graph(ids, g):
+    black = dict((v.id, v.color == "black") for v in g)
+    bits = "".join("1" if black[id] else "0" for id in reversed(ids))
+
+    return int(bits or "0", 2)
+
+class TurnHistory:
+    """Black sets of turns 'turn' (the first) on, over vertices 'ids'; the
+    history is at one of them, history.turn.
+    """
+    def __init__(self, ids, black_mask, turn=0):
+        self.ids = tuple(ids)
+        self.index = dict((id, i) for i, id in enumerate(self.ids))
+        self.first_turn = turn
+        self.position = 0
+        self._bytes = max(1, (len(self.ids) + 7) // 8)
+        self._snapshots = [self._chunks(black_mask, None)]
+
+    def __getstate__(self):
+        # The index is as big as the ids and quick to rebuild, so it isn't
+        # pickled (e.g., by hr_store.SqliteStore every session).
+        state = self.__dict__.copy()
+        del state["index"]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.index = dict((id, i) for i, id in enumerate(self.ids))
+
+    @classmethod
+    def from_graph(cls, g, turn=0):
+        """Return the history of an hr_graph.Graph, starting at its black
+        set as 'turn'.
+        """
+        ids = [v.id for v in g]
+
+        return cls(ids, _mask_from_graph(ids, g), turn)
+
+    @property
+    def turn(self):
+        return self.first_turn + self.position
+
+    @property
+    def last_turn(self):
+        return self.first_turn + len(self._snapshots) - 1
+
+    def _chunks(self, mask, previous):
+        """Return a black set as a tuple of chunks, reusing the chunks of
+        'previous' (a tuple of chunks or None) that are equal.
+        """
+        data = mask.to_bytes(self._bytes, "little")
+        chunks = [data[i:i + CHUNK_BYTES]
+                  for i in range(0, self._bytes, CHUNK_BYTES)]
+
+        if previous is not None:
+            chunks = [old if old == new else new
+                      for old, new in zip(previous, chunks)]
+
+        return tuple(chunks)
+
+    # O(|V|)
+    def mask_from_graph(self, g):
+        """Return the black set of an hr_graph.Graph with the history's
+        vertices as a bitmask.
+        """
+        return _mask_from_graph(self.ids, g)
+
+    def record(self, mask):
+        """Add a black set as the turn after the current one (dropping any
+        undone turns) and move to it.
+        """
+        current = self._snapshots[self.position]
+        del self._snapshots[self.position + 1:]
+        self._snapshots.append(self._chunks(mask, current))
+        self.position += 1
+
+    def record_graph(self, g):
+        """record() an hr_graph.Graph's black set."""
+        self.record(self.mask_from_graph(g))
+
+    # O(|V|/64)
+    def mask(self, turn=None):
+        """Return a turn's black set (the current turn's by default)."""
+        if turn is None:
+            turn = self.turn
+        if not self.first_turn <= turn <= self.last_turn:
+            raise ValueError("TurnHistory.mask(): No turn " + str(turn) +\
+                             " in the history!")
+
+        return int.from_bytes(b"".join(self._snapshots[turn - self.first_turn]),
+                              "little")
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self._snapshots) - 1
+
+    def jump(self, turn):
+        """Move to 'turn' and return its black set."""
+        mask = self.mask(turn)
+        self.position = turn - self.first_turn
+
+        return mask
+
+    def undo(self):
+        """Move back a turn and return its black set."""
+        if not self.can_undo():
+            raise ValueError("TurnHistory.undo(): Nothing to undo!")
+
+        return self.jump(self.turn - 1)
+
+    def redo(self):
+        """Move forward a turn and return its black set."""
+        if not self.can_redo():
+            raise ValueError("TurnHistory.redo(): Nothing to redo!")
+
+        return self.jump(self.turn + 1)
+
+    # O(|V|)
+    def apply(self, g, turn=None):
+        """Color an hr_graph.Graph with the history's vertices as in a turn
+        (the current turn by default).
+        """
+        bits = format(self.mask(turn), "b").zfill(len(self.ids))[::-1]
+
+        for v in g:
+            v.color = "black" if bits[self.index[v.id]] == "1" else "white"
+
+    def memory_footprint(self):
+        """Return about how many bytes the stored black sets take, counting
+        each shared chunk once.
+        """
+        chunks = dict((id(c), c) for s in self._snapshots for c in s)
+
+        return sum(sys.getsizeof(s) for s in self._snapshots) + \
+            sum(sys.getsizeof(c) for c in chunks.values())
@@ -0,0 +1,317 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Observer hooks on game events, for measuring without patching.
+
+Code that plays or draws the game emits events to the process-wide HOOKS,
+each with keyword arguments:
+
+TURN_START    graph, turn           The app's GO was pressed
+SHOTS_APPLIED graph, turn, shots    Shot vertices were whitened (ids)
+RECOLOR_DONE  graph, black, changed hr_logic.recolor() (or hr_game.recolor(),
+                                    with the CompactGraph as graph) finished:
+                                    the number of black vertices and of
+                                    vertices whose color changed
+GRAPH_LOADED  graph, path           hr_io.load_graph() finished
+FIGURE_BUILT  graph, figure         The app built a figure of the graph
+
+Emitters check HOOKS.active before building an event's arguments, so with
+nothing registered an event costs one attribute check. Handlers are called
+in registration order, in the emitting thread, as handler(event, **args);
+anything they raise propagates to the emitter.
+
+Usage:
+HOOKS.register(RECOLOR_DONE, lambda event, graph, black, changed: ...)
+with TimingHook() as timing: # Per-turn phase timings and counts
+    ...
+timing.turns
+with ProfileHook(turns=10) as profile: # cProfile the next 10 turns
+    ...
+profile.stats().sort_stats("cumulative").print_stats(20)
+# Sample every 1 ms instead, between recolors (for headless play)
+ProfileHook(turns=10, start_event=RECOLOR_DONE, end_event=RECOLOR_DONE,
+            interval=0.001)
+"""
+import cProfile
+import pstats
+import sys
+import threading
+from collections import Counter
+from time import perf_counter
+
+TURN_START = "turn_start"
+SHOTS_APPLIED = "shots_applied"
+RECOLOR_DONE = "recolor_done"
+GRAPH_LOADED = "graph_loaded"
+FIGURE_BUILT = "figure_built"
+EVENTS = (TURN_START, SHOTS_APPLIED, RECOLOR_DONE, GRAPH_LOADED, FIGURE_BUILT)
+
+class Hooks:
+    """Handlers by event.
+
+    'active' is whether any handler is registered. Each event's handlers
+    are a tuple that's replaced, never changed, so emit() needs no lock.
+    """
+    def __init__(self):
+        self.active = False
+        self._handlers = dict((event, ()) for event in EVENTS)
+        self._lock = threading.Lock()
+
+    def register(self, event, handler):
+        """Call 'handler' on every 'event'; return it."""
+        if event not in self._handlers:
+            raise KeyError("Hooks.register(): Unknown event \"" + str(event) +\
+                           "\"!")
+
+        with self._lock:
+            self._handlers[event] += (handler,)
+            self.active = True
+
+        return handler
+
+    def unregister(self, event, handler):
+        """Stop calling 'handler' on 'event'."""
+        with self._lock:
+            handlers = list(self._handlers[event])
+            try:
+                handlers.remove(handler)
+            except ValueError:
+                raise KeyError("Hooks.unregister(): Handler not registered " +\
+                               "for \"" + event + "\"!")
+            self._handlers[event] = tuple(handlers)
+            self.active = any(self._handlers.values())
+
+    def emit(self, event, **args):
+        """Call 'event''s handlers with 'args'."""
+        for handler in self._handlers[event]:
+            handler(event, **args)
+
+# The process's hooks, emitted to by hr_logic, hr_io and the app
+HOOKS = Hooks()
+
+class _Hook:
+    """A set of handlers registered and unregistered together.
+
+    Subclasses list the events they handle in 'events'; each is handled by
+    the method of the same name.
+    """
+    events = ()
+
+    def install(self, hooks=None):
+        """Register the handlers with 'hooks' (HOOKS by default); return
+        self.
+        """
+        self.hooks = HOOKS if hooks is None else hooks
+        for event in self.events:
+            self.hooks.register(event, getattr(self, event))
+
+        return self
+
+    def remove(self):
+        """Unregister the handlers, if they still are."""
+        hooks, self.hooks = getattr(self, "hooks", None), None
+        if hooks is None:
+            return
+
+        for event in self.events:
+            hooks.unregister(event, getattr(self, event))
+
+    def __enter__(self):
+        if getattr(self, "hooks", None) is None:
+            self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.remove()
+
+class TimingHook(_Hook):
+    """Per-turn phase timings and counts.
+
+    'turns' gets a dict per turn: "turn", "shoot_seconds" (from TURN_START
+    to SHOTS_APPLIED), "recolor_seconds" (to RECOLOR_DONE), "figure_seconds"
+    (to FIGURE_BUILT, if one is built), "black" and "changed". If given,
+    'histogram' (an hr_metrics.Histogram with a "phase" label) gets each
+    phase's seconds too.
+    """
+    events = (TURN_START, SHOTS_APPLIED, RECOLOR_DONE, FIGURE_BUILT)
+
+    def __init__(self, histogram=None):
+        self.histogram = histogram
+        self.turns = []
+        self._last = None # perf_counter() at the turn's previous event
+
+    def _phase(self, name):
+        now = perf_counter()
+        seconds = now - self._last
+        self._last = now
+        self.turns[-1][name + "_seconds"] = seconds
+
+        if self.histogram is not None:
+            self.histogram.observe(seconds, name)
+
+    def turn_start(self, event, graph, turn):
+        self.turns.append({"turn": turn})
+        self._last = perf_counter()
+
+    def shots_applied(self, event, graph, turn, shots):
+        if self._last is not None:
+            self._phase("shoot")
+
+    def recolor_done(self, event, graph, black, changed):
+        if self._last is None:
+            return # Recolored outside a turn
+        self._phase("recolor")
+        self.turns[-1].update(black=black, changed=changed)
+
+    def figure_built(self, event, graph, figure):
+        if self._last is not None:
+            self._phase("figure")
+            self._last = None # The turn is over
+
+class Sampler:
+    """Statistical profiler: while enabled, a timer thread records the
+    enabling thread's stack every 'interval' seconds (as often as the GIL
+    lets it; see sys.setswitchinterval()).
+
+    Unlike cProfile, its cost doesn't grow with the number of calls made.
+    'samples' counts the stacks seen, as tuples of (file, line, function)
+    from the outermost call in. It passes for a cProfile.Profile with
+    pstats: a function's calls are the samples it's in, its own and
+    cumulative times those samples (at the top of the stack, and anywhere
+    in it) times 'interval'.
+    """
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = None
+        self._thread = None
+
+    def enable(self):
+        if self._thread is not None:
+            return
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), self._stop),
+            name="hr_hooks.Sampler", daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _sample(self, thread_id, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno,
+                              code.co_name))
+                frame = frame.f_back
+
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    # O(samples' total depth)
+    def create_stats(self):
+        """Work out 'stats' the way pstats.Stats expects of a profile."""
+        own = Counter()
+        cumulative = Counter()
+        callers = dict()
+
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for function in set(stack): # Recursion counts once
+                cumulative[function] += count
+            for caller, function in set(zip(stack, stack[1:])):
+                function_callers = callers.setdefault(function, Counter())
+                function_callers[caller] += count
+
+        self.stats = dict(
+            (function, (count, count, own[function] * self.interval,
+                        count * self.interval,
+                        dict(callers.get(function, ()))))
+            for function, count in cumulative.items())
+
+    def dump_stats(self, path):
+        """Save the samples to 'path' as cProfile.Profile.dump_stats() does."""
+        pstats.Stats(self).dump_stats(path)
+
+class ProfileHook(_Hook):
+    """Profile the next 'turns' turns, then remove itself.
+
+    A turn runs from 'start_event' to 'end_event'. By default those are
+    TURN_START and FIGURE_BUILT, the start and end of a turn in the app;
+    only the app's GO emits TURN_START. Headless play (hr_logic.recolor() or
+    hr_game.recolor() in a loop) only emits RECOLOR_DONE: with both events
+    RECOLOR_DONE, the first recolor starts profiling and each turn runs from
+    one recolor's end to the next's.
+
+    Turns are profiled with cProfile, which times every call and so slows
+    call-heavy code down a lot, or, given an 'interval' in seconds, with a
+    Sampler. If given, 'path' gets the profile (see pstats) once it's done.
+    """
+    events = (TURN_START, RECOLOR_DONE, FIGURE_BUILT)
+
+    def __init__(self, turns=1, end_event=FIGURE_BUILT, path=None,
+                 start_event=TURN_START, interval=None):
+        for name, event in (("start_event", start_event),
+                            ("end_event", end_event)):
+            if event not in self.events:
+                raise ValueError("ProfileHook(): " + name + " must be one " +\
+                                 "of " + ", ".join(self.events) + "!")
+
+        self.turns = turns
+        self.start_event = start_event
+        self.end_event = end_event
+        self.path = path
+        self.profiled = 0
+        if interval is None:
+            self.profile = cProfile.Profile()
+        else:
+            self.profile = Sampler(interval)
+        self._running = False
+
+    def _handle(self, event):
+        if self._running and (event == self.end_event):
+            self.profile.disable()
+            self._running = False
+            self.profiled += 1
+
+            if self.profiled >= self.turns:
+                self.remove()
+                if self.path is not None:
+                    self.profile.dump_stats(self.path)
+                return
+
+        # After ending a turn, so one event can end a turn and start the next
+        if (not self._running) and (event == self.start_event) and \
+            (self.profiled < self.turns):
+            self.profile.enable()
+            self._running = True
+
+    def turn_start(self, event, **args):
+        self._handle(event)
+
+    def recolor_done(self, event, **args):
+        self._handle(event)
+
+    def figure_built(self, event, **args):
+        self._handle(event)
+
+    def remove(self):
+        if self._running:
+            self.profile.disable()
+            self._running = False
+        super().remove()
+
+    def stats(self):
+        """Return the profile so far as a pstats.Stats."""
+        return pstats.Stats(self.profile)
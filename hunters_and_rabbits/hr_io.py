@@ -3,81 +3,186 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 #
 # Contact: 01101011@tuta.io
+import os
 import xml.etree.ElementTree as ET
 from xml.dom import minidom # For pretty printing XML
 
-from hr_graph import Vertex, Graph
+from .hr_graph import Vertex, Graph
+from .hr_hooks import HOOKS, GRAPH_LOADED
+from .hr_metrics import REGISTRY
 
-def load_graph(path):
-    """Read an XML file at 'path' and return the graph it describes."""
-    g = Graph()
-    # Remove surrounding "s if given "path"
-    # (Common in Windows when using Shift + right-click > Copy as path)
-    path_split = path.split("\"")
-    if len(path_split) == 3:
-        path = path_split[1]
+# Graph elements handled between calls to load_graph()'s progress callback
+PROGRESS_INTERVAL = 1000
 
-    tree = ET.parse(path)
-    root = tree.getroot()
+# apply_edits() commands, and whether each takes edges (pairs of ids joined by
+# a comma) rather than vertex ids
+EDIT_COMMANDS = {
+    "add": False,
+    "delete": False,
+    "keep": False,
+    "connect": True,
+    "disconnect": True,
+    "contract": True,
+}
 
-    vertices = []
-    edges = []
+# load_graph() durations, served at the app's /metrics (see hr_metrics)
+LOAD_SECONDS = REGISTRY.histogram("hr_load_graph_seconds",
+                                  "Time loading graph files with " +\
+                                  "hr_io.load_graph()")
 
-    if not root.tag.lower() == "graph":
-        raise RuntimeError("load_graph(" + path + "): Root tag of a graph " +\
-                            "file must be \"graph\"; instead, found: \"" +\
-                            root.tag + "\"")
-
-    # Collect vertices and edges
-    for child in root:
-        # Lowercase the keys of the child.attrib dict to tolerate
-        # mixed case XML attributes
-        child.attrib = dict((k.lower(), v) for k,v in child.attrib.items())
-
-        if ((child.tag.lower() == "vertex") or
-            (child.tag.lower() == "v")):
-            # Vertex element
-            if not "id" in child.attrib:
-                raise RuntimeError("load_graph(" + path + "): Vertex " +\
-                                    "element missing \"id\" attribute!")
-
-            new_vert = Vertex(child.attrib["id"], "black")
-
-            if "color" in child.attrib:
-                if ((child.attrib["color"].strip().lower() == "white") or
-                    (child.attrib["color"].strip().lower() == "w")):
-                    new_vert.color = "white"
-                elif not ((child.attrib["color"].strip().lower() == "black") or
-                    (child.attrib["color"].strip().lower() == "b")):
-                    raise RuntimeError("load_graph(" + path + "): " +\
-                    "Unrecognized vertex color attribute: \"" +\
-                    child.attrib["color"] + "\"")
-
-            vertices.append(new_vert)
-        elif ((child.tag.lower() == "edge") or
-            (child.tag.lower() == "e")):
-            # Edge element
-            if not (("id1" in child.attrib) and
-                ("id2" in child.attrib)):
-                raise RuntimeError("load_graph(" + path + "): Edge element " +\
-                "missing \"id1\" and/or \"id2\" attributes!")
-
-            edges.append((child.attrib["id1"], child.attrib["id2"]))
-        else:
-            # Unrecognized element
-            raise RuntimeError("load_graph(" + path + "): Unrecognized " +\
-                                "graph element: \"" + child.tag + "\"")
+@LOAD_SECONDS.time()
+def load_graph(path, progress=None):
+    """Read an XML file at 'path' and return the graph it describes.
+
+    If given, 'progress' is called as progress(phase, fraction) every so often
+    while loading, where 'phase' is "parse" (reading the file) or "build"
+    (adding the parsed vertices and edges to the graph) and 'fraction' is how
+    much of that phase is done, from 0.0 to 1.0. Anything it raises aborts the
+    load and propagates to the caller, so it can be used to cancel.
+    """
+    g = Graph()
+    path = strip_path_quotes(path)
+    vertices, edges = _parse_graph_file(path, progress)
+
+    if progress is None:
+        progress = lambda phase, fraction: None
 
     # Add collected vertices...
-    for v in vertices:
+    total = max(len(vertices) + len(edges), 1)
+    progress("build", 0.0)
+
+    for i, v in enumerate(vertices, 1):
         g.add_vert(v)
+        if i % PROGRESS_INTERVAL == 0:
+            progress("build", i / total)
 
     # ...then collected edges
-    for e in edges:
+    for i, e in enumerate(edges, len(vertices) + 1):
         g.add_edge(e[0], e[1])
+        if i % PROGRESS_INTERVAL == 0:
+            progress("build", i / total)
+
+    progress("build", 1.0)
+
+    if HOOKS.active:
+        HOOKS.emit(GRAPH_LOADED, graph=g, path=path)
 
     return g
 
+def load_compact_graph(path, progress=None):
+    """Read an XML file at 'path' and return its graph as an
+    hr_compact.CompactGraph, with its black vertices as a bool array.
+
+    This skips building the hr_graph.Graph, which takes several times the
+    memory (see hr_memory). 'progress' is as for load_graph(), but only
+    reports the "parse" phase.
+    """
+    from .hr_compact import CompactGraph # Keeps NumPy out of load_graph()
+    import numpy as np
+
+    vertices, edges = _parse_graph_file(strip_path_quotes(path), progress)
+    cg = CompactGraph.from_edges([v.id for v in vertices], edges)
+    black = np.array([v.color == "black" for v in vertices], dtype=bool)
+
+    return cg, black
+
+def strip_path_quotes(path):
+    """Return a path without the surrounding "s it's sometimes pasted with
+    (common in Windows when using Shift + right-click > Copy as path).
+    """
+    path_split = path.split("\"")
+    if len(path_split) == 3:
+        return path_split[1]
+
+    return path
+
+def _parse_graph_file(path, progress=None):
+    """Return the Vertex objects and (id, id) edges listed in the XML file at
+    'path', reporting the "parse" phase to 'progress' as load_graph() does.
+    """
+    if progress is None:
+        progress = lambda phase, fraction: None
+
+    vertices = []
+    edges = []
+
+    with open(path, "rb") as graph_file:
+        file_size = max(os.fstat(graph_file.fileno()).st_size, 1)
+        # Parse incrementally so progress can be reported and each element
+        # can be dropped from the tree once collected.
+        depth = 0
+        root = None
+        progress("parse", 0.0)
+
+        for event, elt in ET.iterparse(graph_file, events=("start", "end")):
+            if event == "start":
+                depth += 1
+
+                if root is None:
+                    root = elt
+                    if not root.tag.lower() == "graph":
+                        raise RuntimeError("load_graph(" + path + "): Root " +\
+                                            "tag of a graph file must be " +\
+                                            "\"graph\"; instead, found: \"" +\
+                                            root.tag + "\"")
+                continue
+
+            depth -= 1
+
+            if depth == 1:
+                # A child of the root is complete
+                _collect_graph_element(elt, path, vertices, edges)
+                root.clear()
+
+                if (len(vertices) + len(edges)) % PROGRESS_INTERVAL == 0:
+                    progress("parse", graph_file.tell() / file_size)
+
+        progress("parse", 1.0)
+
+    return vertices, edges
+
+def _collect_graph_element(child, path, vertices, edges):
+    """Append the vertex or edge described by a child of a graph file's root
+    to 'vertices' or 'edges'.
+    """
+    # Lowercase the keys of the child.attrib dict to tolerate
+    # mixed case XML attributes
+    child.attrib = dict((k.lower(), v) for k,v in child.attrib.items())
+
+    if ((child.tag.lower() == "vertex") or
+        (child.tag.lower() == "v")):
+        # Vertex element
+        if not "id" in child.attrib:
+            raise RuntimeError("load_graph(" + path + "): Vertex " +\
+                                "element missing \"id\" attribute!")
+
+        new_vert = Vertex(child.attrib["id"], "black")
+
+        if "color" in child.attrib:
+            if ((child.attrib["color"].strip().lower() == "white") or
+                (child.attrib["color"].strip().lower() == "w")):
+                new_vert.color = "white"
+            elif not ((child.attrib["color"].strip().lower() == "black") or
+                (child.attrib["color"].strip().lower() == "b")):
+                raise RuntimeError("load_graph(" + path + "): " +\
+                "Unrecognized vertex color attribute: \"" +\
+                child.attrib["color"] + "\"")
+
+        vertices.append(new_vert)
+    elif ((child.tag.lower() == "edge") or
+        (child.tag.lower() == "e")):
+        # Edge element
+        if not (("id1" in child.attrib) and
+            ("id2" in child.attrib)):
+            raise RuntimeError("load_graph(" + path + "): Edge element " +\
+            "missing \"id1\" and/or \"id2\" attributes!")
+
+        edges.append((child.attrib["id1"], child.attrib["id2"]))
+    else:
+        # Unrecognized element
+        raise RuntimeError("load_graph(" + path + "): Unrecognized " +\
+                            "graph element: \"" + child.tag + "\"")
+
 def save_graph(g, path):
     """Save the graph 'g' to an XML file at 'path' and return its XML string."""
     root = ET.Element("graph")
@@ -114,3 +219,158 @@ def save_graph(g, path):
         save_file.write(formatted_xml_str)
 
     return formatted_xml_str
+
+def load_schedules(path):
+    """Read a schedule XML file at 'path' and return its schedules as a list
+    of (id, turns) tuples, where 'turns' is a list of lists of vertex ids to
+    shoot.
+
+    The format, with tags and attribute names case-insensitive:
+
+    <schedules>
+        <schedule id="sweep">
+            <turn><shot id="2"/></turn>
+            <turn/> <!-- No shots this turn -->
+            <turn><shot id="2"/><shot id="3"/></turn>
+        </schedule>
+    </schedules>
+
+    A schedule without an "id" attribute gets its position in the file.
+    """
+    path = strip_path_quotes(path)
+
+    schedules = []
+    root = None
+    turns = None
+    turn = None
+
+    # Schedule files can hold thousands of schedules, so they're parsed
+    # incrementally like graph files.
+    with open(path, "rb") as schedule_file:
+        for event, elt in ET.iterparse(schedule_file, events=("start", "end")):
+            tag = elt.tag.lower()
+            attrib = dict((k.lower(), v) for k,v in elt.attrib.items())
+
+            if event == "start":
+                if root is None:
+                    root = elt
+                    if not tag == "schedules":
+                        raise RuntimeError("load_schedules(" + path + "): " +\
+                                            "Root tag of a schedule file " +\
+                                            "must be \"schedules\"; " +\
+                                            "instead, found: \"" +\
+                                            elt.tag + "\"")
+                elif tag == "schedule" and turns is None:
+                    turns = []
+                elif tag == "turn" and turns is not None and turn is None:
+                    turn = []
+                elif tag == "shot" and turn is not None:
+                    if not "id" in attrib:
+                        raise RuntimeError("load_schedules(" + path + "): " +\
+                                            "Shot element missing \"id\" " +\
+                                            "attribute!")
+                    turn.append(attrib["id"])
+                else:
+                    raise RuntimeError("load_schedules(" + path + "): " +\
+                                        "Unexpected element: \"" +\
+                                        elt.tag + "\"")
+            elif tag == "turn":
+                turns.append(turn)
+                turn = None
+            elif tag == "schedule":
+                schedules.append((attrib.get("id", str(len(schedules))),
+                                  turns))
+                turns = None
+                root.clear()
+
+    return schedules
+
+def save_schedules(schedules, path):
+    """Save (id, turns) schedules to a schedule XML file at 'path' (see
+    load_schedules()) and return its XML string.
+    """
+    root = ET.Element("schedules")
+
+    for schedule_id, turns in schedules:
+        s_elt = ET.SubElement(root, "schedule")
+        s_elt.set("id", str(schedule_id))
+
+        for shots in turns:
+            t_elt = ET.SubElement(s_elt, "turn")
+            for vert_id in shots:
+                ET.SubElement(t_elt, "shot").set("id", vert_id)
+
+    # Add newlines and indents to XML
+    formatted_xml_str = minidom.parseString(ET.tostring(root)).toprettyxml(indent="    ")
+
+    with open(path, "w") as save_file:
+        save_file.write(formatted_xml_str)
+
+    return formatted_xml_str
+
+def parse_edits(text):
+    """Return graph edit commands (see apply_edits()) as a list of
+    (command, ids or edges) tuples; raise ValueError if they're malformed.
+    """
+    edits = []
+
+    for line in text.replace(";", "\n").splitlines():
+        words = line.split()
+        if not words:
+            continue
+
+        command = words[0].lower()
+        if command not in EDIT_COMMANDS:
+            raise ValueError("parse_edits(): Unknown command \"" + words[0] +\
+                             "\"; expected one of " +\
+                             ", ".join(EDIT_COMMANDS) + "!")
+
+        args = words[1:]
+        if EDIT_COMMANDS[command]:
+            args = [tuple(arg.split(",")) for arg in args]
+            if any(len(edge) != 2 or not all(edge) for edge in args):
+                raise ValueError("parse_edits(): \"" + command + "\" takes " +\
+                                 "edges as two ids joined by a comma, like " +\
+                                 "a,b!")
+
+        edits.append((command, args))
+
+    return edits
+
+def apply_edits(g, text):
+    """Apply graph edit commands to an hr_graph.Graph.
+
+    Commands are separated by semicolons or newlines, and each is a command
+    name followed by vertex ids or edges, separated by spaces:
+
+    add a b          Add vertices, black (the rabbit may be there)
+    delete a b       Delete vertices and their edges
+    keep a b c       Delete all other vertices (leaving the induced subgraph)
+    connect a,b c,d  Add edges
+    disconnect a,b   Delete edges
+    contract a,b     Merge b into a (see Graph.contract_edges())
+
+    Each command is one batched Graph call, in O(its size + the degrees of
+    the vertices it deletes or merges) ("keep" is O(|V|)). All commands are
+    parsed before any is applied, so malformed text changes nothing; a
+    command that doesn't fit the graph (e.g., deletes a missing vertex)
+    raises ValueError or KeyError, with the commands before it applied and
+    it and those after it not.
+    """
+    for command, args in parse_edits(text):
+        if command == "add":
+            g.add_verts(Vertex(id, "black") for id in args)
+        elif command == "delete":
+            g.del_verts(args)
+        elif command == "keep":
+            if not all(g.has_vert(id) for id in args):
+                raise KeyError("apply_edits(): One or more ids to keep are " +\
+                               "not vertices in the graph!")
+            keep = set(args)
+            g.del_verts([v.id for v in g if v.id not in keep])
+        elif command == "connect":
+            g.add_edges(args)
+        elif command == "disconnect":
+            g.del_edges(args)
+        else:
+            g.contract_edges(args)
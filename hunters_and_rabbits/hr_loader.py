@@ -0,0 +1,202 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Background graph loading and layout for the Dash app.
+
+A load job reads a graph file with hr_io.load_graph() and lays it out in a
+worker thread, publishing its progress, and each refinement of the layout, to
+a state store (see hr_store) for the app's callbacks to poll:
+
+state["load"] = {
+    "job": id of the current job,
+    "status": "parse", "build", "layout", "done", "cancelled" or "error",
+    "progress": fraction of the current status done (0.0 to 1.0),
+    "iteration": (layout iterations done, total),
+    "message": error message, if any,
+    "cancel": whether cancellation was requested,
+    "revision": count of layouts published so far,
+    "memory": None until the file is sized up, then {"vertices": ...,
+        "edges": ..., "estimated": estimated bytes as an hr_graph.Graph,
+        "compact": estimated bytes as an hr_compact.CompactGraph,
+        "budget": the budget or None, "measured": bytes once loaded or None}
+}
+
+A load whose Graph is estimated to go over the memory budget (see hr_memory)
+fails before parsing, suggesting the headless tools, which can play the
+compact representation.
+
+The graph and its first (coarse) positions are published together to
+state["graph"] and state["positions"]; later refinements only replace the
+positions.
+"""
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from . import hr_io
+from . import hr_memory
+
+# Seconds between progress writes to the store
+REPORT_INTERVAL = 0.2
+
+# A new load supersedes (and so cancels) the one before it, so there's never
+# a reason to run two at once.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hr_loader")
+
+class LoadCancelled(Exception):
+    """Raised inside a load job that was cancelled or superseded."""
+    pass
+
+def start_load(store, path, layout_steps, budget=None):
+    """Start loading the graph file at 'path' in the background.
+
+    'layout_steps' is called with the loaded hr_graph.Graph and must yield
+    (positions, iterations_done, iterations_total) tuples, coarsest first.
+    'budget' is the most bytes the graph may take (None for no limit).
+
+    Return the new job's id.
+    """
+    job = uuid.uuid4().hex
+
+    with store.session("load") as state:
+        state["load"] = {
+            "job": job,
+            "status": "parse",
+            "progress": 0.0,
+            "iteration": (0, 0),
+            "message": "",
+            "cancel": False,
+            "revision": 0,
+            "memory": None,
+        }
+
+    _executor.submit(_run, store, job, path, layout_steps, budget)
+
+    return job
+
+def cancel_load(store):
+    """Ask the running load job, if any, to stop."""
+    with store.session("load") as state:
+        load = state["load"]
+        if (load is not None) and (not is_finished(load)):
+            load["cancel"] = True
+
+def is_finished(load):
+    """Return whether a state["load"] dict describes a job that has ended."""
+    return load["status"] in ("done", "cancelled", "error")
+
+class _Reporter:
+    """Publishes one job's progress to a store and checks for cancellation."""
+    def __init__(self, store, job):
+        self.store = store
+        self.job = job
+        self.last_report = 0.0
+
+    def _check(self, load):
+        if (load is None) or (load["job"] != self.job):
+            raise LoadCancelled("Superseded by a newer load")
+        if load["cancel"]:
+            raise LoadCancelled("Cancelled")
+
+    def progress(self, phase, fraction):
+        """Progress callback for hr_io.load_graph()."""
+        now = time.monotonic()
+
+        if (now - self.last_report < REPORT_INTERVAL) and (0.0 < fraction < 1.0):
+            return
+        self.last_report = now
+
+        with self.store.session("load") as state:
+            load = state["load"]
+            self._check(load)
+            load["status"] = phase
+            load["progress"] = fraction
+
+    def memory(self, **memory):
+        """Publish memory numbers (see the module docstring)."""
+        with self.store.session("load") as state:
+            load = state["load"]
+            self._check(load)
+            load["memory"] = dict(load["memory"] or {}, **memory)
+
+    def layout(self, g, positions, done, total):
+        """Publish a layout; the graph too, if 'g' isn't None."""
+        keys = ("load", "positions") if g is None else \
+            ("load", "positions", "graph", "clicked", "history")
+
+        with self.store.session(*keys) as state:
+            load = state["load"]
+            self._check(load)
+
+            if g is not None:
+                state["graph"] = g
+                # Clicks on (and turns of) the previous graph mean nothing
+                # for this one
+                state["clicked"] = dict()
+                state["history"] = None
+            state["positions"] = positions
+            load["status"] = "layout"
+            load["progress"] = done / total if total else 1.0
+            load["iteration"] = (done, total)
+            load["revision"] += 1
+
+    def finish(self, status, message=""):
+        with self.store.session("load") as state:
+            load = state["load"]
+            if (load is None) or (load["job"] != self.job):
+                return # Superseded; the newer job owns the readout
+            load["status"] = status
+            load["message"] = message
+
+def _check_budget(reporter, path, budget):
+    """Estimate the graph's memory, publish it, and raise RuntimeError if it
+    won't fit in 'budget'.
+    """
+    estimate = hr_memory.estimate_file(path)
+    hr_memory.BUDGET_BYTES.set(budget if budget is not None else float("inf"))
+    for representation in hr_memory.REPRESENTATIONS:
+        hr_memory.GRAPH_BYTES.set(estimate.bytes(representation),
+                                  representation, "estimated")
+
+    reporter.memory(vertices=estimate.vertices, edges=estimate.edges,
+                    estimated=estimate.bytes("graph"),
+                    compact=estimate.bytes("compact"), budget=budget,
+                    measured=None)
+
+    if hr_memory.choose_representation(estimate, budget) != "graph":
+        raise RuntimeError("Loading this graph would take about " +\
+                           hr_memory.mib(estimate.bytes("graph")) + ", over " +\
+                           "the memory budget of " + hr_memory.mib(budget) +\
+                           ". Compact, it would take about " +\
+                           hr_memory.mib(estimate.bytes("compact")) + ": " +\
+                           "play it headless with hr-batch or hr-api, or " +\
+                           "raise --memory-budget.")
+
+def _run(store, job, path, layout_steps, budget=None):
+    reporter = _Reporter(store, job)
+
+    try:
+        _check_budget(reporter, path, budget)
+        g = hr_io.load_graph(path, progress=reporter.progress)
+
+        measured = g.memory_footprint()
+        hr_memory.GRAPH_BYTES.set(measured, "graph", "measured")
+        reporter.memory(vertices=g.get_vert_count(),
+                        edges=g.get_edge_count(), measured=measured)
+
+        publish_graph = g
+        for positions, done, total in layout_steps(g):
+            reporter.layout(publish_graph, positions, done, total)
+            publish_graph = None
+
+        if publish_graph is not None:
+            # Nothing to lay out (e.g., an empty graph)
+            reporter.layout(publish_graph, dict(), 0, 0)
+
+        reporter.finish("done")
+    except LoadCancelled:
+        reporter.finish("cancelled")
+    except Exception as e:
+        reporter.finish("error", repr(e))
@@ -3,8 +3,15 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 #
 # Contact: 01101011@tuta.io
-from hr_graph import Vertex, Graph
+from .hr_graph import Vertex, Graph
+from .hr_hooks import HOOKS, RECOLOR_DONE
+from .hr_metrics import REGISTRY
 
+# recolor() durations, served at the app's /metrics (see hr_metrics)
+RECOLOR_SECONDS = REGISTRY.histogram("hr_recolor_seconds",
+                                     "Time recoloring with hr_logic.recolor()")
+
+@RECOLOR_SECONDS.time()
 def recolor(g):
     """Recolors the given graph's vertices based on certain rules.
 
@@ -23,8 +30,57 @@ def recolor(g):
         if vert not in to_recolor_black:
             to_recolor_white.append(vert)
 
+    if HOOKS.active:
+        return _recolor_and_emit(g, to_recolor_black, to_recolor_white)
+
+    for vert in to_recolor_black:
+        vert.color = "black"
+
+    for vert in to_recolor_white:
+        vert.color = "white"
+
+def _recolor_and_emit(g, to_recolor_black, to_recolor_white):
+    """Finish a recolor() and emit RECOLOR_DONE (see hr_hooks)."""
+    # A vertex is in to_recolor_black once per black neighbor
+    to_recolor_black = set(to_recolor_black)
+    changed = sum(v.color != "black" for v in to_recolor_black) + \
+        sum(v.color != "white" for v in to_recolor_white)
+
     for vert in to_recolor_black:
         vert.color = "black"
 
     for vert in to_recolor_white:
         vert.color = "white"
+
+    HOOKS.emit(RECOLOR_DONE, graph=g, black=len(to_recolor_black),
+               changed=changed)
+
+def recolor_components(g, components):
+    """Recolor like recolor(), one connected component at a time.
+
+    'components' is g.components() (or any partition of g's vertex ids that
+    no edge crosses). A component with no black vertex stays all white, so
+    it's skipped without visiting its edges.
+    """
+    verts = dict((v.id, v) for v in g)
+
+    for component in components:
+        members = [verts[id] for id in component]
+
+        if not any(v.color == "black" for v in members):
+            continue
+
+        to_recolor_black = []
+        to_recolor_white = []
+
+        for vert in members:
+            if any(n.color == "black" for n in g[vert]):
+                to_recolor_black.append(vert)
+            else:
+                to_recolor_white.append(vert)
+
+        for vert in to_recolor_black:
+            vert.color = "black"
+
+        for vert in to_recolor_white:
+            vert.color = "white"
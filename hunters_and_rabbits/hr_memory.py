@@ -0,0 +1,122 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Memory estimates for graphs, checked against a budget before loading.
+
+An hr_graph.Graph takes several times the memory of the hr_compact
+CompactGraph of the same graph (see their memory_footprint()). Before a
+graph file is loaded, its vertices and edges are counted in a few slices
+spread over the file and scaled up to its size, and the counts give each
+representation's estimated bytes. choose_representation() then picks the
+Graph if it fits the budget, else the CompactGraph if that fits, else fails.
+
+Usage:
+estimate = estimate_file("huge.xml")
+estimate.bytes("graph"), estimate.bytes("compact")
+if choose_representation(estimate, default_budget()) == "compact":
+    cg, black = hr_io.load_compact_graph("huge.xml")
+"""
+import os
+import re
+
+from . import hr_io
+from .hr_metrics import REGISTRY
+
+REPRESENTATIONS = ("graph", "compact")
+# Approximate bytes per vertex and per edge of each representation, from the
+# memory_footprint() of random graphs of average degree 2 to 10 with short ids
+BYTES_PER_VERTEX = {"graph": 400, "compact": 110}
+BYTES_PER_EDGE = {"graph": 160, "compact": 32}
+# Slices of a graph file whose elements are counted, and their size
+SAMPLES = 16
+SAMPLE_BYTES = 64 << 10
+# Fraction of physical memory that default_budget() allows a graph
+DEFAULT_BUDGET_FRACTION = 0.5
+
+# Metrics served at the app's /metrics (see hr_metrics)
+GRAPH_BYTES = REGISTRY.gauge(
+    "hr_graph_bytes",
+    "Bytes of the last graph loaded by the app: \"estimated\" from its " +\
+    "file before loading, \"measured\" after",
+    labels=("representation", "source"))
+BUDGET_BYTES = REGISTRY.gauge("hr_memory_budget_bytes",
+                              "Memory budget for loading a graph")
+
+_VERTEX = re.compile(rb"<\s*(?:vertex|v)[\s/>]", re.IGNORECASE)
+_EDGE = re.compile(rb"<\s*(?:edge|e)[\s/>]", re.IGNORECASE)
+
+class Estimate:
+    """Estimated vertex and edge counts of a graph."""
+    def __init__(self, vertices, edges):
+        self.vertices = vertices
+        self.edges = edges
+
+    def bytes(self, representation="graph"):
+        """Return the estimated bytes of a representation (one of
+        REPRESENTATIONS).
+        """
+        return BYTES_PER_VERTEX[representation] * self.vertices + \
+            BYTES_PER_EDGE[representation] * self.edges
+
+def estimate_file(path):
+    """Return the Estimate of a graph file from its size and a sample of its
+    elements; exact (but for commented-out elements) for files of up to
+    SAMPLES * SAMPLE_BYTES.
+    """
+    path = hr_io.strip_path_quotes(path)
+    size = os.path.getsize(path)
+    vertices = edges = sampled = 0
+
+    with open(path, "rb") as graph_file:
+        if size <= SAMPLES * SAMPLE_BYTES:
+            starts = [0]
+            length = size
+        else:
+            # Vertices and edges are usually listed apart, so the slices are
+            # spread over the whole file.
+            step = (size - SAMPLE_BYTES) // (SAMPLES - 1)
+            starts = range(0, SAMPLES * step, step)
+            length = SAMPLE_BYTES
+
+        for start in starts:
+            graph_file.seek(start)
+            data = graph_file.read(length)
+            vertices += len(_VERTEX.findall(data))
+            edges += len(_EDGE.findall(data))
+            sampled += len(data)
+
+    scale = size / max(sampled, 1)
+
+    return Estimate(round(vertices * scale), round(edges * scale))
+
+def default_budget():
+    """Return DEFAULT_BUDGET_FRACTION of physical memory in bytes, or None
+    (no budget) where that can't be found (e.g., on Windows).
+    """
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+    return int(memory * DEFAULT_BUDGET_FRACTION)
+
+def mib(n):
+    """Return a byte count as text in MiB."""
+    return f"{n / (1 << 20):,.1f} MiB"
+
+def choose_representation(estimate, budget):
+    """Return "graph" if the Estimate's Graph fits in 'budget' bytes (or
+    'budget' is None), else "compact" if its CompactGraph does; raise
+    RuntimeError if neither does.
+    """
+    if (budget is None) or (estimate.bytes("graph") <= budget):
+        return "graph"
+    if estimate.bytes("compact") <= budget:
+        return "compact"
+
+    raise RuntimeError("choose_representation(): The graph would take " +\
+                       "about " + mib(estimate.bytes("compact")) + " even " +\
+                       "compact, over the memory budget of " + mib(budget) +\
+                       "!")
@@ -0,0 +1,218 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Latency and size metrics, in the Prometheus text exposition format.
+
+Modules declare their metrics once, at import, in the process-wide REGISTRY
+and observe into them as they run; the Dash app serves REGISTRY.render() at
+/metrics. An observation is a bisect into the bucket bounds and a few adds
+under a lock, so timing a call costs around a microsecond. Every process
+keeps its own numbers: under gunicorn, each worker answers /metrics with
+its own, as Prometheus expects of a multi-process job.
+
+Usage:
+SECONDS = REGISTRY.histogram("hr_thing_seconds", "Time doing the thing",
+                             labels=("kind",))
+with SECONDS.time("big"):
+    ...
+@SECONDS.time("small")
+def thing(): ...
+REGISTRY.render() # Text for a /metrics response
+"""
+import functools
+import math
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+# Content-Type of REGISTRY.render()'s text
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds for durations, in seconds
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bucket upper bounds for payload sizes, in bytes
+BYTES_BUCKETS = tuple(float(1 << shift) for shift in range(10, 31, 2))
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n")\
+        .replace("\"", "\\\"")
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f"{name}=\"{_escape(value)}\""
+                          for name, value in zip(names, values)) + "}"
+
+class _Timer:
+    """Times a 'with' block or, as a decorator, every call of a function,
+    into a Histogram.
+    """
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(perf_counter() - self.started,
+                               *self.label_values)
+
+    def __call__(self, func):
+        histogram, label_values = self.histogram, self.label_values
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - started, *label_values)
+
+        return timed
+
+class Gauge:
+    """A value that goes up and down, per combination of label values."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = dict()
+
+    def set(self, value, *label_values):
+        if len(label_values) != len(self.labels):
+            raise ValueError("Gauge.set(" + self.name + "): Expected " +\
+                             f"{len(self.labels)} label values!")
+        self._values[label_values] = value
+
+    def value(self, *label_values):
+        """Return the value, or None if it was never set."""
+        return self._values.get(label_values)
+
+    def samples(self):
+        """Yield the metric's exposition lines."""
+        for label_values, value in sorted(self._values.items()):
+            yield self.name + _label_text(self.labels, label_values) + " " +\
+                _format_value(value)
+
+class Histogram:
+    """Observation counts in cumulative buckets, with their sum, per
+    combination of label values.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=SECONDS_BUCKETS, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labels = tuple(labels)
+        # Label values: [per-bucket counts (the last for +Inf), sum]
+        self._series = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        if len(label_values) != len(self.labels):
+            raise ValueError("Histogram.observe(" + self.name + "): " +\
+                             f"Expected {len(self.labels)} label values!")
+        i = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = \
+                    [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def time(self, *label_values):
+        """Return a context manager and decorator observing elapsed
+        seconds.
+        """
+        return _Timer(self, label_values)
+
+    def count(self, *label_values):
+        """Return the number of observations."""
+        series = self._series.get(label_values)
+        return 0 if series is None else sum(series[0])
+
+    def sum(self, *label_values):
+        """Return the sum of observations."""
+        series = self._series.get(label_values)
+        return 0.0 if series is None else series[1]
+
+    def samples(self):
+        """Yield the metric's exposition lines."""
+        with self._lock:
+            series = sorted((k, (list(v[0]), v[1]))
+                            for k, v in self._series.items())
+        names = self.labels + ("le",)
+
+        for label_values, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield self.name + "_bucket" +\
+                    _label_text(names, label_values + (_format_value(bound),)) +\
+                    f" {cumulative}"
+            labels = _label_text(self.labels, label_values)
+            yield self.name + "_sum" + labels + " " + _format_value(total)
+            yield self.name + "_count" + labels + f" {cumulative}"
+
+class Registry:
+    """The metrics a process exposes, by name."""
+    def __init__(self):
+        self.metrics = dict()
+        self._lock = threading.Lock()
+
+    def _metric(self, cls, name, help, labels, **kwargs):
+        """Register and return a new 'cls' metric, or return the one already
+        registered under 'name' (a module can be imported twice, e.g., once
+        as __main__).
+        """
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labels=labels,
+                                                  **kwargs)
+            elif (type(metric) is not cls) or \
+                 (metric.labels != tuple(labels)):
+                raise ValueError("Registry(): Metric \"" + name + "\" is " +\
+                                 "already registered differently!")
+
+        return metric
+
+    def gauge(self, name, help, labels=()):
+        """Register and return a Gauge (see _metric())."""
+        return self._metric(Gauge, name, help, labels)
+
+    def histogram(self, name, help, buckets=SECONDS_BUCKETS, labels=()):
+        """Register and return a Histogram (see _metric())."""
+        return self._metric(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = sorted(self.metrics.items())
+
+        lines = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} " +\
+                         metric.help.replace("\\", "\\\\").replace("\n", "\\n"))
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+# The process's metrics, served by the app at /metrics
+REGISTRY = Registry()
@@ -0,0 +1,197 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Monte Carlo simulation of concrete rabbits against a shot schedule.
+
+The black set says where a rabbit might be; this module says when random
+rabbits actually get caught. Each rabbit starts on a uniformly random vertex
+(of 'start', if given) and, every turn, is caught if its vertex is shot and
+otherwise moves to a uniformly random neighbor. A rabbit on a vertex with no
+neighbors can't move and counts as caught, as the vertex would turn white.
+
+All rabbits of a batch are one NumPy array of vertex indices, moved together
+through the graph's CSR adjacency (see hr_compact), and batches are split
+between worker processes, each with its own random stream spawned from one
+seed.
+
+Usage:
+stats = simulate(cg, [["2"], ["3"], ["2"]], 10 ** 6, seed=1)
+stats.captures # Rabbits caught on each turn
+stats.survival() # Fraction still running after each turn
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .hr_shm import SharedTopology, resolve
+
+# Rabbits moved per NumPy pass; bounds each worker's memory use
+BATCH_SIZE = 1 << 20
+
+class CaptureStats:
+    """Capture times of simulated rabbits.
+
+    'captures[t]' is how many rabbits were caught on turn t + 1 and
+    'survivors' how many were still running after the last of 'turns'.
+    """
+    def __init__(self, rabbits, captures):
+        self.rabbits = rabbits
+        self.captures = captures
+        self.turns = len(captures)
+        self.survivors = rabbits - int(captures.sum())
+
+    def survival(self):
+        """Return the fraction of rabbits still running after each of turns
+        0 to 'turns'.
+        """
+        if not self.rabbits:
+            return np.ones(self.turns + 1)
+
+        caught = np.concatenate(([0], np.cumsum(self.captures)))
+        return 1.0 - caught / self.rabbits
+
+    def capture_fraction(self):
+        """Return the fraction of rabbits caught within 'turns'."""
+        return 1.0 - self.survival()[-1]
+
+    def mean_capture_turn(self):
+        """Return the mean turn of capture of the caught rabbits, or None if
+        none were caught.
+        """
+        caught = int(self.captures.sum())
+        if not caught:
+            return None
+
+        turns = np.arange(1, self.turns + 1)
+        return float((turns * self.captures).sum() / caught)
+
+    def __repr__(self):
+        return f"CaptureStats(rabbits={self.rabbits}, turns={self.turns}, " +\
+            f"survivors={self.survivors})"
+
+def schedule_from_policy(cg, policy, turns, black=None):
+    """Return the shots a policy fires over 'turns' turns, as vertex indices.
+
+    'policy(cg, black, turn)' returns the indices to shoot given the current
+    black set (a bool array, see hr_compact). Hunters never see the rabbit,
+    so the shots are the same for every rabbit and are worked out once, here,
+    before any rabbit moves. Turns after the black set empties fire nothing.
+    """
+    if black is None:
+        black = np.ones(cg.get_vert_count(), dtype=bool)
+    schedule = []
+
+    for turn in range(turns):
+        if not black.any():
+            break
+
+        shots = np.asarray(policy(cg, black, turn), dtype=np.intp)
+        schedule.append(shots)
+        black = black.copy()
+        black[shots] = False
+        black = cg.neighborhood(black)
+
+    return schedule
+
+def recommend_policy(k, depth=1):
+    """Return a policy that fires hr_recommend.recommend()'s k shots."""
+    from .hr_recommend import recommend
+
+    def policy(cg, black, turn):
+        shots, _ = recommend(cg, black, k, depth=depth)
+        return shots
+
+    return policy
+
+def _run_rabbits(cg, shot_masks, start, rabbits, seed_seq, batch_size):
+    """Simulate 'rabbits' rabbits in batches; return their capture counts.
+
+    'cg' is a CompactGraph or an hr_shm.TopologyHandle of one.
+    """
+    cg = resolve(cg)
+    rng = np.random.default_rng(seed_seq)
+    captures = np.zeros(len(shot_masks), dtype=np.int64)
+
+    for offset in range(0, rabbits, batch_size):
+        count = min(batch_size, rabbits - offset)
+        pos = start[rng.integers(0, len(start), size=count)]
+
+        for turn, shot in enumerate(shot_masks):
+            if not len(pos):
+                break
+
+            degree = cg.degree[pos]
+            caught = shot[pos] | (degree == 0)
+            captures[turn] += np.count_nonzero(caught)
+            pos = pos[~caught]
+            degree = degree[~caught]
+
+            # Uniform neighbor: the floor(u * degree)-th of each neighbor list
+            step = (rng.random(len(pos)) * degree).astype(np.intp)
+            pos = cg.indices[cg.indptr[pos] + step]
+
+    return captures
+
+def simulate(cg, schedule, rabbits, turns=None, start=None, seed=None,
+             workers=None, batch_size=BATCH_SIZE):
+    """Play 'rabbits' random rabbits against a schedule on a CompactGraph.
+
+    'schedule' is either a list of turns, each a list of vertex ids to
+    shoot, or a policy (see schedule_from_policy()). 'turns' defaults to the
+    schedule's length; turns past its end fire nothing. 'start' holds the
+    ids of the vertices rabbits may start on (every vertex by default).
+    'seed' makes runs repeatable for the same number of workers, which
+    defaults to the CPU count; with 1, no processes are started.
+
+    Return a CaptureStats.
+    """
+    if callable(schedule):
+        if turns is None:
+            raise ValueError("simulate(): A policy needs a number of turns!")
+        shot_lists = schedule_from_policy(cg, schedule, turns)
+    else:
+        shot_lists = [[cg.index[id] for id in shots] for shots in schedule]
+    if turns is None:
+        turns = len(shot_lists)
+
+    shot_masks = []
+    for turn in range(turns):
+        shot = np.zeros(cg.get_vert_count(), dtype=bool)
+        if turn < len(shot_lists):
+            shot[shot_lists[turn]] = True
+        shot_masks.append(shot)
+
+    if start is None:
+        start = np.arange(cg.get_vert_count(), dtype=np.intp)
+    else:
+        start = np.array([cg.index[id] for id in start], dtype=np.intp)
+    if (not len(start)) and rabbits:
+        raise ValueError("simulate(): No vertices for rabbits to start on!")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, rabbits))
+
+    # Independent streams for the workers, all derived from 'seed'
+    seed_seqs = np.random.SeedSequence(seed).spawn(workers)
+    shares = [rabbits // workers + (i < rabbits % workers)
+              for i in range(workers)]
+
+    if workers == 1:
+        captures = _run_rabbits(cg, shot_masks, start, rabbits, seed_seqs[0],
+                                batch_size)
+    else:
+        # Workers share one copy of the graph instead of each unpickling
+        # its own
+        with SharedTopology(cg) as shared, \
+             ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_rabbits, shared.handle,
+                                       shot_masks, start, share, seed_seq,
+                                       batch_size)
+                       for share, seed_seq in zip(shares, seed_seqs)]
+            captures = sum(f.result() for f in futures)
+
+    return CaptureStats(rabbits, np.asarray(captures, dtype=np.int64))
@@ -0,0 +1,198 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""One huge graph's recolor, split across worker processes.
+
+The vertices are split into contiguous blocks of about equal edge counts,
+one per worker. A block's halo is the vertices outside it with a neighbor in
+it: the only outside black bits its recolor needs. The black set lives in
+two shared memory buffers (hr_shm keeps the topology in shared memory too),
+the current turn's and the next's. Each turn, every worker gathers its
+block and halo bits from the current buffer into one local array, ORs each
+vertex's neighbor bits together through its block's slice of the CSR
+adjacency (see hr_compact), and writes its block of the next buffer; the
+buffers then swap. A barrier starts the turn and another ends it, so the
+parent shoots between turns and reads whole black sets.
+
+Usage:
+with PartitionedBoard(cg, workers=8) as board:
+    board.step(shots) # Shoot vertex indices, then recolor
+    board.black # Bool array, as hr_compact.CompactGraph.neighborhood()'s
+"""
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .hr_shm import SharedTopology, attach, open_block
+
+class Block:
+    """One worker's share of the vertices, lo to hi - 1, and its halo.
+
+    'local_indices' are cg.indices[indptr[lo]:indptr[hi]] renumbered into
+    the gathered array of block bits then halo bits.
+    """
+    def __init__(self, cg, lo, hi):
+        self.lo = lo
+        self.hi = hi
+        start, end = cg.indptr[lo], cg.indptr[hi]
+        neighbors = np.asarray(cg.indices[start:end])
+
+        outside = (neighbors < lo) | (neighbors >= hi)
+        self.halo = np.unique(neighbors[outside])
+        self.local_indices = neighbors - lo
+        self.local_indices[outside] = (hi - lo) + \
+            np.searchsorted(self.halo, neighbors[outside])
+
+        # reduceat() needs strictly increasing, in-range starts, so vertices
+        # without neighbors are left out (and stay white).
+        degree = np.asarray(cg.degree[lo:hi])
+        self.has_neighbors = degree > 0
+        self.starts = (np.asarray(cg.indptr[lo:hi]) - start)[self.has_neighbors]
+
+    def recolor(self, current, next_black):
+        """Write this block of the black set after 'current' to
+        'next_black'.
+        """
+        gathered = np.concatenate((current[self.lo:self.hi],
+                                   current[self.halo]))
+        result = np.zeros(self.hi - self.lo, dtype=np.uint8)
+
+        if len(self.starts):
+            result[self.has_neighbors] = np.maximum.reduceat(
+                gathered[self.local_indices], self.starts)
+        next_black[self.lo:self.hi] = result
+
+def split(cg, blocks):
+    """Return (lo, hi) bounds of up to 'blocks' contiguous vertex ranges
+    with about equal numbers of neighbor entries (and so recolor work).
+    """
+    n = cg.get_vert_count()
+    work = np.asarray(cg.indptr) + np.arange(n + 1) # Count vertices too
+    targets = np.linspace(0, work[-1], blocks + 1)[1:-1]
+    bounds = [0] + sorted(set(np.searchsorted(work, targets).tolist())) + [n]
+
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+
+def _worker(handle, lo, hi, buffer_names, n, barrier, stop):
+    """Recolor one block a turn at a time until 'stop' is set."""
+    cg = attach(handle)
+    block = Block(cg, lo, hi)
+    blocks = [open_block(name) for name in buffer_names]
+    buffers = [np.ndarray((n,), dtype=np.uint8, buffer=b.buf) for b in blocks]
+    turn = 0
+
+    try:
+        while True:
+            barrier.wait() # Turn starts
+            if stop.value:
+                break
+            block.recolor(buffers[turn % 2], buffers[(turn + 1) % 2])
+            turn += 1
+            barrier.wait() # Turn done
+    except threading.BrokenBarrierError:
+        pass
+    except BaseException:
+        barrier.abort() # Don't leave the parent waiting
+        raise
+    finally:
+        del buffers
+        for b in blocks:
+            b.close()
+
+class PartitionedBoard:
+    """Black set of a CompactGraph, recolored by 'workers' processes (the
+    CPU count by default; with 1, none are started) until close().
+
+    'black' is the starting black set (a bool array; all black by default).
+    """
+    def __init__(self, cg, workers=None, black=None):
+        self.n = cg.get_vert_count()
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        self.bounds = split(cg, max(1, workers))
+        self.turn = 0
+        self._buffers = [shared_memory.SharedMemory(create=True,
+                                                    size=max(self.n, 1))
+                         for _ in range(2)]
+        self._arrays = [np.ndarray((self.n,), dtype=np.uint8, buffer=b.buf)
+                        for b in self._buffers]
+        self._arrays[0][:] = 1 if black is None else black
+        self._processes = []
+        self._shared = None
+
+        if len(self.bounds) <= 1:
+            self._blocks = [Block(cg, *bounds) for bounds in self.bounds]
+            return
+
+        context = multiprocessing.get_context()
+        self._shared = SharedTopology(cg)
+        self._barrier = context.Barrier(len(self.bounds) + 1)
+        self._stop = context.Value("b", 0)
+
+        for lo, hi in self.bounds:
+            process = context.Process(
+                target=_worker, daemon=True,
+                args=(self._shared.handle, lo, hi,
+                      [b.name for b in self._buffers], self.n,
+                      self._barrier, self._stop))
+            process.start()
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def black(self):
+        """The current black set, as a bool array."""
+        return self._arrays[self.turn % 2].astype(bool)
+
+    def step(self, shots=()):
+        """Shoot the vertex indices in 'shots', then recolor."""
+        current = self._arrays[self.turn % 2]
+        current[np.asarray(shots, dtype=np.intp)] = 0
+
+        if not self._processes:
+            for block in self._blocks:
+                block.recolor(current, self._arrays[(self.turn + 1) % 2])
+        else:
+            try:
+                self._barrier.wait() # Start the turn...
+                self._barrier.wait() # ...and wait for every block
+            except threading.BrokenBarrierError:
+                raise RuntimeError("PartitionedBoard.step(): A worker " +\
+                                   "failed!")
+
+        self.turn += 1
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        if self._processes:
+            self._stop.value = 1
+            try:
+                self._barrier.wait(timeout=5)
+            except threading.BrokenBarrierError:
+                pass
+            for process in self._processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+        self._arrays = []
+        for b in self._buffers:
+            b.close()
+            b.unlink()
+        self._buffers = []
@@ -0,0 +1,145 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Shot recommendations: which k vertices to fire at this turn.
+
+Shots are scored by the size of the black set after the following recolor
+(smaller is better). The gain of shooting a black vertex v is how many
+vertices would turn white next turn that otherwise wouldn't, i.e., the
+vertices whose only black neighbor is v. All |V| gains come from one pass of
+neighbor-count arithmetic over the graph's CSR adjacency (see hr_compact), so
+a recommendation costs a few O(|V|+|E|) NumPy passes per turn looked ahead.
+
+Usage:
+shots = recommend_shots(g, 2) # ids of 2 vertices to shoot
+shots = recommend_shots(g, 2, depth=3) # ...judged 3 turns ahead
+"""
+import numpy as np
+
+from .hr_compact import CompactGraph
+
+def shot_scores(cg, black):
+    """Return the score of shooting each vertex alone, given the black set.
+
+    The integer part of a score is the vertex's gain. The fractional part
+    breaks ties (most vertices have no gain while most of the graph is
+    black): it's the vertex's share of keeping its neighbors black, where a
+    neighbor with c black neighbors contributes 1/c to each of them, scaled
+    into [0, 1). White vertices score -1; shooting them does nothing.
+    """
+    counts = cg.black_neighbor_counts(black)
+    # Vertices with exactly one black neighbor turn white if it's shot
+    gains = np.bincount(cg.rows, weights=(counts == 1)[cg.indices],
+                        minlength=len(counts))
+    share = np.zeros(len(counts))
+    np.divide(1.0, counts, out=share, where=counts > 0)
+    soft = np.bincount(cg.rows, weights=share[cg.indices],
+                       minlength=len(counts))
+
+    scores = gains + soft / (soft.max() + 1.0)
+    scores[~black] = -1.0
+
+    return scores
+
+def greedy_shots(cg, black, k):
+    """Return (shots, scores): up to k vertex indices to shoot, picked
+    greedily by score, and the scores from the last pick.
+
+    Scores are recomputed after each pick, so shots that only pay off
+    together (e.g., both black neighbors of one vertex) are found.
+    """
+    black = black.copy()
+    shots = []
+    scores = shot_scores(cg, black)
+
+    for _ in range(k):
+        best = int(np.argmax(scores))
+
+        if scores[best] < 0:
+            break # Nothing black left to shoot
+
+        shots.append(best)
+        black[best] = False
+        scores = shot_scores(cg, black)
+
+    return shots, scores
+
+def _candidate_shots(cg, black, k, branching):
+    """Return up to 'branching' distinct shot lists to try from 'black': the
+    greedy one, then variants that each swap one of its picks, weakest
+    first, for the best vertex it passed over.
+    """
+    greedy, scores = greedy_shots(cg, black, k)
+    candidates = [greedy]
+
+    # Best remaining vertices after the greedy picks
+    runners_up = [int(i) for i in np.argsort(-scores)[:branching - 1]
+                  if scores[i] >= 0]
+
+    for swap, runner_up in zip(reversed(range(len(greedy))), runners_up):
+        variant = list(greedy)
+        variant[swap] = runner_up
+        candidates.append(variant)
+
+    return candidates
+
+def recommend(cg, black, k, depth=1, beam_width=4, branching=4):
+    """Return (shots, black_after) for the best k shots found from 'black'.
+
+    'shots' is a list of vertex indices and 'black_after' is the black count
+    after this turn's recolor.
+    With depth > 1, a beam search plays 'depth' turns ahead, keeping the
+    'beam_width' lines with the fewest black vertices after each turn and
+    trying 'branching' shot lists from each, and the first turn of the best
+    line is returned.
+    """
+    if depth < 1:
+        raise ValueError("recommend(): depth must be at least 1!")
+
+    # Each line: (black count now, black set now, first turn's shots,
+    # black count after the first turn)
+    beam = [(int(black.sum()), black, None, None)]
+
+    for _ in range(depth):
+        expanded = []
+
+        for count, state, first, first_count in beam:
+            if count == 0:
+                expanded.append((count, state, first, first_count))
+                continue
+
+            for shots in _candidate_shots(cg, state, k, branching):
+                shot_state = state.copy()
+                shot_state[shots] = False
+                next_state = cg.neighborhood(shot_state)
+                next_count = int(next_state.sum())
+
+                if first is None:
+                    expanded.append((next_count, next_state, shots, next_count))
+                else:
+                    expanded.append((next_count, next_state, first, first_count))
+
+        expanded.sort(key=lambda line: (line[0], line[3]))
+        beam = expanded[:beam_width]
+
+    _, _, shots, black_after = beam[0]
+    if shots is None:
+        # Already all white
+        return [], 0
+
+    return shots, black_after
+
+def recommend_shots(g, k, depth=1, beam_width=4, branching=4, compact=None):
+    """Return the ids of k vertices of an hr_graph.Graph to shoot this turn.
+
+    See recommend() for 'depth', 'beam_width' and 'branching'.
+    Building the CompactGraph is the costliest part for one call; pass
+    'compact' (CompactGraph.from_graph(g)) to reuse one across turns.
+    """
+    cg = compact if compact is not None else CompactGraph.from_graph(g)
+    shots, _ = recommend(cg, cg.black_mask(g), k, depth=depth,
+                         beam_width=beam_width, branching=branching)
+
+    return [cg.ids[i] for i in shots]
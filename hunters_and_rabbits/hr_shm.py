@@ -0,0 +1,187 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Graph topology in shared memory, for worker processes.
+
+Sending a CompactGraph to a process pool pickles its arrays into every task,
+and each worker ends up with its own copy. A SharedTopology copies them
+once into multiprocessing.shared_memory blocks, along with the vertex ids
+(as one UTF-8 buffer and their offsets), and hands out a small, picklable
+TopologyHandle naming the blocks. Workers attach() to it and get a
+SharedCompactGraph whose arrays are views of the shared blocks: every
+worker reads the same physical pages.
+
+The parent owns the blocks: they live until it closes the SharedTopology
+(or leaves its with block), which should be after the workers are done.
+
+Usage:
+with SharedTopology(cg) as shared:
+    with ProcessPoolExecutor() as executor:
+        executor.map(work, [shared.handle] * n)
+
+def work(handle):
+    cg = attach(handle) # Attaches once per process
+"""
+import functools
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .hr_compact import CompactGraph
+
+# The arrays of a CompactGraph published, and their dtypes
+_FIELDS = (("indptr", np.intp), ("indices", np.intp), ("degree", np.intp),
+           ("rows", np.intp), ("id_offsets", np.int64), ("id_bytes", np.uint8))
+
+# Topologies this process has attached to, by handle
+_attached = dict()
+
+class TopologyHandle:
+    """Names and lengths of a SharedTopology's blocks; cheap to pickle."""
+    def __init__(self, names, lengths):
+        self.names = tuple(names)
+        self.lengths = tuple(lengths)
+
+    def __eq__(self, other):
+        return isinstance(other, TopologyHandle) and \
+            (self.names == other.names)
+
+    def __hash__(self):
+        return hash(self.names)
+
+    def __repr__(self):
+        return f"TopologyHandle({self.names[0]!r}, ...)"
+
+def open_block(name):
+    """Attach to the shared memory block called 'name'."""
+    # Before 3.13, attaching registers the block with the resource tracker
+    # as if this process had made it.
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+class SharedTopology:
+    """A CompactGraph's arrays and ids, published in shared memory blocks
+    until close().
+    """
+    def __init__(self, cg):
+        encoded = [id.encode("utf-8") for id in cg.ids]
+        id_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=id_offsets[1:])
+        arrays = {
+            "indptr": cg.indptr, "indices": cg.indices, "degree": cg.degree,
+            "rows": cg.rows, "id_offsets": id_offsets,
+            "id_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        }
+
+        self._blocks = []
+        try:
+            for field, dtype in _FIELDS:
+                array = np.asarray(arrays[field], dtype=dtype)
+                # Blocks can't be empty
+                block = shared_memory.SharedMemory(
+                    create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=dtype, buffer=block.buf)[:] = \
+                    array
+        except BaseException:
+            self.close()
+            raise
+
+        self.handle = TopologyHandle(
+            [block.name for block in self._blocks],
+            [len(np.asarray(arrays[field])) for field, _ in _FIELDS])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def nbytes(self):
+        """Return the total size of the blocks."""
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        """Free the blocks. Workers still attached keep their mappings, but
+        nothing new can attach.
+        """
+        for block in self._blocks:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                block.close()
+            except BufferError:
+                pass # Attached in this process too; unmapped with the views
+        self._blocks = []
+
+class SharedCompactGraph(CompactGraph):
+    """CompactGraph over views of a SharedTopology's blocks.
+
+    The ids (and their index) are decoded from the shared buffer only when
+    first used, as they're the one part that costs Python objects per
+    process, and workers working on vertex indices never need them.
+    """
+    def __init__(self, arrays, blocks):
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.degree = arrays["degree"]
+        self.rows = arrays["rows"]
+        self._id_offsets = arrays["id_offsets"]
+        self._id_bytes = arrays["id_bytes"]
+        # The blocks stay mapped for as long as the graph is around
+        self._blocks = blocks
+
+    @functools.cached_property
+    def ids(self):
+        offsets = self._id_offsets.tolist()
+        id_bytes = self._id_bytes.tobytes()
+
+        return tuple(id_bytes[offsets[i]:offsets[i + 1]].decode("utf-8")
+                     for i in range(len(offsets) - 1))
+
+    @functools.cached_property
+    def index(self):
+        return dict((id, i) for i, id in enumerate(self.ids))
+
+def attach(handle):
+    """Return a read-only SharedCompactGraph over the blocks of a
+    TopologyHandle.
+
+    A process attaches to each topology once; later calls return the same
+    graph.
+    """
+    cg = _attached.get(handle)
+    if cg is not None:
+        return cg
+
+    blocks = [open_block(name) for name in handle.names]
+    arrays = dict()
+    for (field, dtype), block, length in zip(_FIELDS, blocks, handle.lengths):
+        array = np.ndarray((length,), dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        arrays[field] = array
+
+    cg = SharedCompactGraph(arrays, blocks)
+    _attached[handle] = cg
+
+    return cg
+
+def detach(handle):
+    """Forget a process's attachment to a topology (see attach()), so its
+    blocks can be unmapped once nothing else refers to them.
+    """
+    _attached.pop(handle, None)
+
+def resolve(topology):
+    """Return a CompactGraph for either a CompactGraph or a TopologyHandle,
+    for worker functions that take both.
+    """
+    if isinstance(topology, TopologyHandle):
+        return attach(topology)
+    return topology
@@ -0,0 +1,498 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Exhaustive search for hunter strategies.
+
+A schedule for k hunters is a list of turns, each a list of at most k vertex
+ids to shoot, that leaves every vertex white wherever the rabbit started.
+The search is a breadth-first search over black sets (bitmasks, see
+hr_bitset): shooting S from black set B leads to N(B - S), and a schedule is
+a path to the empty set. Shooting fewer than k black vertices never helps, so
+only shot sets of exactly min(k, |B|) vertices are tried.
+
+The state space is up to 2^|V|, so this is for graphs of a few dozen vertices
+at most. On bipartite graphs the search runs in parity mode: the two parity
+classes of the black set (see hr_bitset.ParityBoard) are cleared one after
+the other, each searched as a set on alternating sides, which cuts the space
+to about 2 * 2^(|V|/2). Black sets that an automorphism of the graph maps
+onto each other are searched once (see hr_bitset.MaskSymmetry), which cuts
+the space by up to the group's order on grids, cycles and the like. Where
+the visited black sets won't fit in memory as Python ints, they can be
+packed into a bounded hr_ttable table that spills to disk.
+hunter_number() also splits the graph into its
+connected components, solving each isomorphism class of them once, and
+takes the schedules of paths, cycles and other families with known hunter
+numbers from hr_families rather than searching. The search only tries k
+between the hr_bounds bounds, from the lower one up.
+
+Usage:
+solution = hunter_number(g)
+solution.k # Fewest hunters that can always catch the rabbit
+solution.schedule # e.g., [["2"], ["3"], ["2"]]
+schedule = solve(g, 2) # A schedule for 2 hunters, or None
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .hr_bitset import BitGraph, MaskSymmetry, popcount, submasks_of_size
+from .hr_bounds import hunter_bounds
+from .hr_families import family_schedule
+from .hr_trajectory import Trajectory
+from .hr_ttable import TranspositionTable, unpack
+
+# States a bounded-memory search unpacks from a level, or collects before
+# checking them against its table, at a time
+LEVEL_CHUNK = 1 << 14
+
+# Solved components kept by isomorphism-invariant structural hash (see
+# hr_frozen), at most this many
+COMPONENT_CACHE_SIZE = 1024
+_component_cache = dict()
+
+class Solution:
+    """Result of hunter_number().
+
+    'k' is the hunter number, 'schedule' a schedule for k hunters and
+    'stats' a dict of search counters: "states" (black sets visited),
+    "parity" (whether parity mode was used), "symmetry" (the order of the
+    automorphism group states were deduplicated under), "family" (the hr_families
+    family whose closed-form schedule was used, if any), "bounds" (the
+    hr_bounds lower and upper bounds) and "decided_by": "family", "bounds"
+    (they met), "lower bound" (the search succeeded there), "upper bound"
+    (the search failed below it) or "search". For a whole graph,
+    "decided_by" lists each component's, and there are also "components"
+    (connected components) and "cached" (components whose solution was
+    already known).
+    """
+    def __init__(self, k, schedule, stats):
+        self.k = k
+        self.schedule = schedule
+        self.stats = stats
+
+    def __repr__(self):
+        return f"Solution(k={self.k}, turns={len(self.schedule)})"
+
+def _level_states(level):
+    """Yield the states of a level of stashed arrays, LEVEL_CHUNK unpacked
+    at a time.
+    """
+    for part in level:
+        for chunk in range(0, len(part), LEVEL_CHUNK):
+            yield from unpack(part[chunk:chunk + LEVEL_CHUNK])
+
+class _Search:
+    """BFS over black-set masks of one BitGraph, counting visited states.
+
+    With an hr_bitset.MaskSymmetry, black sets are visited once per orbit
+    of the graph's automorphism group: the first one reached is searched on
+    and its images are skipped.
+
+    With 'table_bytes', visited black sets go in an hr_ttable
+    TranspositionTable of that many bytes, spilling to disk under
+    'spill_dir', and each BFS level is stashed there too; the schedule is
+    then traced back level by level, a pass over the levels instead of a
+    parent pointer per state.
+    """
+    def __init__(self, bitgraph, max_states=None, symmetry=None,
+                 table_bytes=None, spill_dir=None):
+        self.bitgraph = bitgraph
+        self.max_states = max_states
+        self.symmetry = symmetry
+        self.table_bytes = table_bytes
+        self.spill_dir = spill_dir
+        self.states = 0
+
+    def _canonical(self):
+        if self.symmetry is None:
+            return lambda state: state
+        return self.symmetry.canonical
+
+    def _check_states(self, count):
+        if (self.max_states is not None) and \
+           (self.states + count > self.max_states):
+            raise RuntimeError("_Search.run(): More than " +\
+                               f"{self.max_states} states!")
+
+    def run(self, start, k):
+        """Return the shortest list of shot masks that clears 'start' with k
+        hunters, or None if there's none.
+        """
+        if start == 0:
+            return []
+
+        if k == 0:
+            # No choices to search: the black set just evolves
+            trajectory = Trajectory(self.bitgraph, start)
+            self.states += len(trajectory.states)
+            if not trajectory.clears():
+                return None
+            return [0] * (len(trajectory.states) - 1)
+
+        if self.table_bytes is not None:
+            return self._run_bounded(start, k)
+
+        neighborhood = self.bitgraph.neighborhood
+        canonical = self._canonical()
+        # Canonical state -> (previous state, shots fired there), for the
+        # first state of its orbit reached: the only one searched on
+        parents = {canonical(start): None}
+        frontier = [start]
+
+        while frontier:
+            next_frontier = []
+
+            for state in frontier:
+                for shots in submasks_of_size(state, min(k, popcount(state))):
+                    next_state = neighborhood(state & ~shots)
+
+                    if next_state == 0:
+                        self.states += len(parents)
+                        return self._path(parents, state, canonical) + \
+                            [shots]
+
+                    key = canonical(next_state)
+                    if key not in parents:
+                        parents[key] = (state, shots)
+                        next_frontier.append(next_state)
+
+                self._check_states(len(parents))
+
+            frontier = next_frontier
+
+        self.states += len(parents)
+        return None
+
+    def _run_bounded(self, start, k):
+        """run(), with the visited set in a TranspositionTable."""
+        neighborhood = self.bitgraph.neighborhood
+        canonical = self._canonical()
+
+        with TranspositionTable(self.bitgraph.get_vert_count(),
+                                self.table_bytes, self.spill_dir) as table:
+            table.add_many([canonical(start)])
+            # Each level is a list of stashed arrays, a batch each
+            levels = [[table.stash([start])]]
+
+            while levels[-1]:
+                next_level = []
+                candidates = []
+
+                for state in _level_states(levels[-1]):
+                    for shots in submasks_of_size(state,
+                                                  min(k, popcount(state))):
+                        next_state = neighborhood(state & ~shots)
+
+                        if next_state == 0:
+                            self.states += len(table)
+                            return self._trace(levels, state, k) + [shots]
+
+                        candidates.append(next_state)
+
+                    # Candidates are checked against the table, and the new
+                    # ones stashed, in batches
+                    if len(candidates) >= LEVEL_CHUNK:
+                        self._add_level_batch(table, candidates, next_level)
+                        candidates = []
+
+                self._add_level_batch(table, candidates, next_level)
+                levels.append(next_level)
+
+            self.states += len(table)
+            return None
+
+    def _add_level_batch(self, table, candidates, level):
+        canonical = self._canonical()
+        new = table.add_many(canonical(c) for c in candidates)
+        batch = [c for c, is_new in zip(candidates, new) if is_new]
+
+        if batch:
+            level.append(table.stash(batch))
+        self._check_states(len(table))
+
+    def _trace(self, levels, state, k):
+        """Return the shots from levels[0] to 'state' on the last level,
+        finding each state's predecessor on the level before.
+        """
+        neighborhood = self.bitgraph.neighborhood
+        path = []
+
+        for level in reversed(levels[:-1]):
+            state, shots = next(
+                (previous, shots) for previous in _level_states(level)
+                for shots in submasks_of_size(previous,
+                                              min(k, popcount(previous)))
+                if neighborhood(previous & ~shots) == state)
+            path.append(shots)
+
+        path.reverse()
+        return path
+
+    @staticmethod
+    def _path(parents, state, canonical):
+        path = []
+
+        while parents[canonical(state)] is not None:
+            state, shots = parents[canonical(state)]
+            path.append(shots)
+
+        path.reverse()
+        return path
+
+    def run_parity(self, sides, start, k):
+        """Like run(), clearing the parity classes of 'start' one at a time.
+
+        Return None if the classes can't be cleared one after the other,
+        which, for a start of every vertex, means no schedule exists.
+        """
+        classes = (start & sides[0], start & sides[1])
+
+        for first, second in ((0, 1), (1, 0)):
+            first_shots = self.run(classes[first], k)
+            if first_shots is None:
+                # Whatever clears both classes clears this one alone
+                return None
+
+            # The second class lies on the other side all along, so it
+            # evolves unshot meanwhile.
+            later = classes[second]
+            for _ in first_shots:
+                later = self.bitgraph.neighborhood(later)
+
+            second_shots = self.run(later, k)
+            if second_shots is not None:
+                return first_shots + second_shots
+
+        return None
+
+def _use_parity(g, bitgraph, parity):
+    if not parity:
+        return None
+
+    sides = bitgraph.sides(g)
+    if (sides is None) and (parity != "auto"):
+        raise ValueError("solve(): Parity mode needs a bipartite graph!")
+
+    return sides
+
+def _use_symmetry(g, bitgraph, symmetry):
+    if not symmetry:
+        return None
+
+    group = MaskSymmetry.from_graph(bitgraph, g)
+    if (group is None) or (group.order == 1):
+        return None # Nothing to deduplicate
+
+    return group
+
+def solve(g, k, start=None, parity="auto", max_states=None, symmetry=True,
+          table_bytes=None):
+    """Return a schedule for k hunters on an hr_graph.Graph, or None.
+
+    'start' holds the ids of the vertices the rabbit may start on (every
+    vertex by default). 'parity' is True, False or "auto" (parity mode if the
+    graph is bipartite). Parity mode finds a schedule whenever one exists
+    for a start of every vertex; for other starts, if it finds none, the
+    full search runs. With 'symmetry', black sets are searched once per
+    orbit of the graph's automorphism group. With 'table_bytes', at most
+    about that much memory holds visited black sets, the rest spilling to
+    temporary files (see hr_ttable). Raise RuntimeError if more than
+    'max_states' black sets would be visited.
+    """
+    if k < 0:
+        raise ValueError("solve(): k must not be negative!")
+
+    bitgraph = BitGraph.from_graph(g)
+    search = _Search(bitgraph, max_states,
+                     _use_symmetry(g, bitgraph, symmetry), table_bytes)
+    start_mask = bitgraph.full if start is None else \
+        bitgraph.mask_from_ids(start)
+
+    sides = _use_parity(g, bitgraph, parity)
+    shots = None
+
+    if sides is not None:
+        shots = search.run_parity(sides, start_mask, k)
+
+    if (shots is None) and ((sides is None) or (start_mask != bitgraph.full)):
+        shots = search.run(start_mask, k)
+
+    if shots is None:
+        return None
+
+    return [bitgraph.ids_from_mask(s) for s in shots]
+
+def _solve_connected(g, parity, max_states, symmetry, table_bytes):
+    """Return the Solution for a connected hr_graph.Graph."""
+    closed_form = family_schedule(g)
+    if closed_form is not None:
+        family, k, schedule = closed_form
+        return Solution(k, schedule, {"states": 0, "parity": False,
+                                      "symmetry": 1, "family": family,
+                                      "bounds": (k, k),
+                                      "decided_by": "family"})
+
+    bounds = hunter_bounds(g)
+    stats = {"states": 0, "parity": False, "symmetry": 1, "family": None,
+             "bounds": (bounds.lower, bounds.upper)}
+
+    if (bounds.lower == bounds.upper) and (bounds.schedule is not None):
+        stats["decided_by"] = "bounds"
+        return Solution(bounds.upper, bounds.schedule, stats)
+
+    bitgraph = BitGraph.from_graph(g)
+    group = _use_symmetry(g, bitgraph, symmetry)
+    search = _Search(bitgraph, max_states, group, table_bytes)
+    sides = _use_parity(g, bitgraph, parity)
+    stats["parity"] = sides is not None
+    stats["symmetry"] = 1 if group is None else group.order
+
+    # Only k between the bounds can be the answer; the smallest that works
+    # is, so they're tried from the lower bound up.
+    for k in range(bounds.lower, bounds.upper + 1):
+        if (k == bounds.upper) and (bounds.schedule is not None):
+            schedule = bounds.schedule
+            stats["decided_by"] = "upper bound"
+            break
+
+        if sides is None:
+            shots = search.run(bitgraph.full, k)
+        else:
+            shots = search.run_parity(sides, bitgraph.full, k)
+
+        if shots is not None:
+            schedule = [bitgraph.ids_from_mask(s) for s in shots]
+            stats["decided_by"] = "lower bound" if k == bounds.lower \
+                else "search"
+            break
+    else:
+        # Only if the upper bound (e.g., vertex separation's, which comes
+        # without a schedule) is wrong
+        raise RuntimeError("_solve_connected(): No schedule within the " +\
+                           "upper bound!")
+
+    stats["states"] = search.states
+
+    return Solution(k, schedule, stats)
+
+def _cached_solution(key, order):
+    """Return the cached Solution of a component with structural hash 'key',
+    relabeled with the component's canonical 'order' of ids, or None.
+    """
+    cached = _component_cache.get(key)
+    if cached is None:
+        return None
+
+    k, positions, stats = cached
+    schedule = [[order[i] for i in shots] for shots in positions]
+
+    return Solution(k, schedule, dict(stats, states=0))
+
+def _cache_solution(key, order, solution):
+    if len(_component_cache) >= COMPONENT_CACHE_SIZE:
+        del _component_cache[next(iter(_component_cache))] # Oldest
+    position = dict((id, i) for i, id in enumerate(order))
+    _component_cache[key] = (solution.k,
+                             [[position[id] for id in shots]
+                              for shots in solution.schedule],
+                             dict(solution.stats))
+
+def hunter_number(g, parity="auto", max_states=None, workers=1, cache=True,
+                  symmetry=True, table_bytes=None):
+    """Return the Solution for an hr_graph.Graph: the fewest hunters that
+    can clear it from all black, with a schedule.
+
+    Each connected component is solved on its own, and isomorphic components
+    (see hr_canon) only once; with 'cache', solutions are kept across calls.
+    Components left to solve are split between 'workers' processes (the CPU
+    count if None). The hunter number is the largest component's, and the
+    schedule clears the components one after the other: the others only
+    shrink while they wait, since nobody shoots them, so a component's
+    schedule from all black still clears it.
+
+    In parity mode, each search clears the two parity classes one after the
+    other, each with its own half-size search (see solve() for 'parity',
+    'max_states', 'symmetry' and 'table_bytes', which is per worker).
+    """
+    if (parity is True) and (not g.is_bipartite()):
+        raise ValueError("hunter_number(): Parity mode needs a bipartite " +\
+                         "graph!")
+
+    # Each subgraph's vertices in the graph's order, as in the graph
+    position = dict((v.id, i) for i, v in enumerate(g))
+    subgraphs = [g.induced_subgraph(sorted(ids, key=position.get))
+                 for ids in g.components()]
+    solutions = [None] * len(subgraphs)
+    # Structural hash -> indices of the subgraphs with it, left to solve
+    pending = dict()
+    cached = 0
+
+    for i, sub in enumerate(subgraphs):
+        # Hashed rather than keyed by the canonical form itself, which is as
+        # big as the component
+        frozen = sub.freeze() if cache else None
+        if (frozen is None) or (frozen.structural_hash(invariant=True) is None):
+            pending[("uncached", i)] = [(i, None)]
+            continue
+
+        key = (frozen.structural_hash(invariant=True), str(parity))
+        order = frozen.canonical_order()
+        solution = _cached_solution(key, order)
+        if solution is not None:
+            solutions[i] = solution
+            cached += 1
+        else:
+            pending.setdefault(key, []).append((i, order))
+
+    # One of each isomorphic group is solved and relabeled for the rest
+    jobs = list(pending.items())
+    firsts = [subgraphs[group[0][0]] for _, group in jobs]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    if workers == 1:
+        solved = [_solve_connected(sub, parity, max_states, symmetry,
+                                   table_bytes) for sub in firsts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            solved = list(executor.map(_solve_connected, firsts,
+                                       [parity] * len(firsts),
+                                       [max_states] * len(firsts),
+                                       [symmetry] * len(firsts),
+                                       [table_bytes] * len(firsts)))
+
+    for (key, group), solution in zip(jobs, solved):
+        first, order = group[0]
+        solutions[first] = solution
+
+        if order is not None:
+            _cache_solution(key, order, solution)
+            for i, other_order in group[1:]:
+                solutions[i] = _cached_solution(key, other_order)
+
+    # Components that need hunters are cleared in turn; the rest clear
+    # themselves meanwhile, or in empty turns after.
+    schedule = []
+    idle_turns = 0
+    for solution in solutions:
+        if solution.k > 0:
+            schedule.extend(solution.schedule)
+        else:
+            idle_turns = max(idle_turns, len(solution.schedule))
+    schedule.extend([] for _ in range(idle_turns - len(schedule)))
+
+    return Solution(max((s.k for s in solutions), default=0), schedule, {
+        "states": sum(s.stats["states"] for s in solutions),
+        "parity": any(s.stats["parity"] for s in solutions),
+        "symmetry": max((s.stats["symmetry"] for s in solutions), default=1),
+        "family": solutions[0].stats["family"] if len(solutions) == 1 \
+            else None,
+        "bounds": (max((s.stats["bounds"][0] for s in solutions), default=0),
+                   max((s.stats["bounds"][1] for s in solutions), default=0)),
+        "decided_by": [s.stats["decided_by"] for s in solutions],
+        "components": len(subgraphs),
+        "cached": cached,
+    })
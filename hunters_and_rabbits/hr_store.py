@@ -0,0 +1,153 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Game state stores for the Dash app.
+
+The app keeps a handful of values (the loaded graph, the vertices clicked this
+turn, the layout positions, the progress of a background load, the turn
+history) between callbacks. A store hands them out as a plain dict for the
+duration of a session() block and keeps whatever the block left in it.
+
+Usage:
+store = SqliteStore("hr_state.db")
+with store.session() as state:
+    state["graph"] = g
+"""
+import os
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .hr_graph import Graph
+
+def default_state():
+    """Return the state of an app with no graph loaded."""
+    return {
+        "graph": Graph(),
+        "clicked": dict(),
+        "positions": None,
+        "load": None,
+        "history": None,
+    }
+
+class MemoryStore:
+    """In-process state store, for the single-user desktop app.
+
+    Sessions are serialized with a lock so that Dash's threaded dev server
+    can't interleave two callbacks' read-modify-write cycles.
+    """
+    def __init__(self):
+        self._state = default_state()
+        self._lock = threading.RLock()
+
+    def ping(self):
+        """Do nothing; an in-process store is always reachable."""
+        pass
+
+    @contextmanager
+    def session(self, *keys):
+        """Yield the live state dict while holding the store's lock.
+
+        'keys' is accepted for compatibility with SqliteStore.session(); the
+        whole state is always available.
+        """
+        with self._lock:
+            yield self._state
+
+class SqliteStore:
+    """State store shared between processes through a local SQLite file.
+
+    Each key is kept as a pickled blob in a single table. A session runs in an
+    IMMEDIATE transaction, so concurrent sessions from other worker processes
+    block until it commits, and an exception inside the block rolls the whole
+    session back.
+
+    That write lock is held for the whole block, not just the read and write
+    of the keys: sessions (across all workers) run one at a time, and the
+    block's work (e.g., recoloring and building a figure) is time every other
+    worker waits. Each session also unpickles the keys it reads and pickles
+    them all again to find the changed ones, which for a big graph costs about
+    as much as the callback. Keep blocks short and pass session() the keys a
+    block actually uses.
+    """
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        # sqlite3 connections can't cross threads or forks, so each thread of
+        # each process opens its own lazily.
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS state " +\
+                         "(key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def _connect(self):
+        if self._pid != os.getpid():
+            # Forked (e.g., into a server worker); the parent's connections
+            # belong to the parent.
+            self._local = threading.local()
+            self._pid = os.getpid()
+
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   isolation_level=None)
+            self._local.conn = conn
+
+        return conn
+
+    def ping(self):
+        """Raise if the database can't be read."""
+        self._connect().execute("SELECT 1 FROM state LIMIT 1").fetchall()
+
+    def reset(self):
+        """Replace whatever is stored with default_state()."""
+        with self.session() as state:
+            state.clear()
+            state.update(default_state())
+
+    @contextmanager
+    def session(self, *keys):
+        """Yield the stored state as a dict and write back any changes.
+
+        If 'keys' are given, only those keys are read and written, which saves
+        unpickling (and re-pickling) a big graph just to update a progress
+        readout. The database is write-locked until the block ends.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+
+        try:
+            if keys:
+                rows = conn.execute(
+                    "SELECT key, value FROM state WHERE key IN (" +\
+                    ", ".join("?" * len(keys)) + ")", keys).fetchall()
+            else:
+                rows = conn.execute("SELECT key, value FROM state").fetchall()
+            stored = dict((k, v) for k, v in rows)
+            state = default_state()
+            if keys:
+                state = dict((k, state.get(k)) for k in keys)
+            for k, v in stored.items():
+                state[k] = pickle.loads(v)
+
+            yield state
+
+            for k, v in state.items():
+                blob = pickle.dumps(v, pickle.HIGHEST_PROTOCOL)
+                if stored.get(k) != blob:
+                    conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?)",
+                                 (k, blob))
+            for k in stored.keys() - state.keys():
+                conn.execute("DELETE FROM state WHERE key = ?", (k,))
+
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
@@ -0,0 +1,134 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Where the black set goes when nobody shoots.
+
+Unshot, the black set after t turns is N^t(B): the vertices at the end of a
+walk of exactly t edges from a black vertex. That sequence is eventually
+periodic, usually within a few turns of the graph's diameter, with period 1
+or 2 (2 when a bipartite component stays black).
+
+Trajectory steps the sequence once, remembering each state, until a state
+repeats, so state_at(T) is a lookup for any T. WalkDistances answers the same
+question per vertex from shortest even and odd walk lengths (BFS on the
+graph's bipartite double cover): u is black after t turns from black v if and
+only if the shortest walk from v to u with the parity of t has at most t
+edges, since a walk can always be padded with back-and-forth steps.
+
+Usage:
+traj = Trajectory(bg, bg.black_mask(g))
+traj.preperiod, traj.period
+board = traj.state_at(10 ** 9)
+"""
+class Trajectory:
+    """The unshot evolution of a black set on an hr_bitset.BitGraph.
+
+    'states[t]' is the black set after t turns for t up to the first repeat.
+    The states from 'preperiod' on repeat with period 'period'.
+    """
+    def __init__(self, bitgraph, start):
+        self.states = []
+        seen = dict()
+        state = start
+
+        # A repeated state is found by hashing, not by comparing with every
+        # state before it.
+        while state not in seen:
+            seen[state] = len(self.states)
+            self.states.append(state)
+            state = bitgraph.neighborhood(state)
+
+        self.preperiod = seen[state]
+        self.period = len(self.states) - self.preperiod
+
+    def state_at(self, turn):
+        """Return the black set after 'turn' unshot turns."""
+        if turn < 0:
+            raise ValueError("Trajectory.state_at(): turn must not be " +\
+                             "negative!")
+
+        if turn >= len(self.states):
+            turn = self.preperiod + (turn - self.preperiod) % self.period
+
+        return self.states[turn]
+
+    def clears(self):
+        """Return whether the black set empties by itself."""
+        return self.states[-1] == 0
+
+    def cycle(self):
+        """Return the states that repeat forever, in order."""
+        return self.states[self.preperiod:]
+
+class WalkDistances:
+    """Per-vertex t-step neighborhoods of an hr_bitset.BitGraph.
+
+    A vertex's shortest even and odd walks to every other vertex are found
+    by one bitmask BFS, the first time it's asked about, and kept as
+    cumulative balls: _balls[i][p][j] is the mask of vertices with a walk of
+    parity p and at most 2j + p edges from vertex i.
+    """
+    def __init__(self, bitgraph):
+        self.bitgraph = bitgraph
+        self._balls = dict()
+
+    # O(diameter) neighborhoods, the first time per vertex
+    def _vertex_balls(self, i):
+        balls = self._balls.get(i)
+        if balls is not None:
+            return balls
+
+        reached = [1 << i, 0]
+        balls = ([reached[0]], [])
+        frontier = reached[0]
+        distance = 0
+
+        while frontier:
+            distance += 1
+            parity = distance % 2
+            frontier = self.bitgraph.neighborhood(frontier) & ~reached[parity]
+            reached[parity] |= frontier
+            balls[parity].append(reached[parity])
+
+        self._balls[i] = balls
+
+        return balls
+
+    def ball(self, i, turns):
+        """Return the mask of vertices black after 'turns' unshot turns from
+        only vertex i (the vertex of bit i) black.
+        """
+        if (turns > 0) and (not self.bitgraph.neighbor_masks[i]):
+            return 0 # Padding a walk needs an edge
+
+        parity_balls = self._vertex_balls(i)[turns % 2]
+        if not parity_balls:
+            return 0 # No walk of this parity leaves vertex i
+
+        return parity_balls[min(turns // 2, len(parity_balls) - 1)]
+
+    def distance(self, i, j, parity):
+        """Return the length of the shortest walk with the given parity
+        (0 or 1) from vertex i to vertex j, or None if there's none.
+        """
+        for steps, ball in enumerate(self._vertex_balls(i)[parity]):
+            if ball >> j & 1:
+                return 2 * steps + parity
+
+        return None
+
+    def state_at(self, start, turns):
+        """Return the black set after 'turns' unshot turns from 'start',
+        without stepping through the turns in between.
+        """
+        state = 0
+        mask = start
+
+        while mask:
+            low = mask & -mask
+            state |= self.ball(low.bit_length() - 1, turns)
+            mask ^= low
+
+        return state
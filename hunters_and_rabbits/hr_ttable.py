@@ -0,0 +1,369 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Memory-bounded set of search states, spilling to disk.
+
+hr_solver's search keeps its visited black sets as Python ints in a dict, at
+around 100 bytes each, which outgrows RAM on graphs of 35 vertices or so. A
+TranspositionTable packs each state into ceil(|V| / 64) uint64 words, most
+significant first, and keeps them in a preallocated open-addressing hash
+table of at most 'max_bytes'. Once that's half full, its states are sorted
+and written out as a run: a memory-mapped file, searched by binary search.
+Only states found in neither the table nor a run are added, so runs never
+overlap; when there are MERGE_RUNS of them, a background thread merges them
+into one, MERGE_CHUNK states at a time, so later lookups take one binary
+search instead of many, and deletes the merged runs' files. A merge that
+fails (e.g., on a full disk) leaves the runs as they were, and the next
+add_many() raises its error.
+
+States are added a batch at a time, NumPy hashing and probing the whole
+batch at once.
+
+Usage:
+with TranspositionTable(bg.get_vert_count(), max_bytes=1 << 30) as table:
+    new = table.add_many([mask, ...]) # Whether each wasn't in it yet
+    mask in table
+"""
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+# Hash table size if none is given
+DEFAULT_TABLE_BYTES = 256 << 20
+# Fraction of the hash table filled before it's spilled to a run
+MAX_LOAD = 0.5
+# Runs on disk before they're merged into one
+MERGE_RUNS = 8
+# States per slice of a run read into memory while merging
+MERGE_CHUNK = 1 << 20
+
+_WORD = 0xFFFFFFFFFFFFFFFF
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15) # Fibonacci hashing multiplier
+
+def pack(states, words):
+    """Return non-negative ints as a (len(states), words) uint64 array, most
+    significant word first.
+    """
+    states = list(states)
+    packed = np.empty((len(states), words), dtype=np.uint64)
+
+    for w in range(words):
+        shift = 64 * (words - 1 - w)
+        packed[:, w] = [(s >> shift) & _WORD for s in states]
+
+    return packed
+
+def unpack(packed):
+    """Return the ints of a pack()ed array."""
+    states = [0] * len(packed)
+
+    for w in range(packed.shape[1]):
+        states = [(s << 64) | word
+                  for s, word in zip(states, packed[:, w].tolist())]
+
+    return states
+
+def _merge_pair(a, b, path, dtype):
+    """Merge two sorted, disjoint runs into a new run file at 'path'.
+
+    A state's place in the merged run is its place in its own run plus the
+    number of the other run's states below it.
+    """
+    merged = np.memmap(path, dtype=dtype, mode="w+", shape=(len(a) + len(b),))
+
+    for run, other in ((a, b), (b, a)):
+        for start in range(0, len(run), MERGE_CHUNK):
+            chunk = np.asarray(run[start:start + MERGE_CHUNK])
+            merged[np.arange(start, start + len(chunk)) +
+                   np.searchsorted(other, chunk)] = chunk
+
+    merged.flush()
+    del merged
+
+    return np.memmap(path, dtype=dtype, mode="r")
+
+def _unlink(path):
+    """Delete a file if it's there; a memmap of it stays readable (except on
+    Windows, where it can't be deleted yet and is left for close()).
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class TranspositionTable:
+    """Set of non-negative ints of up to 'bits' bits, holding at most
+    'max_bytes' in memory and the rest in files under 'spill_dir' (a new
+    temporary directory by default), deleted by close().
+    """
+    def __init__(self, bits, max_bytes=DEFAULT_TABLE_BYTES, spill_dir=None):
+        self.words = max(1, (bits + 63) // 64)
+        row_bytes = 8 * self.words
+
+        if max_bytes < 64 * row_bytes:
+            raise ValueError("TranspositionTable(): max_bytes must hold at " +\
+                             f"least 64 states of {bits} bits!")
+
+        self.capacity = 64
+        while 2 * self.capacity * row_bytes <= max_bytes:
+            self.capacity *= 2
+        self._shift = np.uint64(64 - (self.capacity.bit_length() - 1))
+        self._limit = int(self.capacity * MAX_LOAD)
+
+        # All-zero rows are empty slots, so 0 itself is kept aside
+        self._slots = np.zeros((self.capacity, self.words), dtype=np.uint64)
+        self._used = 0
+        self._has_zero = False
+
+        # Sorting and binary search compare states as one key each
+        if self.words == 1:
+            self._dtype = np.dtype("<u8")
+        else:
+            self._dtype = np.dtype([(f"w{w}", "<u8")
+                                    for w in range(self.words)])
+
+        self._parent_dir = spill_dir
+        self._dir = None
+        self._files = 0
+        # Sorted run memmaps, swapped under the lock by the merge thread
+        self._runs = []
+        self._lock = threading.Lock()
+        self._merger = None
+        self._merge_error = None
+        self.spilled = 0 # States in runs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._used + self.spilled + self._has_zero
+
+    def __contains__(self, state):
+        if state == 0:
+            return self._has_zero
+        return bool(self._contains(pack([state], self.words))[0])
+
+    def _keys(self, packed):
+        return np.ascontiguousarray(packed).view(self._dtype).ravel()
+
+    def _hash(self, packed):
+        h = np.zeros(len(packed), dtype=np.uint64)
+        for w in range(self.words):
+            h = (h ^ packed[:, w]) * _GOLDEN
+
+        return (h >> self._shift).astype(np.intp)
+
+    def _probe(self, packed):
+        """Return (slot, found) for each row: the slot holding it, or the
+        empty slot that ends its probe sequence if it isn't in the table.
+        """
+        slot = self._hash(packed)
+        found = np.zeros(len(packed), dtype=bool)
+        pending = np.arange(len(packed))
+
+        # Linear probing, every pending row a step at a time
+        while len(pending):
+            rows = self._slots[slot[pending]]
+            match = (rows == packed[pending]).all(axis=1)
+            empty = ~rows.any(axis=1)
+            found[pending[match]] = True
+
+            pending = pending[~(match | empty)]
+            slot[pending] = (slot[pending] + 1) & (self.capacity - 1)
+
+        return slot, found
+
+    def _contains(self, packed):
+        """Return whether each nonzero row is in the table or a run."""
+        _, found = self._probe(packed)
+
+        with self._lock:
+            runs = list(self._runs)
+
+        rest = np.flatnonzero(~found)
+        for run in runs:
+            if not len(rest):
+                break
+            keys = self._keys(packed[rest])
+            position = np.searchsorted(run, keys)
+            hit = np.zeros(len(rest), dtype=bool)
+            inside = position < len(run)
+            hit[inside] = run[position[inside]] == keys[inside]
+            found[rest[hit]] = True
+            rest = rest[~hit]
+
+        return found
+
+    def _insert(self, packed):
+        """Add distinct rows that aren't in the table yet."""
+        self._used += len(packed)
+
+        while len(packed):
+            slot, _ = self._probe(packed)
+            # Rows probing to the same empty slot: the first takes it and
+            # the others probe on.
+            _, first = np.unique(slot, return_index=True)
+            self._slots[slot[first]] = packed[first]
+
+            rest = np.ones(len(packed), dtype=bool)
+            rest[first] = False
+            packed = packed[rest]
+
+    def add_many(self, states):
+        """Add ints to the table and return a bool array of whether each
+        wasn't in it yet (repeats in 'states' after the first are not new).
+        """
+        self._check_merge("add_many")
+
+        packed = pack(states, self.words)
+        new = np.zeros(len(packed), dtype=bool)
+        if not len(packed):
+            return new
+
+        _, first = np.unique(self._keys(packed), return_index=True)
+        zero = ~packed[first].any(axis=1)
+        if zero.any():
+            new[first[zero]] = not self._has_zero
+            self._has_zero = True
+            first = first[~zero]
+
+        first = first[~self._contains(packed[first])]
+        new[first] = True
+
+        # Spill whenever the table is as full as it's allowed to get
+        to_add = packed[first]
+        start = 0
+        while start < len(to_add):
+            if self._used >= self._limit:
+                self._spill()
+            piece = to_add[start:start + self._limit - self._used]
+            self._insert(piece)
+            start += len(piece)
+
+        return new
+
+    def _run_path(self):
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="hr_ttable-",
+                                         dir=self._parent_dir)
+        self._files += 1
+
+        return os.path.join(self._dir, f"run-{self._files}.bin")
+
+    def _spill(self):
+        """Write the hash table out as a sorted run and empty it."""
+        self._check_merge("add_many")
+
+        keys = np.sort(self._keys(self._slots[self._slots.any(axis=1)]))
+        path = self._run_path()
+
+        run = np.memmap(path, dtype=self._dtype, mode="w+", shape=(len(keys),))
+        run[:] = keys
+        run.flush()
+        del run
+
+        with self._lock:
+            self._runs.append(np.memmap(path, dtype=self._dtype, mode="r"))
+            start_merge = (len(self._runs) >= MERGE_RUNS) and \
+                (self._merger is None)
+
+        self.spilled += len(keys)
+        self._slots[:] = 0
+        self._used = 0
+
+        if start_merge:
+            with self._lock:
+                runs = list(self._runs)
+            paths = [self._run_path() for _ in range(len(runs) - 1)]
+            self._merger = threading.Thread(target=self._merge,
+                                            args=(runs, paths), daemon=True)
+            self._merger.start()
+
+    def _merge(self, runs, paths):
+        """Merge 'runs' into one, pairwise, swap it in for them and delete
+        their files (the merge thread).
+        """
+        new_paths = list(paths)
+
+        try:
+            merged = list(runs)
+            while len(merged) > 1:
+                a, b = merged.pop(0), merged.pop(0)
+                merged.append(_merge_pair(a, b, paths.pop(), self._dtype))
+
+                # Pairwise merges are only read by the next one
+                for run in (a, b):
+                    if not any(run is r for r in runs):
+                        _unlink(run.filename)
+
+            with self._lock:
+                self._runs = merged + [r for r in self._runs
+                                       if not any(r is s for s in runs)]
+
+            # Lookups that took the old runs before the swap keep their maps
+            for run in runs:
+                _unlink(run.filename)
+        except Exception as e:
+            self._merge_error = e
+            for path in new_paths:
+                _unlink(path)
+        finally:
+            with self._lock:
+                self._merger = None
+
+    def join(self):
+        """Wait for a merge in progress, and re-raise anything it raised."""
+        merger = self._merger
+        if merger is not None:
+            merger.join()
+
+        self._check_merge("join")
+
+    def _check_merge(self, name):
+        """Raise RuntimeError if the last merge failed."""
+        if self._merge_error is not None:
+            e, self._merge_error = self._merge_error, None
+            raise RuntimeError("TranspositionTable." + name + "(): Merging " +\
+                               "runs failed!") from e
+
+    def run_count(self):
+        """Return the number of runs on disk."""
+        with self._lock:
+            return len(self._runs)
+
+    def stash(self, states):
+        """Write ints to a file alongside the runs and return them as a
+        read-only, memory-mapped pack()ed array, deleted by close().
+        """
+        packed = pack(states, self.words)
+        if not len(packed):
+            return packed
+
+        path = self._run_path()
+        stashed = np.memmap(path, dtype=np.uint64, mode="w+",
+                            shape=packed.shape)
+        stashed[:] = packed
+        stashed.flush()
+        del stashed
+
+        return np.memmap(path, dtype=np.uint64, mode="r", shape=packed.shape)
+
+    def close(self):
+        """Delete the table's files."""
+        merger = self._merger
+        if merger is not None:
+            merger.join()
+
+        with self._lock:
+            self._runs = []
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
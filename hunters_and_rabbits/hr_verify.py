@@ -0,0 +1,176 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Batch verification of shot schedules against one graph.
+
+Schedules are played bit-sliced: the black sets of up to 64 schedules share
+one uint64 word per vertex, bit s standing for schedule s, so a (|V|, W) word
+matrix holds 64W schedules' boards at once. A turn is then three whole-matrix
+NumPy operations for all of them: AND out the shots, gather each vertex's
+neighbor rows through the CSR adjacency (see hr_compact), and OR each
+vertex's rows together with bitwise_or.reduceat.
+
+Usage:
+results = verify(cg, hr_io.load_schedules("schedules.xml"))
+[r.schedule_id for r in results if r.passed]
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .hr_shm import SharedTopology, resolve
+
+# Schedules played together in one word matrix, and so per worker task
+CHUNK_SCHEDULES = 64 * 16
+
+class VerifyResult:
+    """Outcome of one schedule.
+
+    'passed' is whether every vertex was white after its last turn,
+    'cleared_turn' the first turn after which every vertex was white (None
+    if none), 'stalled_turn' the first turn after which the black set was
+    no smaller than before it (None if it shrank every turn until cleared)
+    and 'max_shots' the most shots it fired in a turn: the hunters it needs.
+    """
+    def __init__(self, schedule_id, passed, cleared_turn, stalled_turn,
+                 max_shots):
+        self.schedule_id = schedule_id
+        self.passed = passed
+        self.cleared_turn = cleared_turn
+        self.stalled_turn = stalled_turn
+        self.max_shots = max_shots
+
+    def __repr__(self):
+        return f"VerifyResult({self.schedule_id!r}, passed={self.passed}, " +\
+            f"cleared_turn={self.cleared_turn}, " +\
+            f"stalled_turn={self.stalled_turn})"
+
+def _neighborhood(cg, words):
+    """Return the recolored word matrix: row v is the OR of v's neighbors'."""
+    result = np.zeros_like(words)
+    has_neighbors = cg.degree > 0
+
+    if has_neighbors.any():
+        # reduceat() needs strictly increasing, in-range starts, so rows of
+        # vertices without neighbors are left out (and stay 0).
+        result[has_neighbors] = np.bitwise_or.reduceat(
+            words[cg.indices], cg.indptr[:-1][has_neighbors], axis=0)
+
+    return result
+
+def _black_counts(words, count):
+    """Return the number of set rows in each of the first 'count' bit
+    columns of a word matrix.
+    """
+    as_bytes = words.astype("<u8").view(np.uint8)
+    bits = np.unpackbits(as_bytes, axis=1, bitorder="little")
+
+    return bits[:, :count].sum(axis=0, dtype=np.int64)
+
+def _verify_chunk(cg, shot_lists, start):
+    """Play up to CHUNK_SCHEDULES schedules, given as lists of lists of
+    vertex indices; return their black counts as a (turns + 1, schedules)
+    array, row t holding the counts after turn t.
+
+    'cg' is a CompactGraph or an hr_shm.TopologyHandle of one.
+    """
+    cg = resolve(cg)
+    count = len(shot_lists)
+    words = (count + 63) // 64
+    turns = max((len(shots) for shots in shot_lists), default=0)
+
+    # The bits of the columns in use
+    valid = np.zeros(words, dtype=np.uint64)
+    for w in range(words):
+        width = min(64, count - 64 * w)
+        valid[w] = np.uint64((1 << width) - 1)
+
+    board = np.zeros((cg.get_vert_count(), words), dtype=np.uint64)
+    board[start] = valid
+
+    counts = np.zeros((turns + 1, count), dtype=np.int64)
+    counts[0] = _black_counts(board, count)
+
+    for turn in range(turns):
+        # The (vertex, schedule) pairs shot this turn
+        verts = []
+        columns = []
+        for s, shots in enumerate(shot_lists):
+            if turn < len(shots):
+                verts.extend(shots[turn])
+                columns.extend([s] * len(shots[turn]))
+
+        shot = np.zeros_like(board)
+        columns = np.array(columns, dtype=np.uint64)
+        np.bitwise_or.at(shot, (np.array(verts, dtype=np.intp),
+                                (columns // 64).astype(np.intp)),
+                         np.left_shift(np.uint64(1), columns % 64))
+
+        board = _neighborhood(cg, board & ~shot)
+        counts[turn + 1] = _black_counts(board, count)
+
+        if not counts[turn + 1].any():
+            break # All clear; later rows stay 0
+
+    return counts
+
+def _result(schedule_id, shots, counts):
+    """Return the VerifyResult of a schedule from its column of counts."""
+    counts = counts[:len(shots) + 1]
+    cleared = np.flatnonzero(counts == 0)
+    cleared_turn = int(cleared[0]) if len(cleared) else None
+    stalled = np.flatnonzero((counts[1:] >= counts[:-1]) & (counts[:-1] > 0))
+    stalled_turn = int(stalled[0]) + 1 if len(stalled) else None
+
+    return VerifyResult(schedule_id, bool(counts[-1] == 0), cleared_turn,
+                        stalled_turn, max((len(s) for s in shots), default=0))
+
+def verify(cg, schedules, start=None, workers=None):
+    """Play (id, turns) schedules (see hr_io.load_schedules()) on a
+    CompactGraph, from all black or from the ids in 'start', and return a
+    VerifyResult for each, in order.
+
+    Chunks of CHUNK_SCHEDULES schedules are split between 'workers'
+    processes (the CPU count by default); with 1, no processes are started.
+    """
+    schedules = list(schedules)
+    shot_lists = []
+    for schedule_id, turns in schedules:
+        try:
+            shot_lists.append([[cg.index[id] for id in shots]
+                               for shots in turns])
+        except KeyError as e:
+            raise ValueError("verify(): Schedule \"" + str(schedule_id) +\
+                             "\" shoots missing vertex " + str(e) + "!")
+
+    if start is None:
+        start = np.arange(cg.get_vert_count(), dtype=np.intp)
+    else:
+        start = np.array([cg.index[id] for id in start], dtype=np.intp)
+
+    chunks = [shot_lists[i:i + CHUNK_SCHEDULES]
+              for i in range(0, len(shot_lists), CHUNK_SCHEDULES)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    if workers == 1:
+        chunk_counts = [_verify_chunk(cg, chunk, start) for chunk in chunks]
+    else:
+        with SharedTopology(cg) as shared, \
+             ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_counts = list(executor.map(_verify_chunk,
+                                             [shared.handle] * len(chunks),
+                                             chunks, [start] * len(chunks)))
+
+    results = []
+    for chunk, counts in zip(chunks, chunk_counts):
+        for s, shots in enumerate(chunk):
+            schedule_id = schedules[len(results)][0]
+            results.append(_result(schedule_id, shots, counts[:, s]))
+
+    return results
@@ -3,7 +3,15 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 #
 # Contact: 01101011@tuta.io
+import argparse
+import base64
+import functools
+import json
+import os
 import random
+import sys
+import threading
+import urllib.request
 import webbrowser
 from time import sleep
 
@@ -11,121 +19,326 @@ import dash
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output, State
-import plotly.graph_objects as go
-import networkx as nx
+from flask import g as request_globals
 from flask import request
 
-import hr_graph
-import hr_io
-import hr_logic
+if __package__ in (None, "") and not getattr(sys, "frozen", False):
+    # Run as a script (python .../hunters_and_rabbits.py): Python put this
+    # file's directory first on sys.path, where "hunters_and_rabbits" is this
+    # module instead of the package it lives in. Use the package's parent.
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from hunters_and_rabbits import hr_frozen
+from hunters_and_rabbits import hr_graph
+from hunters_and_rabbits import hr_history
+from hunters_and_rabbits import hr_hooks
+from hunters_and_rabbits import hr_io
+from hunters_and_rabbits import hr_loader
+from hunters_and_rabbits import hr_logic
+from hunters_and_rabbits import hr_memory
+from hunters_and_rabbits import hr_metrics
+from hunters_and_rabbits import hr_store
 
 # Dash app
 app = dash.Dash(__name__)
-# Variables to be used by app as globals.
-loaded_hr_graph = hr_graph.Graph()
-clicked_verts_this_turn = dict()
-node_positions = None
-# (Ideally, we'd have to/from JSON functions and store globals in hidden
-# divs.
-# Dash discourages using globals but only in the sense that it breaks
-# multi-user sessions.
-# This, though, is intended for a single user at a time, so it's probably not
-# a problem. Probably.)
-
-def figure_from_hr_graph(hr_graph):
-    """Return a plotly.graph_objects.Figure of the given hr_graph.Graph."""
-    global node_positions
-
-    graph_fig = go.Figure(
-        data = [],
-        layout = go.Layout(
-            title = "Hunters and Rabbits",
-            titlefont = dict(size=16),
-            showlegend = False,
-            hovermode = "closest",
-            margin = dict(b = 20, l = 5, r = 5, t = 40),
-            annotations=[
-                dict(
-                    text = "Enter a file path and press \"Load\" to open a graph.",
-                    showarrow=False,
-                    xref="paper", yref="paper",
-                    x=0.005,
-                    y=-0.002
-                )
-            ],
-            xaxis = dict(
-                showgrid = False,
-                zeroline = False, showticklabels = False
-            ),
-            yaxis = dict(
-                showgrid = False,
-                zeroline = False, showticklabels = False
+# Game state used by the callbacks: the loaded graph ("graph"), the vertices
+# clicked this turn ("clicked"), and the node positions ("positions").
+# The desktop app keeps it in memory. Serve mode swaps in a SQLite-backed store
+# so that every worker process of the WSGI server sees the same game.
+# (Like the old globals, this is still one game shared by everyone connected;
+# serve mode makes it process-safe, not multi-user.)
+state_store = hr_store.MemoryStore()
+# Most bytes a loaded graph may take, or None for no limit (see hr_memory and
+# --memory-budget)
+memory_budget = hr_memory.default_budget()
+
+# Metrics served at /metrics (see hr_metrics)
+CALLBACK_SECONDS = hr_metrics.REGISTRY.histogram(
+    "hr_callback_seconds",
+    "Time in clicked_vertex_or_go_or_turn_button(), by what triggered it",
+    labels = ("branch",)
+)
+CALLBACK_RESPONSE_BYTES = hr_metrics.REGISTRY.histogram(
+    "hr_callback_response_bytes",
+    "Size of Dash callback responses (mostly figures), by what triggered " +\
+    "them",
+    buckets = hr_metrics.BYTES_BUCKETS,
+    labels = ("branch",)
+)
+FIGURE_SECONDS = hr_metrics.REGISTRY.histogram(
+    "hr_figure_seconds", "Time building figures in figure_from_hr_graph()"
+)
+LAYOUT_SECONDS = hr_metrics.REGISTRY.histogram(
+    "hr_layout_seconds", "Time in each step of refine_layout()"
+)
+# CALLBACK_SECONDS's "branch" label for each component that can trigger the
+# callback; anything else (the startup call) is "startup".
+CALLBACK_BRANCHES = {
+    "displayed-graph": "click",
+    "go-button": "go",
+    "load-button": "load",
+    "load-poll": "poll",
+    "suggest-button": "suggest",
+    "undo-button": "undo",
+    "redo-button": "redo",
+    "jump-button": "jump",
+    "edit-button": "edit"
+}
+
+def nx_graph_from_hr_graph(hr_graph):
+    """Return the given hr_graph.Graph as an nx.Graph of the same vertices."""
+    # networkx takes longer to import than the rest of the app put together
+    # and isn't needed until a graph is loaded.
+    import networkx as nx
+
+    nx_graph = nx.Graph()
+
+    for node in hr_graph:
+        for neighbor in hr_graph.neighbors(node.id):
+            # nx.Graph adds nodes while adding edges
+            nx_graph.add_edge(node, neighbor)
+
+    return nx_graph
+
+def layout_hr_graph(hr_graph):
+    """Return node positions (a dict of vertex: (x, y)) for an hr_graph.Graph."""
+    import networkx as nx
+
+    return nx.layout.spring_layout(nx_graph_from_hr_graph(hr_graph))
+
+# Finished layouts by the structural hash of their graph (see hr_frozen) and
+# iterations, so reloading a graph file (e.g., after changing its colors)
+# doesn't lay it out again
+_layout_cache = hr_frozen.DerivedCache(max_entries = 8)
+
+def refine_layout(hr_graph, iterations = 50, coarse_iterations = 5, step = 15):
+    """Lay out an hr_graph.Graph progressively.
+
+    Yield (positions, iterations_done, iterations) after a quick, coarse
+    layout of 'coarse_iterations' spring layout iterations, then after every
+    further 'step' iterations until 'iterations' are done.
+    (This is the 'layout_steps' that hr_loader.start_load() expects.)
+    A graph with the same ids and edges as one laid out before gets that
+    layout at once.
+    """
+    key = (hr_graph.freeze().structural_hash(), iterations)
+    positions = _layout_cache.lookup(key)
+    if positions is not None:
+        # Vertices are equal by id, so the old graph's positions fit
+        yield positions, iterations, iterations
+        return
+
+    import networkx as nx
+
+    nx_graph = nx_graph_from_hr_graph(hr_graph)
+    done = min(coarse_iterations, iterations)
+    with LAYOUT_SECONDS.time():
+        positions = nx.layout.spring_layout(nx_graph, iterations = done)
+    yield positions, done, iterations
+
+    while done < iterations:
+        n = min(step, iterations - done)
+        # Continue from the previous positions
+        with LAYOUT_SECONDS.time():
+            positions = nx.layout.spring_layout(nx_graph, pos = positions,
+                                                iterations = n)
+        done += n
+        yield positions, done, iterations
+
+    _layout_cache.put(key, positions)
+
+def place_new_vertices(hr_graph, positions):
+    """Return node positions for an edited hr_graph.Graph: those in
+    'positions' (a layout, or None) of its vertices, plus positions for the
+    vertices it lacks, each at the middle of its placed neighbors (or
+    anywhere, if none is placed).
+    """
+    import numpy as np
+
+    positions = positions or dict()
+    placed = dict((v, positions[v]) for v in hr_graph if v in positions)
+
+    for v in hr_graph:
+        if v in placed:
+            continue
+
+        neighbors = [placed[n] for n in hr_graph[v] if n in placed]
+        if neighbors:
+            # Jittered so vertices placed by the same neighbors don't overlap
+            placed[v] = np.mean(neighbors, axis = 0) + \
+                np.random.uniform(-0.05, 0.05, 2)
+        else:
+            placed[v] = np.random.uniform(-1, 1, 2)
+
+    return placed
+
+def figure_layout():
+    """Return the layout shared by all graph figures as a plain dict."""
+    return dict(
+        title = dict(text = "Hunters and Rabbits", font = dict(size=16)),
+        showlegend = False,
+        hovermode = "closest",
+        margin = dict(b = 20, l = 5, r = 5, t = 40),
+        annotations=[
+            dict(
+                text = "Enter a file path and press \"Load\" to open a graph.",
+                showarrow=False,
+                xref="paper", yref="paper",
+                x=0.005,
+                y=-0.002
             )
+        ],
+        xaxis = dict(
+            showgrid = False,
+            zeroline = False, showticklabels = False
+        ),
+        yaxis = dict(
+            showgrid = False,
+            zeroline = False, showticklabels = False
         )
     )
 
+def placeholder_figure():
+    """Return the figure shown before any graph is loaded."""
+    return figure_from_hr_graph(None)
+
+@functools.lru_cache(maxsize=None)
+def plotlyjs_typed_arrays():
+    """Return whether the plotly.js bundled with Dash reads typed arrays.
+
+    plotly.js 2.28 and later accept {"dtype": ..., "bdata": <base64>} in
+    place of a list for data arrays.
+    """
+    try:
+        from dash import dcc as bundled
+    except ImportError: # Dash 1.x
+        bundled = dcc
+
+    try:
+        package_info = os.path.join(os.path.dirname(bundled.__file__),
+                                    "package-info.json")
+        with open(package_info) as info_file:
+            version = json.load(info_file)["dependencies"]["plotly.js-dist-min"]
+        major, minor = version.lstrip("^~").split(".")[:2]
+
+        return (int(major), int(minor)) >= (2, 28)
+    except (OSError, KeyError, ValueError):
+        return False
+
+def encode_array(a):
+    """Return a float NumPy array in the most compact form plotly.js reads.
+
+    That's a base64 float32 typed array where supported; otherwise, a list of
+    floats rounded to 4 places (plenty for screen positions), with NaN as
+    None.
+    """
+    import numpy as np
+
+    if plotlyjs_typed_arrays():
+        return {
+            "dtype": "f4",
+            "bdata": base64.b64encode(
+                np.ascontiguousarray(a, dtype="<f4").tobytes()).decode("ascii")
+        }
+
+    # (NaN is the only float that isn't equal to itself)
+    return [None if x != x else x for x in np.round(a, 4).tolist()]
+
+# The parts of the last figure that only change with the layout, reused by
+# figure_from_hr_graph() while the cache key it's given stays the same. Only
+# ids are kept, not Vertex objects: a graph may be re-created between calls
+# (e.g., unpickled by hr_store.SqliteStore every session) with other colors.
+_figure_cache = {"key": None}
+
+@FIGURE_SECONDS.time()
+def figure_from_hr_graph(hr_graph, node_positions=None, cache_key=None):
+    """Return a plotly figure (as a plain dict) of the given hr_graph.Graph.
+
+    'node_positions' is a layout from layout_hr_graph(); it's generated if not
+    given. The coordinates are built as NumPy arrays and encoded once per
+    layout: if 'cache_key' is given and is the same as in the previous call,
+    that call's encoded node and edge coordinates are reused, and only the
+    node colors are rebuilt, from 'hr_graph'. The caller must change the key
+    whenever the graph's vertices, edges or positions change.
+    """
+    graph_fig = dict(data = [], layout = figure_layout())
+
     if hr_graph is not None:
+        import numpy as np
+
         # Remove "Press LOAD" prompt
-        graph_fig.layout.annotations[0].pop("text")
+        graph_fig["layout"]["annotations"][0].pop("text")
 
-        # Turn hr_graph.Graph to an nx.Graph
-        nx_graph = nx.Graph()
+        if (cache_key is None) or (cache_key != _figure_cache["key"]):
+            # Assign node positions if the caller has none yet
+            if node_positions is None:
+                node_positions = layout_hr_graph(hr_graph)
 
-        for node in hr_graph:
-            for neighbor in hr_graph.neighbors(node.id):
-                # nx.Graph adds nodes while adding edges
-                nx_graph.add_edge(node, neighbor)
+            # Vertices without edges aren't drawn
+            nodes = [v for v, neighbors in hr_graph.items() if neighbors]
+            index = dict((v, i) for i, v in enumerate(nodes))
+            # Each edge once, as a pair of node indices
+            edges = np.array(
+                [(index[v], index[n]) for v in nodes for n in hr_graph[v]
+                 if index[v] <= index[n]],
+                dtype = np.intp
+            ).reshape(-1, 2)
+            xy = np.array([node_positions[v] for v in nodes],
+                          dtype = float).reshape(-1, 2)
 
-        # Assign node positions (but don't re-assign them)
-        if node_positions is None:
-            node_positions = nx.layout.spring_layout(nx_graph)
+            # Edge segments separated by NaN gaps: x0, x1, NaN, x0, x1, NaN...
+            edge_xy = np.full((len(edges), 3, 2), np.nan)
+            edge_xy[:, 0] = xy[edges[:, 0]]
+            edge_xy[:, 1] = xy[edges[:, 1]]
+            edge_xy = edge_xy.reshape(-1, 2)
+
+            _figure_cache.update(
+                key = cache_key,
+                text = [v.id for v in nodes],
+                node_x = encode_array(xy[:, 0]),
+                node_y = encode_array(xy[:, 1]),
+                edge_x = encode_array(edge_xy[:, 0]),
+                edge_y = encode_array(edge_xy[:, 1]),
+            )
+
+        cached = _figure_cache
+        black = np.array([hr_graph.get_vert(id).color == "black"
+                          for id in cached["text"]], dtype = bool)
 
         # Construct node trace
-        node_trace = go.Scatter(
-            x = [],
-            y = [],
-            text = [],
+        node_trace = dict(
+            type = "scatter",
+            x = cached["node_x"],
+            y = cached["node_y"],
+            text = cached["text"],
             mode = "markers",
             hoverinfo = "text",
             marker = dict(
                 showscale = False,
                 #colorscale = "Greys",
                 reversescale = True,
-                color = [],
+                # Kept as color names: clicks read and flip them in place
+                color = np.where(black, "black", "white").tolist(),
                 size = 10,
                 line = dict(width = 2))
         )
-        for node in nx_graph.nodes():
-            # Store node coords in trace
-            x, y = node_positions[node]
-            node_trace["x"] += tuple([x])
-            node_trace["y"] += tuple([y])
-
-            # and node color
-            if node.color == "black":
-                node_trace["marker"]["color"] += tuple(["black"])
-            elif node.color == "white":
-                node_trace["marker"]["color"] += tuple(["white"])
-
-            # and ID
-            node_trace["text"]+=tuple([node.id])
 
         # Construct edge trace
-        edge_trace = go.Scatter(
-            x = [],
-            y = [],
+        edge_trace = dict(
+            type = "scatter",
+            x = cached["edge_x"],
+            y = cached["edge_y"],
             line=dict(width=0.5,color="#888"),
             hoverinfo="none",
             mode="lines"
         )
-        for edge in nx_graph.edges():
-            x_0, y_0 = node_positions[edge[0]]
-            x_1, y_1 = node_positions[edge[1]]
-            edge_trace["x"] += tuple([x_0, x_1, None])
-            edge_trace["y"] += tuple([y_0, y_1, None])
 
         # Add traces to figure
-        graph_fig.add_traces((node_trace, edge_trace))
+        graph_fig["data"] = [node_trace, edge_trace]
+
+    if hr_hooks.HOOKS.active:
+        hr_hooks.HOOKS.emit(hr_hooks.FIGURE_BUILT, graph=hr_graph,
+                            figure=graph_fig)
 
     return graph_fig
 
@@ -136,7 +349,7 @@ app.layout = html.Div([
             # Graph canvas
             dcc.Graph(
                 id = "displayed-graph",
-                figure = figure_from_hr_graph(None) # Graph to display
+                figure = placeholder_figure() # Graph to display
             ),
 
             # Counter of k vertices manipulated by user this turn
@@ -169,6 +382,34 @@ app.layout = html.Div([
                         n_clicks = 0
                     ),
 
+                    # Shot recommendations
+                    html.Button(
+                        id = "suggest-button",
+                        children = "Suggest",
+                        n_clicks = 0,
+                        title = "Outline in red the vertices worth " +\
+                                "shooting this turn"
+                    ),
+                    dcc.Input(
+                        id = "suggest-k",
+                        type = "number",
+                        min = 1,
+                        step = 1,
+                        value = 1,
+                        placeholder = "k",
+                        style = {"width": "4em"}
+                    ),
+                    dcc.Input(
+                        id = "suggest-depth",
+                        type = "number",
+                        min = 1,
+                        max = 10,
+                        step = 1,
+                        value = 1,
+                        placeholder = "turns ahead",
+                        style = {"width": "4em"}
+                    ),
+
                     # Turn counter
                     html.Div(
                         id = "turn-count",
@@ -178,6 +419,45 @@ app.layout = html.Div([
                         },
                     ),
 
+                    # Turn history
+                    html.Div(
+                        [
+                            html.Button(
+                                id = "undo-button",
+                                children = "Undo",
+                                n_clicks = 0,
+                                title = "Go back a turn"
+                            ),
+                            html.Button(
+                                id = "redo-button",
+                                children = "Redo",
+                                n_clicks = 0,
+                                title = "Go forward a turn you went back from"
+                            ),
+                            dcc.Input(
+                                id = "jump-turn",
+                                type = "number",
+                                min = 0,
+                                step = 1,
+                                placeholder = "turn",
+                                style = {"width": "4em"}
+                            ),
+                            html.Button(
+                                id = "jump-button",
+                                children = "Go to turn",
+                                n_clicks = 0,
+                                title = "Go to a turn played on this graph " +\
+                                        "(pressing GO there drops the turns " +\
+                                        "after it)"
+                            ),
+                        ],
+                        id = "history-stuff",
+                        style = {
+                            "float": "right",
+                            "padding-right": "20px"
+                        }
+                    ),
+
                     # On-screen instructions
                     html.Br(),
                     html.Br(),
@@ -218,6 +498,47 @@ app.layout = html.Div([
                 id = "load-button",
                 children = "Load"
             ),
+            # Background load progress
+            html.Button(
+                id = "cancel-load-button",
+                children = "Cancel",
+                n_clicks = 0,
+                style = {"display": "none"}
+            ),
+            html.Div(
+                id = "load-progress",
+                children = "",
+                style = {"display": "inline-block", "padding-left": "10px"}
+            ),
+
+            # Graph editing
+            html.Div(
+                [
+                    dcc.Input(
+                        id = "edit-input",
+                        placeholder = "Edit graph: add a b; connect a,b; " +\
+                                      "disconnect a,b; contract a,b; " +\
+                                      "delete a; keep a b",
+                        type = "text",
+                        value = "",
+                        style = {"width": "40em"}
+                    ),
+                    html.Button(
+                        id = "edit-button",
+                        children = "Edit",
+                        n_clicks = 0,
+                        title = "Apply the edit commands (separated by " +\
+                                "semicolons) to the graph; this clears the " +\
+                                "turn history"
+                    ),
+                ],
+                id = "edit-stuff"
+            ),
+            dcc.Interval(
+                id = "load-poll",
+                interval = 500, # ms
+                disabled = True
+            ),
         ], id = "non-quit-elements"
     ),
     html.Div(
@@ -253,6 +574,33 @@ app.layout = html.Div([
 ])
 
 
+def timed_by_trigger(callback):
+    """Decorate a Dash callback to time it into CALLBACK_SECONDS, and its
+    response's size into CALLBACK_RESPONSE_BYTES, labeled by the component
+    that triggered it.
+    """
+    @functools.wraps(callback)
+    def timed(*args, **kwargs):
+        trigger = dash.callback_context.triggered[0]["prop_id"].split(".")[0]
+        branch = CALLBACK_BRANCHES.get(trigger, "startup")
+        request_globals.hr_branch = branch # For record_response_bytes()
+
+        with CALLBACK_SECONDS.time(branch):
+            return callback(*args, **kwargs)
+
+    return timed
+
+@app.server.after_request
+def record_response_bytes(response):
+    """Record the size of responses to timed_by_trigger() callbacks."""
+    branch = request_globals.get("hr_branch")
+
+    if (branch is not None) and (response.content_length is not None):
+        CALLBACK_RESPONSE_BYTES.observe(response.content_length, branch)
+
+    return response
+
+
 @app.callback(
     [
         Output("displayed-graph", "figure"),
@@ -260,143 +608,409 @@ app.layout = html.Div([
         Output("k", "style"),
         Output("error-dialog", "displayed"),
         Output("error-dialog", "message"),
-        Output("turn-count", "children")
+        Output("turn-count", "children"),
+        Output("load-poll", "disabled")
     ],
     [
         Input("displayed-graph", "clickData"),
         Input("go-button", "n_clicks"),
-        Input("load-button", "n_clicks")
+        Input("load-button", "n_clicks"),
+        Input("load-poll", "n_intervals"),
+        Input("suggest-button", "n_clicks"),
+        Input("undo-button", "n_clicks"),
+        Input("redo-button", "n_clicks"),
+        Input("jump-button", "n_clicks"),
+        Input("edit-button", "n_clicks")
     ],
     [
         State("displayed-graph", "figure"),
         State("k", "children"),
         State("file-path-input-box", "value"),
-        State("turn-count", "children")
+        State("turn-count", "children"),
+        State("suggest-k", "value"),
+        State("suggest-depth", "value"),
+        State("jump-turn", "value"),
+        State("edit-input", "value")
     ]
 )
-def clicked_vertex_or_go_or_turn_button(clickData, go_clicks, load_clicks, displayed_fig, k_curr, path, curr_turn):
+@timed_by_trigger
+def clicked_vertex_or_go_or_turn_button(clickData, go_clicks, load_clicks, poll_intervals, suggest_clicks, undo_clicks, redo_clicks, jump_clicks, edit_clicks, displayed_fig, k_curr, path, curr_turn, suggest_k, suggest_depth, jump_turn, edit_text):
     """
     This callback handles reaction to clicking:
         - a vertex in the graph
         - the "GO" button to advance the turn
         - the "Load" button to import a graph
-    All three events are lumped together in this callback because all share
+        - the "Suggest" button to highlight recommended shots
+        - the "Undo", "Redo" and "Go to turn" buttons to revisit turns
+        - the "Edit" button to edit the graph
+    and to ticks of the load-poll timer while a graph loads in the background.
+    All of these events are lumped together in this callback because all share
     Output("displayed-graph", "figure"), and an Output can only be assigned
     to one callback.
     """
-    global loaded_hr_graph
-    global clicked_verts_this_turn
-    global node_positions
-
     ctx = dash.callback_context
     thing_clicked = ctx.triggered[0]["prop_id"].split(".")[0]
 
-    k_nums = [int(i) for i in k_curr.split("/")]
-    turn_num = int(curr_turn[6:])
+    # Clicked Load button ######################################################
+    if (thing_clicked == "load-button") and (load_clicks):
+        # Load and lay out in the background; the load-poll timer picks up
+        # the graph and each refinement of its layout. (This happens outside
+        # the session below since the job needs the store too.)
+        hr_loader.start_load(state_store, path, refine_layout,
+                             budget = memory_budget)
+
+        return displayed_fig, k_curr, dash.no_update, False, "", curr_turn, False
+    # Load-poll timer ticked ###################################################
+    elif thing_clicked == "load-poll":
+        return poll_load(displayed_fig, k_curr, curr_turn)
+
+    # Clicking a vertex only touches the clicked vertices, so it doesn't need
+    # the graph (which a SqliteStore would unpickle and re-pickle)
+    if thing_clicked == "displayed-graph":
+        session_keys = ("clicked",)
+    else:
+        session_keys = ()
+
+    with state_store.session(*session_keys) as state:
+        loaded_hr_graph = state.get("graph")
+        clicked_verts_this_turn = state["clicked"]
+
+        k_nums = [int(i) for i in k_curr.split("/")]
+        turn_num = int(curr_turn[6:])
+        normal_k_color = {
+            "display": "inline-block",
+            "color": "black",
+            "background": "white"
+        }
+        inverted_k_color = {
+            "display": "inline-block",
+            "color": "white",
+            "background": "black"
+        }
+        ret_color = normal_k_color
+
+        # Clicked graph vertex ###################################################
+        if (thing_clicked == "displayed-graph") and (clickData is not None):
+            clicked_vert_color = clickData["points"][0]["marker.color"]
+            clicked_vert_id = clickData["points"][0]["text"]
+
+            #############################
+            # Flip clicked vertex color #
+            #############################
+            if clicked_vert_color == "black":
+                new_color = "white"
+            else:
+                new_color = "black"
+
+            displayed_fig["data"][0]["marker"]["color"][clickData["points"][0]["pointNumber"]] = new_color
+
+            ####################
+            # Update k readout #
+            ####################
+            if clicked_vert_id not in clicked_verts_this_turn:
+                # If clicking this vertex for the first time (its id is not in
+                # clicked_verts_this_turn), increment k
+                # and store new_color (for reference when recoloring
+                # loaded_hr_graph later)
+                clicked_verts_this_turn[clicked_vert_id] = new_color
+                if len(k_nums) == 1:
+                    # Still on first turn; k is shown as a single number with
+                    # no denominator.
+                    ret_str = f"{k_nums[0] + 1}"
+                elif len(k_nums) == 2:
+                    # On turn 2 or greater; show k as n/d where n is the d from
+                    # previous turn and n is verts clicked this turn
+                    ret_str = f"{k_nums[0] + 1} / {k_nums[1]}"
+
+                    # Invert k background and color if n != d
+                    # (This serves as a visual aid so the user clicks the
+                    # same number of vertices each turn)
+                    if (k_nums[0] + 1) != k_nums[1]:
+                        ret_color = inverted_k_color
+                    else:
+                        ret_color = normal_k_color
+            else:
+                # If this vertex was already clicked (its id is already in
+                # clicked_verts_this_turn), decrement k.
+                clicked_verts_this_turn.pop(clicked_vert_id)
+                if len(k_nums) == 1:
+                    ret_str = f"{k_nums[0] - 1}"
+                elif len(k_nums) == 2:
+                    ret_str = f"{k_nums[0] - 1 } / {k_nums[1]}"
+
+                    if (k_nums[0] - 1) != k_nums[1]:
+                        ret_color = inverted_k_color
+                    else:
+                        ret_color = normal_k_color
+
+            return displayed_fig, ret_str, ret_color, False, "", curr_turn, dash.no_update
+        # Clicked GO button ########################################################
+        elif (thing_clicked == "go-button") and (go_clicks):
+            ################################
+            # Recolor graph and update fig #
+            ################################
+            history = state["history"]
+            if history is None:
+                # First turn played on this graph
+                history = hr_history.TurnHistory.from_graph(loaded_hr_graph,
+                                                            turn_num)
+
+            if hr_hooks.HOOKS.active:
+                hr_hooks.HOOKS.emit(hr_hooks.TURN_START,
+                                    graph=loaded_hr_graph, turn=turn_num + 1)
+
+            for id in clicked_verts_this_turn.keys():
+                loaded_hr_graph.get_vert(id).color = clicked_verts_this_turn[id]
+
+            if hr_hooks.HOOKS.active:
+                hr_hooks.HOOKS.emit(hr_hooks.SHOTS_APPLIED,
+                                    graph=loaded_hr_graph, turn=turn_num + 1,
+                                    shots=list(clicked_verts_this_turn))
+
+            hr_logic.recolor(loaded_hr_graph)
+            history.record_graph(loaded_hr_graph)
+            state["history"] = history
+
+            new_fig = figure_from_state(state)
+
+            ####################
+            # Update k readout #
+            ####################
+            clicked_verts_this_turn.clear()
+
+            # Show n/d where n is 0 and d is n from previous turn
+            if k_nums[0] == 0:
+                ret_color = normal_k_color
+            else:
+                ret_color = inverted_k_color
+
+            return new_fig, f"0 / {k_nums[0]}", ret_color, False, "", f"Turn: {turn_num + 1}", dash.no_update
+        # Clicked Suggest button ###################################################
+        elif (thing_clicked == "suggest-button") and (suggest_clicks):
+            if (not displayed_fig["data"]) or (not suggest_k) or (not suggest_depth):
+                return displayed_fig, k_curr, dash.no_update, False, "", curr_turn, dash.no_update
+
+            from hunters_and_rabbits import hr_recommend
+
+            suggested = set(hr_recommend.recommend_shots(
+                loaded_hr_graph, int(suggest_k), depth = int(suggest_depth),
+                compact = compact_from_state(state)
+            ))
+            node_trace = displayed_fig["data"][0]
+            node_trace["marker"]["line"]["color"] = [
+                "red" if id in suggested else "#444" for id in node_trace["text"]
+            ]
+
+            return displayed_fig, k_curr, dash.no_update, False, "", curr_turn, dash.no_update
+        # Clicked Undo, Redo or Go to turn #######################################
+        elif thing_clicked in ("undo-button", "redo-button", "jump-button"):
+            history = state["history"]
+
+            if history is None:
+                return displayed_fig, k_curr, dash.no_update, False, "", curr_turn, dash.no_update
+
+            if (thing_clicked == "undo-button") and history.can_undo():
+                history.undo()
+            elif (thing_clicked == "redo-button") and history.can_redo():
+                history.redo()
+            elif thing_clicked == "jump-button":
+                if (jump_turn is None) or \
+                   not (history.first_turn <= jump_turn <= history.last_turn):
+                    return displayed_fig, k_curr, dash.no_update, True, \
+                        f"Only turns {history.first_turn} to " +\
+                        f"{history.last_turn} can be gone to.", curr_turn, \
+                        dash.no_update
+                history.jump(int(jump_turn))
+            else:
+                # Nothing to undo or redo
+                return displayed_fig, k_curr, dash.no_update, False, "", curr_turn, dash.no_update
+
+            # O(|V|/64) to restore the black set, O(|V|) to recolor the graph
+            history.apply(loaded_hr_graph)
+            state["history"] = history
+            # Clicks were toward the turn left behind
+            clicked_verts_this_turn.clear()
+
+            new_fig = figure_from_state(state)
+            ret_str = "0" if len(k_nums) == 1 else f"0 / {k_nums[1]}"
+
+            return new_fig, ret_str, normal_k_color, False, "", f"Turn: {history.turn}", dash.no_update
+        # Clicked Edit button ######################################################
+        elif (thing_clicked == "edit-button") and (edit_clicks):
+            load = state["load"]
+
+            if (load is not None) and not hr_loader.is_finished(load):
+                return displayed_fig, k_curr, dash.no_update, True, \
+                    "Wait for the graph to finish loading before editing " +\
+                    "it.", curr_turn, dash.no_update
+
+            # Batched edits are O(edit size + affected degrees), not a reload
+            try:
+                hr_io.apply_edits(loaded_hr_graph, edit_text or "")
+                message = ""
+            except (KeyError, ValueError) as e:
+                message = "Edit failed: " + str(e.args[0])
+
+            # Applied commands stay applied even if a later one failed
+            state["positions"] = place_new_vertices(loaded_hr_graph,
+                                                    state["positions"])
+            # The history's black sets are over the old vertices
+            state["history"] = None
+            clicked_verts_this_turn.clear()
+            if load is not None:
+                # New figure cache key (see figure_from_state())
+                load["revision"] += 1
+
+            new_fig = figure_from_state(state)
+            ret_str = "0" if len(k_nums) == 1 else f"0 / {k_nums[1]}"
+
+            return new_fig, ret_str, normal_k_color, bool(message), message, curr_turn, dash.no_update
+        # Nothing clicked; standard Dash trigger of all callbacks at startup #######
+        else:
+            return displayed_fig, k_curr, normal_k_color, False, "", curr_turn, dash.no_update
+
+
+def figure_from_state(state):
+    """Return the figure of the app state's graph.
+
+    The figure's layout.meta records which load job and which of its layout
+    revisions it shows, so poll_load() can tell when it's out of date.
+    """
+    load = state["load"]
+    meta = None
+
+    if load is not None:
+        meta = {
+            "load_job": load["job"],
+            "load_revision": load["revision"]
+        }
+
+    graph_fig = figure_from_hr_graph(
+        state["graph"], state["positions"],
+        # New layout revisions and edits are the only ways the graph or its
+        # positions change
+        cache_key = None if meta is None else (meta["load_job"],
+                                               meta["load_revision"])
+    )
+    graph_fig["layout"]["meta"] = meta
+
+    return graph_fig
+
+# CompactGraph of the loaded graph, rebuilt when a new graph is loaded or
+# edited
+_compact_cache = {"key": None, "compact": None}
+
+def compact_from_state(state):
+    """Return the hr_compact.CompactGraph of the app state's graph."""
+    # Imported here to keep NumPy out of startup
+    from hunters_and_rabbits import hr_compact
+
+    load = state["load"]
+    key = None if load is None else (load["job"], load["revision"])
+
+    if (key is None) or (key != _compact_cache["key"]):
+        _compact_cache.update(
+            key = key,
+            compact = hr_compact.CompactGraph.from_graph(state["graph"])
+        )
+
+    return _compact_cache["compact"]
+
+def poll_load(displayed_fig, k_curr, curr_turn):
+    """Handle a load-poll tick for clicked_vertex_or_go_or_turn_button().
+
+    Show the background load's latest layout if the displayed figure is
+    behind, report a failed load, and stop polling once the load is over and
+    the figure is current.
+    """
     normal_k_color = {
         "display": "inline-block",
         "color": "black",
         "background": "white"
     }
-    inverted_k_color = {
-        "display": "inline-block",
-        "color": "white",
-        "background": "black"
-    }
-    ret_color = normal_k_color
-
-    # Clicked graph vertex ###################################################
-    if (thing_clicked == "displayed-graph") and (clickData is not None):
-        clicked_vert_color = clickData["points"][0]["marker.color"]
-        clicked_vert_id = clickData["points"][0]["text"]
-
-        #############################
-        # Flip clicked vertex color #
-        #############################
-        if clicked_vert_color == "black":
-            new_color = "white"
-        else:
-            new_color = "black"
-
-        displayed_fig["data"][0]["marker"]["color"][clickData["points"][0]["pointNumber"]] = new_color
-
-        ####################
-        # Update k readout #
-        ####################
-        if clicked_vert_id not in clicked_verts_this_turn:
-            # If clicking this vertex for the first time (its id is not in
-            # clicked_verts_this_turn), increment k
-            # and store new_color (for reference when recoloring
-            # loaded_hr_graph later)
-            clicked_verts_this_turn[clicked_vert_id] = new_color
-            if len(k_nums) == 1:
-                # Still on first turn; k is shown as a single number with
-                # no denominator.
-                ret_str = f"{k_nums[0] + 1}"
-            elif len(k_nums) == 2:
-                # On turn 2 or greater; show k as n/d where n is the d from
-                # previous turn and n is verts clicked this turn
-                ret_str = f"{k_nums[0] + 1} / {k_nums[1]}"
-
-                # Invert k background and color if n != d
-                # (This serves as a visual aid so the user clicks the
-                # same number of vertices each turn)
-                if (k_nums[0] + 1) != k_nums[1]:
-                    ret_color = inverted_k_color
-                else:
-                    ret_color = normal_k_color
-        else:
-            # If this vertex was already clicked (its id is already in
-            # clicked_verts_this_turn), decrement k.
-            clicked_verts_this_turn.pop(clicked_vert_id)
-            if len(k_nums) == 1:
-                ret_str = f"{k_nums[0] - 1}"
-            elif len(k_nums) == 2:
-                ret_str = f"{k_nums[0] - 1 } / {k_nums[1]}"
-
-                if (k_nums[0] - 1) != k_nums[1]:
-                    ret_color = inverted_k_color
-                else:
-                    ret_color = normal_k_color
-
-        return displayed_fig, ret_str, ret_color, False, "", curr_turn
-    # Clicked GO button ########################################################
-    elif (thing_clicked == "go-button") and (go_clicks):
-        ################################
-        # Recolor graph and update fig #
-        ################################
-        for id in clicked_verts_this_turn.keys():
-            loaded_hr_graph.get_vert(id).color = clicked_verts_this_turn[id]
-        hr_logic.recolor(loaded_hr_graph)
-
-        new_fig = figure_from_hr_graph(loaded_hr_graph)
-
-        ####################
-        # Update k readout #
-        ####################
-        clicked_verts_this_turn.clear()
-
-        # Show n/d where n is 0 and d is n from previous turn
-        if k_nums[0] == 0:
-            ret_color = normal_k_color
-        else:
-            ret_color = inverted_k_color
+    meta = displayed_fig.get("layout", {}).get("meta") or {}
 
-        return new_fig, f"0 / {k_nums[0]}", ret_color, False, "", f"Turn: {turn_num + 1}"
-    # Clicked Load button ######################################################
-    elif (thing_clicked == "load-button") and (load_clicks):
-        try:
-            loaded_hr_graph = hr_io.load_graph(path)
-        except Exception as e:
-            return displayed_fig, k_curr, normal_k_color, True, repr(e), curr_turn
+    with state_store.session("load") as state:
+        load = state["load"]
+
+        if load is None:
+            return displayed_fig, k_curr, normal_k_color, False, "", curr_turn, True
+
+        shown = (meta.get("load_job") == load["job"]) and \
+            (meta.get("load_revision") == load["revision"])
+        finished = hr_loader.is_finished(load)
+
+        if (load["status"] == "error") and not load.get("reported"):
+            load["reported"] = True
+
+            return displayed_fig, k_curr, normal_k_color, True, load["message"], curr_turn, True
+
+    if shown or (load["revision"] == 0):
+        # Nothing new to draw
+        return displayed_fig, k_curr, normal_k_color, False, "", curr_turn, finished
 
-        node_positions = None # Wipe positions to regenerate for new graph
-        new_fig = figure_from_hr_graph(loaded_hr_graph)
+    with state_store.session() as state:
+        new_fig = figure_from_state(state)
 
-        return new_fig, k_curr, normal_k_color, False, "", "Turn: 0"
-    # Nothing clicked; standard Dash trigger of all callbacks at startup #######
+    if meta.get("load_job") != load["job"]:
+        # First layout of a newly loaded graph
+        curr_turn = "Turn: 0"
+
+    return new_fig, k_curr, normal_k_color, False, "", curr_turn, False
+
+
+@app.callback(
+    [
+        Output("load-progress", "children"),
+        Output("cancel-load-button", "style")
+    ],
+    [
+        Input("load-poll", "n_intervals"),
+        Input("cancel-load-button", "n_clicks")
+    ]
+)
+def load_progress(poll_intervals, cancel_clicks):
+    """Show the progress of a background load and handle its Cancel button."""
+    hide = {"display": "none"}
+    show = {"display": "inline-block"}
+
+    ctx = dash.callback_context
+    thing_clicked = ctx.triggered[0]["prop_id"].split(".")[0]
+
+    if (thing_clicked == "cancel-load-button") and cancel_clicks:
+        hr_loader.cancel_load(state_store)
+
+    with state_store.session("load") as state:
+        load = state["load"]
+
+    if load is None:
+        return "", hide
+
+    memory = load.get("memory") or {}
+
+    if load["status"] == "parse":
+        text = f"Reading file: {load['progress']:.0%}"
+        if memory:
+            text += " (about " + hr_memory.mib(memory["estimated"]) + ")"
+    elif load["status"] == "build":
+        text = f"Building graph: {load['progress']:.0%}"
+    elif load["status"] == "layout":
+        text = "Laying out: iteration {} of {}".format(*load["iteration"])
+    elif load["status"] == "done":
+        text = ""
+        if memory.get("measured") is not None:
+            text = f"{memory['vertices']:,} vertices, " +\
+                f"{memory['edges']:,} edges, " +\
+                hr_memory.mib(memory["measured"]) + " in memory"
+    elif load["status"] == "cancelled":
+        text = "Load cancelled."
     else:
-        return displayed_fig, k_curr, normal_k_color, False, "", curr_turn
+        text = "Load failed."
+
+    if load["cancel"] and not hr_loader.is_finished(load):
+        text += " (cancelling...)"
+
+    return text, hide if hr_loader.is_finished(load) else show
 
 
 @app.callback(
@@ -446,7 +1060,128 @@ def quit(n_clicks, quit_button_style, quit_info_style):
         )
 
 
-def main():
+@app.server.route("/ready")
+def ready():
+    """Readiness probe: 200 once this process can serve the game, else 503."""
+    try:
+        state_store.ping()
+    except Exception as e:
+        return f"not ready: {e!r}", 503, {"Content-Type": "text/plain"}
+
+    return "ready", 200, {"Content-Type": "text/plain"}
+
+@app.server.route("/metrics")
+def metrics():
+    """This process's metrics (see hr_metrics), for Prometheus to scrape."""
+    return hr_metrics.REGISTRY.render(), 200, \
+        {"Content-Type": hr_metrics.CONTENT_TYPE}
+
+
+def open_browser_when_ready(url, timeout = 60.0):
+    """Open 'url' in a browser tab once its /ready probe answers 200.
+
+    Gives up silently after 'timeout' seconds.
+    """
+    waited = 0.0
+
+    while waited < timeout:
+        try:
+            with urllib.request.urlopen(f"{url}/ready", timeout = 1) as response:
+                if response.status == 200:
+                    webbrowser.open_new_tab(url)
+                    return
+        except OSError:
+            pass # Not listening yet
+
+        sleep(0.1)
+        waited += 0.1
+
+
+def serve(host, port, workers, state_db):
+    """Run the app headless under gunicorn with 'workers' worker processes.
+
+    Game state goes in the SQLite file at 'state_db' so all workers share it.
+    gunicorn is an optional dependency (pip install hunters_and_rabbits[serve])
+    and doesn't run on Windows.
+    """
+    global state_store
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError("serve(): Serve mode needs gunicorn; install it " +\
+                           "with \"pip install hunters_and_rabbits[serve]\"")
+
+    class WSGIApp(BaseApplication):
+        def __init__(self, wsgi_app, options):
+            self.wsgi_app = wsgi_app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.wsgi_app
+
+    state_store = hr_store.SqliteStore(state_db)
+    state_store.reset() # Start from an empty game like the desktop app does
+
+    # There's no Werkzeug server to shut down, and clients shouldn't be able
+    # to stop a shared server anyway.
+    app.layout["quit-elements"].style = {"display": "none"}
+
+    WSGIApp(app.server, {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        # Loading and laying out a big graph can take a while
+        "timeout": 120,
+    }).run()
+
+
+def parse_args(argv = None):
+    """Parse command line arguments for main()."""
+    parser = argparse.ArgumentParser(
+        description = "A Dash implementation of the Hunters and Rabbits " +\
+                      "graph game"
+    )
+    parser.add_argument("--serve", action = "store_true",
+                        help = "run headless under a multi-worker WSGI " +\
+                               "server instead of opening a browser")
+    parser.add_argument("--host", default = "127.0.0.1",
+                        help = "interface to bind in serve mode " +\
+                               "(default: %(default)s)")
+    parser.add_argument("--port", type = int, default = None,
+                        help = "port to listen on (default: 8050 in serve " +\
+                               "mode, a random free port otherwise)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(),
+                        help = "worker processes in serve mode " +\
+                               "(default: %(default)s)")
+    parser.add_argument("--state-db", default = "hr_state.db",
+                        help = "SQLite file holding the game state in " +\
+                               "serve mode (default: %(default)s)")
+    parser.add_argument("--memory-budget", type = float, default = None,
+                        metavar = "MIB",
+                        help = "refuse to load graphs estimated to take " +\
+                               "more MiB than this; 0 for no limit " +\
+                               "(default: half of physical memory)")
+
+    return parser.parse_args(argv)
+
+
+def main(argv = None):
+    global memory_budget
+
+    args = parse_args(argv)
+
+    if args.memory_budget is not None:
+        memory_budget = int(args.memory_budget * (1 << 20)) or None
+
+    if args.serve:
+        serve(args.host, args.port or 8050, args.workers, args.state_db)
+        return
+
     # Probable free ports in the 8000s according to:
     # http://www.networksorcery.com/enp/protocol/ip/ports08000.htm
     free_ports = [
@@ -528,21 +1263,16 @@ def main():
     # With 825 ports to pick from, it's unlikely that even a user who never
     # hits Quit will launch an instance of the app using the same port before
     # the next reboot (when all app instances are killed and all ports freed).
-    port = random.choice(free_ports)
-
-    webbrowser.open("") # Autolaunch browser
-    # Unfortunately, the Dash app seems to start with a variable delay.
-    # Every few starts (especially when the browser isn't
-    # already open), the browser starts and loads http://localhost:{port}
-    # before Dash has initialized.
-    # A refresh on the page handles this, but it's annoying.
-    # It doesn't seem to happen with a delay of 2 seconds or longer between
-    # the browser starting and loading the app page.
-    # Ugly since we have to open a new window and a new tab in it, but seems to
-    # guarantee successful load. As a plus, it doesn't hijack existing browser
-    # windows.
-    sleep(2)
-    webbrowser.open_new_tab(f"http://localhost:{port}") # Open tab to app
+    port = args.port or random.choice(free_ports)
+
+    # Open a tab to the app once it answers its readiness probe.
+    # (The Dash app starts with a variable delay; opening the tab right away
+    # would often load http://localhost:{port} before Dash has initialized.)
+    threading.Thread(
+        target = open_browser_when_ready,
+        args = (f"http://localhost:{port}",),
+        daemon = True
+    ).start()
     app.run_server(debug = False, port = port) # Launch Dash app
 
 if __name__ == "__main__":
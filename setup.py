@@ -21,7 +21,19 @@ setuptools.setup(
         "dash-html-components>=1.0.2",
         "numpy>=1.18.0",
     ],
+    extras_require={
+        # Multi-worker serve mode (python .../hunters_and_rabbits.py --serve)
+        "serve": ["gunicorn>=20.0"],
+    },
     python_requires='>=3.8',
+    entry_points={
+        "console_scripts": [
+            # Headless parameter sweeps (see hr_batch)
+            "hr-batch=hunters_and_rabbits.hr_batch:main",
+            # JSON game API for bots (see hr_api)
+            "hr-api=hunters_and_rabbits.hr_api:main",
+        ],
+    },
 
     # PyPI metadata
     author="Krotera",
@@ -0,0 +1,22 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+"""Small graphs shared by the tests.
+
+Vertex ids are the strings "0" to "n-1", and every vertex starts black.
+"""
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+
+def graph_from_edges(n, edges):
+    g = Graph()
+    g.add_verts(Vertex(str(i), "black") for i in range(n))
+    g.add_edges((str(a), str(b)) for a, b in edges)
+    return g
+
+def cycle_graph(n):
+    return graph_from_edges(n, [(i, (i + 1) % n) for i in range(n)])
@@ -0,0 +1,151 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import asyncio
+import json
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_api import GameServer, start_server
+
+PATH = {"k": 1, "vertices": ["a", "b", "c"],
+        "edges": [["a", "b"], ["b", "c"]]}
+
+class Api(unittest.TestCase):
+    def test_Api_0_game(self):
+        server = GameServer()
+        status, game = server.handle("POST", "/games", json.dumps(PATH))
+
+        self.assertEqual(status, 201)
+        self.assertEqual(game["ids"], ["a", "b", "c"])
+        self.assertEqual((game["turn"], game["black"]), (0, "7"))
+
+        shots = "/games/" + game["game"] + "/shots"
+        # Shooting b leaves a and c, which blacken b
+        self.assertEqual(server.handle("POST", shots, '{"shots": [1]}'),
+                         (200, {"turn": 1, "black": "2", "cleared": False}))
+        self.assertEqual(server.handle("POST", shots, '{"shot_ids": ["b"]}'),
+                         (200, {"turn": 2, "black": "0", "cleared": True}))
+        self.assertEqual(server.handle("GET", "/games/" + game["game"], b""),
+                         (200, {"turn": 2, "black": "0", "cleared": True}))
+
+        self.assertEqual(server.handle("DELETE", "/games/" + game["game"],
+                                       b""), (204, None))
+        self.assertEqual(server.handle("GET", "/games/" + game["game"],
+                                       b"")[0], 404)
+
+    def test_Api_1_errors(self):
+        server = GameServer(max_games=1)
+        _, game = server.handle("POST", "/games",
+                                json.dumps(dict(PATH, black=["a"])))
+        shots = "/games/" + game["game"] + "/shots"
+
+        self.assertEqual(game["black"], "1")
+        for body in ('{"shots": [0, 2]}', '{"shots": [3]}', '{"shots": "0"}',
+                     '{"shot_ids": ["z"]}', "[", "[]"):
+            self.assertEqual(server.handle("POST", shots, body)[0], 400)
+        self.assertEqual(server.handle("GET", shots, b"")[0], 405)
+        self.assertEqual(server.handle("GET", "/nowhere", b"")[0], 404)
+
+        self.assertEqual(server.handle("POST", "/games", '{"k": 1}')[0], 400)
+        for edges in ([["a", "z"]], 5, "ab", {"a": "b"}, [5], [["a"]]):
+            self.assertEqual(server.handle("POST", "/games", json.dumps(
+                dict(PATH, edges=edges)))[0], 400)
+        # max_games
+        self.assertEqual(server.handle("POST", "/games",
+                                       json.dumps(PATH))[0], 409)
+
+    def test_Api_2_http(self):
+        async def play():
+            http_server = await start_server(port=0)
+            port = http_server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            async def request(method, path, payload=None):
+                data = b"" if payload is None else json.dumps(payload).encode()
+                writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() +
+                             data)
+                status = int((await reader.readline()).split()[1])
+                headers = dict()
+                while True:
+                    line = (await reader.readline()).decode()
+                    if line == "\r\n":
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.lower()] = value.strip()
+                body = await reader.readexactly(int(headers["content-length"]))
+                return status, json.loads(body) if body else None
+
+            # Several requests on one kept-alive connection
+            _, game = await request("POST", "/games", PATH)
+            turns = [await request("POST", f"/games/{game['game']}/shots",
+                                   {"shots": [1]}) for _ in range(2)]
+            deleted = await request("DELETE", f"/games/{game['game']}")
+
+            writer.close()
+            await writer.wait_closed()
+            http_server.close()
+            await http_server.wait_closed()
+
+            return turns, deleted
+
+        turns, deleted = asyncio.run(play())
+
+        self.assertEqual([state["black"] for _, state in turns], ["2", "0"])
+        self.assertEqual(deleted, (204, None))
+
+    def test_Api_3_internal_error(self):
+        server = GameServer()
+
+        def broken(spec):
+            raise ZeroDivisionError()
+        server.create = broken
+
+        self.assertEqual(server.handle("POST", "/games", json.dumps(PATH)),
+                         (500, {"error": "Internal error: ZeroDivisionError!"}))
+
+    def test_Api_4_http_internal_error(self):
+        server = GameServer()
+
+        def broken(spec):
+            raise ZeroDivisionError()
+        server.create = broken
+
+        async def post():
+            http_server = await start_server(port=0, server=server)
+            port = http_server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            data = json.dumps(PATH).encode()
+            writer.write(b"POST /games HTTP/1.1\r\nHost: test\r\n" +
+                         f"Content-Length: {len(data)}\r\n\r\n".encode() +
+                         data)
+            status_line = await reader.readline()
+            headers = dict()
+            while True:
+                line = (await reader.readline()).decode()
+                if line in ("\r\n", ""): # "" if the server hung up
+                    break
+                name, _, value = line.partition(":")
+                headers[name.lower()] = value.strip()
+            body = await reader.read(int(headers.get("content-length", 0)))
+
+            writer.close()
+            await writer.wait_closed()
+            http_server.close()
+            await http_server.wait_closed()
+
+            return status_line, json.loads(body) if body else None
+
+        status_line, body = asyncio.run(post())
+
+        self.assertEqual(status_line,
+                         b"HTTP/1.1 500 Internal Server Error\r\n")
+        self.assertEqual(body, {"error": "Internal error: ZeroDivisionError!"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import base64
+import os
+import pickle
+import sys
+import tempfile
+import warnings
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, '..') # Package root
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore") # Dash's deprecated component packages
+    from hunters_and_rabbits import hunters_and_rabbits as app
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+from hunters_and_rabbits.hr_store import SqliteStore
+
+def triangle():
+    g = Graph()
+    g.add_verts(Vertex(id, "black") for id in "012")
+    g.add_edges([("0", "1"), ("1", "2"), ("0", "2")])
+
+    return g
+
+class Figure(unittest.TestCase):
+    def setUp(self):
+        app._figure_cache.clear()
+        app._figure_cache["key"] = None
+
+    def colors(self, fig):
+        trace = fig["data"][0]
+        return dict(zip(trace["text"], trace["marker"]["color"]))
+
+    def test_Figure_0_cache_hit_recreated_graph(self):
+        g = triangle()
+        positions = app.layout_hr_graph(g)
+        first = app.figure_from_hr_graph(g, positions, cache_key=(1, 1))
+
+        # As hr_store.SqliteStore hands out the graph: a new copy each time
+        g = pickle.loads(pickle.dumps(g))
+        g.get_vert("1").color = "white"
+        with mock.patch.object(app, "layout_hr_graph") as layout:
+            second = app.figure_from_hr_graph(g, None, cache_key=(1, 1))
+            layout.assert_not_called() # Cache hit
+
+        self.assertEqual(second["data"][0]["x"], first["data"][0]["x"])
+        self.assertEqual(self.colors(first),
+                         {"0": "black", "1": "black", "2": "black"})
+        self.assertEqual(self.colors(second),
+                         {"0": "black", "1": "white", "2": "black"})
+
+    def test_Figure_1_cache_miss(self):
+        g = triangle()
+        app.figure_from_hr_graph(g, app.layout_hr_graph(g), cache_key=(1, 1))
+
+        g = pickle.loads(pickle.dumps(g))
+        g.add_vert(Vertex("3", "white"))
+        g.add_edge("2", "3")
+        positions = app.layout_hr_graph(g)
+        fig = app.figure_from_hr_graph(g, positions, cache_key=(1, 2))
+
+        self.assertEqual(self.colors(fig)["3"], "white")
+        self.assertEqual(len(fig["data"][0]["text"]), 4)
+        self.assertEqual(app._figure_cache["key"], (1, 2))
+
+    def test_Figure_2_encode_array(self):
+        a = np.array([0.123456, np.nan, -1.0])
+
+        with mock.patch.object(app, "plotlyjs_typed_arrays",
+                               return_value=False):
+            self.assertEqual(app.encode_array(a), [0.1235, None, -1.0])
+
+        with mock.patch.object(app, "plotlyjs_typed_arrays",
+                               return_value=True):
+            encoded = app.encode_array(a)
+        self.assertEqual(encoded["dtype"], "f4")
+        decoded = np.frombuffer(base64.b64decode(encoded["bdata"]),
+                                dtype="<f4")
+        self.assertTrue(np.allclose(decoded, a, equal_nan=True))
+
+class Serve(unittest.TestCase):
+    def test_Serve_0_ready(self):
+        client = app.app.server.test_client()
+
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True), "ready")
+
+        with tempfile.TemporaryDirectory() as dir:
+            store = SqliteStore(os.path.join(dir, "state.db"))
+            with mock.patch.object(app, "state_store", store):
+                self.assertEqual(client.get("/ready").status_code, 200)
+
+                store._connect().execute("DROP TABLE state")
+                response = client.get("/ready")
+                self.assertEqual(response.status_code, 503)
+                self.assertTrue(response.get_data(as_text=True)
+                                .startswith("not ready: "))
+
+    def test_Serve_1_parse_args(self):
+        args = app.parse_args([])
+        self.assertFalse(args.serve)
+        self.assertIsNone(args.port)
+        self.assertEqual(args.state_db, "hr_state.db")
+
+        args = app.parse_args(["--serve", "--host", "0.0.0.0", "--port",
+                               "9000", "--workers", "2", "--state-db", "x.db"])
+        self.assertTrue(args.serve)
+        self.assertEqual((args.host, args.port, args.workers, args.state_db),
+                         ("0.0.0.0", 9000, 2, "x.db"))
+
+    def test_Serve_2_main_serve(self):
+        with mock.patch.object(app, "serve") as serve:
+            app.main(["--serve", "--workers", "3", "--state-db", "x.db"])
+            serve.assert_called_once_with("127.0.0.1", 8050, 3, "x.db")
+
+        with mock.patch.object(app, "serve") as serve:
+            app.main(["--serve", "--port", "9000"])
+            self.assertEqual(serve.call_args[0][1], 9000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_batch
+from hunters_and_rabbits.hr_batch import load_spec, main
+
+class Batch(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        shutil.copy("LoadGoodXML_0_normal.xml", self.dir)
+        self.spec = os.path.join(self.dir, "spec.json")
+        self.output = os.path.join(self.dir, "results.jsonl")
+
+        with open(self.spec, "w") as spec_file:
+            json.dump({"graphs": ["LoadGoodXML_0_normal.xml"], "k": [1, 2],
+                       "strategies": ["greedy", "random", "solver"],
+                       "seeds": [0, 1], "turns": 20, "rabbits": 500},
+                      spec_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def records(self):
+        with open(self.output) as output:
+            return [json.loads(line) for line in output]
+
+    def test_Batch_0_sweep(self):
+        main([self.spec, "--output", self.output, "--workers", "1",
+              "--chunk-size", "5"])
+        records = self.records()
+
+        self.assertEqual(sorted(r["task"] for r in records),
+                         sorted(task.key for task in load_spec(self.spec)))
+        for r in records:
+            if r["k"] == 2:
+                # Two hunters clear a triangle with a tail
+                self.assertIsNotNone(r["cleared_turn"])
+                self.assertEqual(r["capture_fraction"], 1.0)
+            self.assertGreaterEqual(r["seconds"], 0.0)
+
+    def test_Batch_1_resume(self):
+        main([self.spec, "--output", self.output, "--workers", "2"])
+        first = self.records()
+
+        # Interrupted after three and a half lines
+        with open(self.output, "rb") as output:
+            lines = output.read().split(b"\n")
+        with open(self.output, "wb") as output:
+            output.write(b"\n".join(lines[:3]) + b"\n" + lines[3][:10])
+
+        main([self.spec, "--output", self.output, "--workers", "1"])
+        resumed = self.records()
+
+        self.assertEqual(resumed[:3], first[:3])
+        self.assertEqual(sorted(r["task"] for r in resumed),
+                         sorted(r["task"] for r in first))
+
+    def test_Batch_2_bad_strategy(self):
+        with open(self.spec, "w") as spec_file:
+            json.dump({"graphs": ["LoadGoodXML_0_normal.xml"], "k": [1],
+                       "strategies": ["psychic"]}, spec_file)
+
+        with self.assertRaises(ValueError):
+            load_spec(self.spec)
+
+    def test_Batch_3_memory_budget(self):
+        # Room for the CompactGraph (about 700 bytes) but not the Graph
+        with open(self.spec, "w") as spec_file:
+            json.dump({"graphs": ["LoadGoodXML_0_normal.xml"], "k": [2],
+                       "strategies": ["greedy"], "memory_budget": 0.001},
+                      spec_file)
+
+        main([self.spec, "--output", self.output, "--workers", "1"])
+        self.assertEqual(self.records()[0]["capture_fraction"], 1.0)
+
+        with open(self.spec, "w") as spec_file:
+            json.dump({"graphs": ["LoadGoodXML_0_normal.xml"], "k": [2],
+                       "strategies": ["solver"], "memory_budget": 0.001},
+                      spec_file)
+        with self.assertRaises(RuntimeError):
+            main([self.spec, "--workers", "1"])
+
+    def test_Batch_4_shared_schedules(self):
+        # The same graph under two names
+        shutil.copy("LoadGoodXML_0_normal.xml",
+                    os.path.join(self.dir, "copy.xml"))
+        with open(self.spec, "w") as spec_file:
+            json.dump({"graphs": ["LoadGoodXML_0_normal.xml", "copy.xml"],
+                       "k": [1], "strategies": ["greedy", "random"],
+                       "seeds": [0, 1, 2], "rabbits": 100}, spec_file)
+
+        hr_batch._schedules.clear()
+        main([self.spec, "--output", self.output, "--workers", "1"])
+        records = self.records()
+
+        # Greedy's shots were worked out once for all six of its tasks
+        self.assertEqual(len(hr_batch._schedules), 1)
+        greedy = [r for r in records if r["strategy"] == "greedy"]
+        self.assertEqual(len(greedy), 6)
+        self.assertEqual(len(set((r["turns"], r["cleared_turn"])
+                                 for r in greedy)), 1)
+
+    def test_Batch_5_bounded_graphs(self):
+        graphs = [f"copy{i}.xml" for i in range(4)]
+        for graph in graphs:
+            shutil.copy("LoadGoodXML_0_normal.xml",
+                        os.path.join(self.dir, graph))
+        with open(self.spec, "w") as spec_file:
+            json.dump({"graphs": graphs, "k": [1], "strategies": ["greedy"],
+                       "rabbits": 100}, spec_file)
+
+        hr_batch._graphs.clear()
+        main([self.spec, "--output", self.output, "--workers", "1"])
+
+        self.assertEqual(len(self.records()), 4)
+        # Only the last graphs are still loaded
+        self.assertEqual(len(hr_batch._graphs), hr_batch.GRAPH_CACHE_ENTRIES)
+        self.assertIn(os.path.join(self.dir, graphs[-1]), hr_batch._graphs)
+        self.assertNotIn(os.path.join(self.dir, graphs[0]), hr_batch._graphs)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+from unittest import mock
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Graph
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits import hr_bounds
+from hunters_and_rabbits.hr_bounds import degeneracy, vertex_separation, \
+    hunter_bounds
+from hunters_and_rabbits.hr_solver import solve, hunter_number
+from hunters_and_rabbits.hr_verify import verify
+from graphs import graph_from_edges
+
+def complete_graph(n):
+    return graph_from_edges(n, [(a, b) for a in range(n)
+                                for b in range(a + 1, n)])
+
+class Bounds(unittest.TestCase):
+    def test_Bounds_0_degeneracy(self):
+        self.assertEqual(degeneracy(complete_graph(5)), 4)
+        self.assertEqual(degeneracy(graph_from_edges(4, [(0, 1), (1, 2),
+                                                         (2, 3)])), 1)
+        # A triangle with a tail
+        self.assertEqual(degeneracy(graph_from_edges(4, [(0, 1), (1, 2),
+                                                         (2, 0), (2, 3)])), 2)
+        self.assertEqual(degeneracy(Graph()), 0)
+
+    def test_Bounds_1_vertex_separation(self):
+        g = graph_from_edges(4, [(0, 1), (1, 2), (2, 3)])
+        in_order = [g.get_vert(str(i)) for i in range(4)]
+        # 1 and 3 on the left of the gap leave 0 and 2 exposed
+        scrambled = [g.get_vert(id) for id in ("1", "3", "0", "2")]
+
+        self.assertEqual(vertex_separation(g, in_order), 1)
+        self.assertEqual(vertex_separation(g, scrambled), 2)
+
+    def test_Bounds_2_complete(self):
+        bounds = hunter_bounds(complete_graph(5))
+
+        self.assertEqual((bounds.lower, bounds.upper), (4, 4))
+        self.assertEqual(bounds.lower_by, "degeneracy")
+        self.assertEqual(hunter_number(complete_graph(5)).stats["decided_by"],
+                         ["bounds"])
+
+    def test_Bounds_3_sound(self):
+        rng = random.Random(8)
+
+        for _ in range(60):
+            n = rng.randint(2, 9)
+            p = rng.choice([0.2, 0.4, 0.7])
+            edges = [(a, b) for a in range(n) for b in range(a + 1, n)
+                     if rng.random() < p]
+            if rng.random() < 0.2:
+                edges.append((0, 0))
+            g = graph_from_edges(n, edges)
+            if len(g.components()) != 1:
+                continue
+
+            bounds = hunter_bounds(g)
+
+            # The search finds nothing below the lower bound...
+            if bounds.lower > 0:
+                self.assertIsNone(solve(g, bounds.lower - 1))
+            # ...and something at the upper bound
+            self.assertIsNotNone(solve(g, bounds.upper))
+
+            if bounds.schedule is not None:
+                result = verify(CompactGraph.from_graph(g),
+                                [(0, bounds.schedule)], workers=1)[0]
+                self.assertTrue(result.passed)
+                self.assertLessEqual(result.max_shots, bounds.upper)
+
+    def test_Bounds_4_no_edges(self):
+        bounds = hunter_bounds(graph_from_edges(3, []))
+
+        self.assertEqual((bounds.lower, bounds.upper), (0, 0))
+        self.assertEqual(bounds.schedule, [[]])
+
+    def test_Bounds_5_wrong_upper_bound(self):
+        # An upper bound without a schedule that the search can't meet
+        wrong = hr_bounds.Bounds(1, "degeneracy", 2, "vertex separation", None)
+
+        with mock.patch("hunters_and_rabbits.hr_solver.hunter_bounds",
+                        return_value=wrong):
+            with self.assertRaises(RuntimeError):
+                hunter_number(complete_graph(5), cache=False)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_canon import canonical_form, automorphisms
+
+def graph_from_edges(n, edges, labels=None):
+    labels = labels or [str(i) for i in range(n)]
+    g = Graph()
+    for i in range(n):
+        g.add_vert(Vertex(labels[i], "black"))
+    for a, b in edges:
+        g.add_edge(labels[a], labels[b])
+    return g
+
+def edge_set(g):
+    return set(frozenset((v.id, n.id)) for v in g for n in g[v])
+
+class CanonicalForm(unittest.TestCase):
+    def assertIsomorphism(self, g0, g1):
+        """Check that canonical orders map g0's edges onto g1's."""
+        key0, order0 = canonical_form(g0)
+        key1, order1 = canonical_form(g1)
+        mapping = dict(zip(order0, order1))
+
+        self.assertEqual(key0, key1)
+        self.assertEqual(set(frozenset(mapping[id] for id in e)
+                             for e in edge_set(g0)), edge_set(g1))
+
+    def test_CanonicalForm_0_relabeled(self):
+        rng = random.Random(11)
+
+        for n, p in ((6, 0.5), (9, 0.3), (12, 0.25)):
+            edges = [(a, b) for a in range(n) for b in range(a, n)
+                     if rng.random() < p]
+            labels = [str(i) for i in range(n)]
+            shuffled = labels[:]
+            rng.shuffle(shuffled)
+
+            self.assertIsomorphism(graph_from_edges(n, edges),
+                                   graph_from_edges(n, edges, shuffled))
+
+    def test_CanonicalForm_1_trees(self):
+        # Spider with legs 1, 2, 3 and a relabeled copy
+        edges = [(0, 1), (0, 2), (2, 3), (0, 4), (4, 5), (5, 6)]
+        g0 = graph_from_edges(7, edges)
+        g1 = graph_from_edges(7, edges, ["g", "e", "a", "d", "b", "c", "f"])
+
+        self.assertEqual(canonical_form(g0)[0][0], "tree")
+        self.assertIsomorphism(g0, g1)
+
+        # Same degrees, different tree: legs 2, 2, 2 from the center
+        other = graph_from_edges(7, [(0, 1), (1, 2), (0, 3), (3, 4), (0, 5),
+                                     (5, 6)])
+        self.assertNotEqual(canonical_form(g0)[0], canonical_form(other)[0])
+
+        # Two centers
+        self.assertIsomorphism(graph_from_edges(4, [(0, 1), (1, 2), (2, 3)]),
+                               graph_from_edges(4, [(3, 0), (0, 2), (2, 1)]))
+
+    def test_CanonicalForm_2_not_isomorphic(self):
+        # 6-cycle vs two triangles: refinement alone can't tell them apart
+        c6 = graph_from_edges(6, [(i, (i + 1) % 6) for i in range(6)])
+        triangles = graph_from_edges(6, [(0, 1), (1, 2), (2, 0),
+                                         (3, 4), (4, 5), (5, 3)])
+
+        self.assertNotEqual(canonical_form(c6)[0], canonical_form(triangles)[0])
+
+        # A self-loop matters
+        loop = graph_from_edges(3, [(0, 1), (1, 2), (2, 2)])
+        path = graph_from_edges(3, [(0, 1), (1, 2)])
+
+        self.assertNotEqual(canonical_form(loop)[0], canonical_form(path)[0])
+
+    def test_CanonicalForm_3_budget(self):
+        # A 12-cycle's leaves: 12 rotations x 2 reflections
+        c12 = graph_from_edges(12, [(i, (i + 1) % 12) for i in range(12)])
+
+        self.assertIsNone(canonical_form(c12, max_leaves=10))
+        self.assertIsNotNone(canonical_form(c12, max_leaves=24))
+
+        self.assertEqual(canonical_form(Graph()), (("graph", 0, ()), []))
+
+class Automorphisms(unittest.TestCase):
+    def assertAutomorphisms(self, g, order):
+        group = automorphisms(g)
+        ids = [v.id for v in g]
+        edges = edge_set(g)
+
+        self.assertEqual(len(group), order)
+        self.assertEqual(len(set(group)), order)
+        self.assertEqual(group[0], tuple(range(len(ids))))
+        for p in group:
+            self.assertEqual(set(frozenset(ids[p[ids.index(id)]] for id in e)
+                                 for e in edges), edges)
+
+    def test_Automorphisms_0_groups(self):
+        # Rotations and reflections
+        self.assertAutomorphisms(
+            graph_from_edges(7, [(i, (i + 1) % 7) for i in range(7)]), 14)
+        self.assertAutomorphisms(
+            graph_from_edges(4, [(0, 1), (1, 2), (2, 3)]), 2)
+        # 3x3 grid: the square's symmetries
+        self.assertAutomorphisms(
+            graph_from_edges(9, [(0, 1), (1, 2), (3, 4), (4, 5), (6, 7),
+                                 (7, 8), (0, 3), (3, 6), (1, 4), (4, 7),
+                                 (2, 5), (5, 8)]), 8)
+        # Only the identity: a spider with legs 1, 2 and 3
+        self.assertAutomorphisms(
+            graph_from_edges(7, [(0, 1), (0, 2), (2, 3), (0, 4), (4, 5),
+                                 (5, 6)]), 1)
+        # Petersen graph
+        self.assertAutomorphisms(
+            graph_from_edges(10, [(i, (i + 1) % 5) for i in range(5)] +
+                             [(5 + i, 5 + (i + 2) % 5) for i in range(5)] +
+                             [(i, i + 5) for i in range(5)]), 120)
+
+    def test_Automorphisms_1_budget(self):
+        c12 = graph_from_edges(12, [(i, (i + 1) % 12) for i in range(12)])
+
+        self.assertIsNone(automorphisms(c12, max_leaves=10))
+        self.assertEqual(automorphisms(Graph()), [()])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_logic import recolor
+from hunters_and_rabbits.hr_compact import CompactGraph
+
+def build_graph(colors, edges):
+    g = Graph()
+    for id, color in colors:
+        g.add_vert(Vertex(id, color))
+    for e in edges:
+        g.add_edge(e[0], e[1])
+    return g
+
+class Compact(unittest.TestCase):
+    def setUp(self):
+        # Same graph as test_logic's RecolorGraph_0_normal, self-loop included
+        self.g = build_graph(
+            [("1", "white"), ("2", "white"), ("3", "black"), ("4", "white"),
+             ("5", "white")],
+            [("1", "2"), ("1", "3"), ("3", "2"), ("4", "3"), ("5", "4"),
+             ("5", "5")]
+        )
+        self.cg = CompactGraph.from_graph(self.g)
+
+    def test_Compact_0_structure(self):
+        self.assertEqual(self.cg.get_vert_count(), 5)
+        self.assertEqual(self.cg.get_edge_count(), self.g.get_edge_count())
+        self.assertEqual(list(self.cg.degree), [2, 2, 3, 2, 2])
+
+        for v in self.g:
+            i = self.cg.index[v.id]
+            neighbors = self.cg.indices[self.cg.indptr[i]:self.cg.indptr[i + 1]]
+            self.assertEqual(set(self.cg.ids[j] for j in neighbors),
+                             set(n.id for n in self.g.neighbors(v.id)))
+
+        with self.assertRaises(ValueError):
+            self.cg.indices[0] = 0 # Read-only
+
+    def test_Compact_1_neighborhood_matches_recolor(self):
+        black = self.cg.black_mask(self.g)
+
+        for _ in range(4):
+            recolor(self.g)
+            black = self.cg.neighborhood(black)
+
+            self.assertEqual(self.cg.ids_from_mask(black),
+                             [v.id for v in self.g if v.color == "black"])
+
+    def test_Compact_2_masks(self):
+        mask = self.cg.mask_from_ids(["5", "2"])
+
+        self.assertEqual(self.cg.ids_from_mask(mask), ["2", "5"])
+        self.assertEqual(list(self.cg.black_neighbor_counts(mask)),
+                         [1, 0, 1, 1, 1])
+
+    def test_Compact_3_empty(self):
+        cg = CompactGraph.from_graph(Graph())
+
+        self.assertEqual(cg.get_vert_count(), 0)
+        self.assertEqual(cg.get_edge_count(), 0)
+        self.assertEqual(len(cg.neighborhood(cg.black_mask(Graph()))), 0)
+
+if __name__ == "__main__":
+    unittest.main()
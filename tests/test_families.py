@@ -0,0 +1,98 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Graph
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_families import family_schedule
+from hunters_and_rabbits.hr_solver import solve
+from hunters_and_rabbits.hr_verify import verify
+from graphs import graph_from_edges
+
+def caterpillar(rng, spine):
+    edges = [(i, i + 1) for i in range(spine - 1)]
+    n = spine
+    for i in range(spine):
+        for _ in range(rng.randint(0, 3)):
+            edges.append((i, n))
+            n += 1
+    return graph_from_edges(n, edges)
+
+def spider(legs):
+    edges = []
+    n = 1
+    for length in legs:
+        previous = 0
+        for _ in range(length):
+            edges.append((previous, n))
+            previous = n
+            n += 1
+    return graph_from_edges(n, edges)
+
+class FamilySchedule(unittest.TestCase):
+    def assertOptimal(self, g, family, k):
+        result = family_schedule(g)
+        self.assertIsNotNone(result)
+        self.assertEqual(result[:2], (family, k))
+
+        verdict = verify(CompactGraph.from_graph(g), [(0, result[2])],
+                         workers=1)[0]
+        self.assertTrue(verdict.passed)
+        self.assertLessEqual(verdict.max_shots, k)
+
+        if (k > 0) and (g.get_vert_count() <= 16):
+            # No search finds a schedule with fewer hunters
+            self.assertIsNone(solve(g, k - 1))
+
+    def test_FamilySchedule_0_paths(self):
+        for n in range(1, 12):
+            family = "path"
+            self.assertOptimal(graph_from_edges(n, [(i, i + 1)
+                                                    for i in range(n - 1)]),
+                               family, 1 if n > 1 else 0)
+
+    def test_FamilySchedule_1_cycles(self):
+        for n in range(3, 12):
+            self.assertOptimal(graph_from_edges(n, [(i, (i + 1) % n)
+                                                    for i in range(n)]),
+                               "cycle", 2)
+
+    def test_FamilySchedule_2_caterpillars(self):
+        rng = random.Random(4)
+
+        for _ in range(30):
+            g = caterpillar(rng, rng.randint(2, 9))
+            if g.family() == "caterpillar":
+                self.assertOptimal(g, "caterpillar", 1)
+
+        # A star's body is one vertex
+        self.assertOptimal(graph_from_edges(5, [(0, i) for i in range(1, 5)]),
+                           "caterpillar", 1)
+
+    def test_FamilySchedule_3_spiders(self):
+        self.assertOptimal(spider([3, 3, 3]), "spider", 2)
+        self.assertOptimal(spider([1, 2, 3, 4, 5]), "spider", 2)
+        # One hunter is enough here, but there's no closed form for it
+        self.assertIsNone(family_schedule(spider([2, 2, 2])))
+
+    def test_FamilySchedule_4_others(self):
+        # A tree with two branch vertices that isn't a caterpillar
+        tree = graph_from_edges(9, [(0, 1), (1, 2), (1, 3), (3, 4), (2, 5),
+                                    (5, 6), (2, 7), (7, 8)])
+        self.assertEqual(tree.family(), "tree")
+        self.assertIsNone(family_schedule(tree))
+
+        # Disconnected, and a triangle with a tail
+        self.assertIsNone(graph_from_edges(2, []).family())
+        self.assertIsNone(graph_from_edges(4, [(0, 1), (1, 2), (2, 0),
+                                               (2, 3)]).family())
+        self.assertIsNone(Graph().family())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import pickle
+import random
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_frozen import DerivedCache
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+
+def graph(ids, edges):
+    g = Graph()
+    g.add_verts(Vertex(id, "black") for id in ids)
+    g.add_edges(edges)
+
+    return g
+
+class Frozen(unittest.TestCase):
+    def test_Frozen_0_snapshot(self):
+        g = graph("abcd", [("a", "b"), ("b", "c"), ("c", "c")])
+        frozen = g.freeze()
+
+        self.assertEqual(frozen.ids, ("a", "b", "c", "d"))
+        self.assertEqual(frozen.neighbors, ((1,), (0, 2), (1, 2), ()))
+        self.assertEqual(frozen.degree.tolist(), [1, 2, 2, 0])
+        self.assertEqual(frozen.get_edge_count(), g.get_edge_count())
+        self.assertTrue(frozen.has_edge("c", "b"))
+        self.assertFalse(frozen.has_edge("a", "d"))
+
+        # Editing the graph leaves the snapshot alone, which can't be edited
+        g.add_edges([("a", "d")])
+        self.assertFalse(frozen.has_edge("a", "d"))
+        with self.assertRaises(AttributeError):
+            frozen.ids = ()
+        with self.assertRaises(ValueError):
+            frozen.degree[0] = 5
+
+    def test_Frozen_1_labelled_hash(self):
+        edges = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "a")]
+        frozen = graph("abcd", edges).freeze()
+        shuffled = list(reversed(edges))
+
+        same = graph("dcba", shuffled).freeze()
+        self.assertEqual(frozen.structural_hash(), same.structural_hash())
+        self.assertEqual(frozen, same)
+        self.assertEqual({frozen: 1}[same], 1)
+
+        # Other edges, other ids, or ids of another type
+        self.assertNotEqual(frozen.structural_hash(),
+                            graph("abcd", edges[:3]).freeze().structural_hash())
+        self.assertNotEqual(frozen.structural_hash(),
+                            graph("abce", [("a", "b"), ("b", "c"), ("c", "e"),
+                                           ("e", "a")]).freeze().structural_hash())
+        self.assertNotEqual(graph([1], []).freeze().structural_hash(),
+                            graph(["1"], []).freeze().structural_hash())
+
+        # Memoized, and the same after pickling
+        self.assertIs(frozen.structural_hash(), frozen.structural_hash())
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)).structural_hash(),
+                         frozen.structural_hash())
+
+    def test_Frozen_2_invariant_hash(self):
+        rng = random.Random(2)
+        n = 12
+        edges = set()
+        while len(edges) < 20:
+            a, b = rng.sample(range(n), 2)
+            edges.add((min(a, b), max(a, b)))
+        g = graph(range(n), edges)
+
+        names = list("abcdefghijkl")
+        rng.shuffle(names)
+        relabelled = graph(names, [(names[a], names[b]) for a, b in edges])
+
+        frozen, other = g.freeze(), relabelled.freeze()
+        self.assertNotEqual(frozen.structural_hash(), other.structural_hash())
+        self.assertEqual(frozen.structural_hash(invariant=True),
+                         other.structural_hash(invariant=True))
+        # Canonical orders line up vertex for vertex
+        self.assertEqual([names[i] for i in frozen.canonical_order()],
+                         other.canonical_order())
+
+        # A path and a star both have 4 vertices and 3 edges
+        path = graph(range(4), [(0, 1), (1, 2), (2, 3)]).freeze()
+        star = graph(range(4), [(0, 1), (0, 2), (0, 3)]).freeze()
+        self.assertNotEqual(path.structural_hash(invariant=True),
+                            star.structural_hash(invariant=True))
+
+    def test_Frozen_3_derived_cache(self):
+        cache = DerivedCache(max_entries=2)
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+
+        self.assertEqual(cache.get("a", compute), 1)
+        self.assertEqual(cache.get("a", compute), 1)
+        cache.get("b", compute)
+        cache.get("c", compute) # Drops "a", the oldest
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.lookup("a"))
+        self.assertEqual(cache.lookup("c"), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_hooks, hr_logic
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_game import GameState, recolor
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+
+def random_graph(n, p, seed):
+    rng = random.Random(seed)
+    g = Graph()
+    for i in range(n):
+        g.add_vert(Vertex(str(i), rng.choice(("black", "white"))))
+    for i in range(n):
+        for j in range(i, n):
+            if rng.random() < p:
+                g.add_edge(str(i), str(j))
+
+    return g
+
+class Game(unittest.TestCase):
+    def test_Game_0_recolor(self):
+        rng = random.Random(0)
+
+        for seed in range(30):
+            g = random_graph(rng.randint(1, 20), 0.2, seed)
+            cg = CompactGraph.from_graph(g)
+            game = GameState.from_graph(cg, g)
+
+            for turn in range(1, 6):
+                shots = rng.sample(range(len(cg.ids)), min(2, len(cg.ids)))
+                for i in shots:
+                    g.get_vert(cg.ids[i]).color = "white"
+                hr_logic.recolor(g)
+
+                game.shoot(shots)
+                recolor(cg, game)
+
+                self.assertEqual(game.black_mask().tolist(),
+                                 cg.black_mask(g).tolist())
+                self.assertEqual(game.black_count(),
+                                 sum(v.color == "black" for v in g))
+                self.assertEqual((game.turn, game.shots), (turn, []))
+
+    def test_Game_1_shared_topology(self):
+        n = 10000
+        cg = CompactGraph.from_edges(list(range(n)),
+                                     [(i, i + 1) for i in range(n - 1)])
+
+        games = [GameState.new(cg) for _ in range(100)]
+        self.assertEqual(games[0].nbytes, n // 8)
+
+        # Games don't share state
+        games[1].shoot([0, 1])
+        games[1].shoot([1])
+        self.assertEqual(games[1].shots, [0, 1])
+        fork = games[1].copy()
+        recolor(cg, games[1])
+        self.assertEqual(fork.shots, [0, 1])
+        self.assertEqual(games[1].black_count(), n - 1) # Only 0 stays white
+        self.assertEqual(games[2].black_count(), n)
+
+        with self.assertRaises(ValueError):
+            games[0].shoot([n])
+        with self.assertRaises(ValueError):
+            GameState.new(cg, np.ones(3, dtype=bool))
+
+    def test_Game_2_cleared_and_hooks(self):
+        cg = CompactGraph.from_edges(["a", "b"], [("a", "b")])
+        game = GameState.new(cg)
+        calls = []
+        handler = lambda event, **args: calls.append(args)
+
+        hr_hooks.HOOKS.register(hr_hooks.RECOLOR_DONE, handler)
+        try:
+            game.shoot([0, 1])
+            recolor(cg, game)
+        finally:
+            hr_hooks.HOOKS.unregister(hr_hooks.RECOLOR_DONE, handler)
+
+        self.assertTrue(game.is_cleared())
+        self.assertEqual(calls, [{"graph": cg, "black": 0, "changed": 0}])
+
+if __name__ == '__main__':
+    unittest.main()
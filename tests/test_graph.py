@@ -4,10 +4,12 @@
 #
 # Contact: 01101011@tuta.io
 import unittest
+import pickle
+import random
 import sys
 
-sys.path.insert(0, '../hunters_and_rabbits') # Source files
-from hr_graph import Vertex, Graph
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
 
 class BasicGraph(unittest.TestCase):
     def setUp(self):
@@ -289,5 +291,145 @@ class BasicGraph(unittest.TestCase):
         self.assertEqual(self.g.neighbors(v5.id), {v6})
         self.assertEqual(self.g.neighbors(v6.id), {v5})
 
+    def test_17_bipartition(self):
+        # The triangle 1-2-3 is an odd cycle
+        self.assertIsNone(self.g.bipartition())
+        self.assertFalse(self.g.is_bipartite())
+
+        self.g.del_edge(self.v1.id, self.v2.id)
+        self.g.add_vert(Vertex(5,0))
+
+        # Path 1-3-2 with 4 hanging off 3, and isolated 5
+        sides = self.g.bipartition()
+        self.assertTrue(self.g.is_bipartite())
+        self.assertEqual(sorted(map(sorted, sides)), [[1, 2, 4, 5], [3]])
+        self.assertIn(5, sides[0])
+
+        self.g.add_edge(self.v4.id, self.v4.id)
+
+        self.assertIsNone(self.g.bipartition())
+
+    def test_18_components(self):
+        self.g.add_vert(Vertex(5,0))
+        self.g.add_vert(Vertex(6,0))
+        self.g.add_edge(5, 6)
+        self.g.add_vert(Vertex(7,0))
+
+        self.assertEqual(self.g.components(), [{1, 2, 3, 4}, {5, 6}, {7}])
+
+    def test_19_induced_subgraph(self):
+        self.g.add_edge(self.v4.id, self.v4.id)
+        sub = self.g.induced_subgraph([1, 3, 4])
+
+        self.assertEqual(sub.get_vert_count(), 3)
+        self.assertEqual(sub.get_edge_count(), 3)
+        self.assertTrue(sub.has_edge(1, 3))
+        self.assertTrue(sub.has_edge(3, 4))
+        self.assertTrue(sub.has_edge(4, 4))
+        self.assertFalse(sub.has_vert(2))
+
+        # Vertices are copies
+        sub.get_vert(1).color = 1
+        self.assertEqual(self.g.get_vert(1).color, 0)
+
+        with self.assertRaises(KeyError):
+            self.g.induced_subgraph([1, 9])
+
+    def test_20_add_verts_and_edges(self):
+        self.g.add_verts([Vertex(5, 0), Vertex(6, 0)])
+        self.g.add_edges([(5, 6), (4, 5), (6, 6)])
+
+        self.assertEqual(self.g.get_vert_count(), 6)
+        self.assertEqual(self.g.get_edge_count(), 7)
+        self.assertEqual(self.g.neighbors(5), {self.g.get_vert(4),
+                                               self.g.get_vert(6)})
+        self.assertTrue(self.g.has_edge(6, 6))
+
+        # A bad entry anywhere in a batch leaves the graph as it was
+        with self.assertRaises(ValueError):
+            self.g.add_verts([Vertex(7, 0), Vertex(1, 0)])
+        with self.assertRaises(ValueError):
+            self.g.add_edges([(1, 4), (4, 1)])
+        with self.assertRaises(ValueError):
+            self.g.add_edges([(1, 4), (1, 2)])
+        with self.assertRaises(KeyError):
+            self.g.add_edges([(1, 4), (1, 9)])
+        self.assertFalse(self.g.has_vert(7))
+        self.assertFalse(self.g.has_edge(1, 4))
+        self.assertEqual(self.g.get_edge_count(), 7)
+
+    def test_21_del_verts_and_edges(self):
+        self.g.add_edge(3, 3)
+        self.g.del_verts([1, 3])
+
+        self.assertEqual(self.g.get_vert_count(), 2)
+        self.assertEqual(self.g.get_edge_count(), 0)
+        self.assertEqual(self.g.neighbors(2), set())
+        self.assertEqual(self.g.neighbors(4), set())
+
+        self.g.add_edges([(2, 4)])
+        with self.assertRaises(KeyError):
+            self.g.del_verts([2, 9])
+        with self.assertRaises(ValueError):
+            self.g.del_edges([(2, 4), (2, 2)])
+        self.assertEqual(self.g.get_edge_count(), 1)
+
+        self.g.del_edges([(4, 2)])
+        self.assertEqual(self.g.get_edge_count(), 0)
+
+    def test_22_contract_edges(self):
+        self.v2.color = "black"
+        self.g.add_edge(4, 4)
+
+        # 2 merges into 1, then 3 into 1 (via 2), then 4 into 1
+        merged = self.g.contract_edges([(1, 2), (2, 3), (3, 4)])
+
+        self.assertEqual(merged, {2: 1, 3: 1, 4: 1})
+        self.assertEqual(self.g.get_vert_count(), 1)
+        self.assertEqual(self.g.neighbors(1), {self.v1}) # 4's self-loop
+        self.assertEqual(self.g.get_edge_count(), 1)
+        self.assertEqual(self.v1.color, "black")
+
+        with self.assertRaises(ValueError):
+            self.g.contract_edges([(1, 1)])
+
+    def test_23_edge_count_matches(self):
+        rng = random.Random(23)
+        g = Graph()
+        g.add_verts(Vertex(i, "white") for i in range(60))
+        g.add_edges(set((min(a, b), max(a, b)) for a, b in
+                        ((rng.randrange(60), rng.randrange(60))
+                         for _ in range(150))))
+
+        for _ in range(20):
+            ids = [v.id for v in g]
+            if len(ids) < 3:
+                break
+            edges = [(v.id, n.id) for v in g for n in g[v] if v.id <= n.id]
+            choice = rng.randrange(3)
+            if choice == 0:
+                g.del_verts(rng.sample(ids, 3))
+            elif (choice == 1) and edges:
+                g.contract_edges([e for e in rng.sample(edges, 2)
+                                  if e[0] != e[1]])
+            elif edges:
+                g.del_edges(rng.sample(edges, 1))
+
+            ends = sum(len(neighbors) for neighbors in g.values())
+            loops = sum(v in neighbors for v, neighbors in g.items())
+            self.assertEqual(g.get_edge_count(), (ends - loops) // 2 + loops)
+            for v, neighbors in g.items():
+                self.assertIs(g.get_vert(v.id), v)
+                for n in neighbors:
+                    self.assertIn(v, g[n])
+
+    def test_24_index_pickled(self):
+        copy = pickle.loads(pickle.dumps(self.g))
+        copy.del_vert(3)
+
+        self.assertEqual(copy.get_edge_count(), 1)
+        self.assertIs(copy.get_vert(1), next(v for v in copy if v.id == 1))
+        self.assertTrue(self.g.has_vert(3))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import pickle
+import random
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_logic
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+from hunters_and_rabbits.hr_history import CHUNK_BYTES, TurnHistory
+
+class History(unittest.TestCase):
+    def test_History_0_undo_redo(self):
+        history = TurnHistory("abc", 0b111)
+        history.record(0b010)
+        history.record(0b000)
+
+        self.assertEqual((history.turn, history.last_turn), (2, 2))
+        self.assertEqual(history.undo(), 0b010)
+        self.assertEqual(history.undo(), 0b111)
+        self.assertFalse(history.can_undo())
+        self.assertEqual(history.redo(), 0b010)
+        self.assertEqual(history.jump(2), 0b000)
+        self.assertFalse(history.can_redo())
+        self.assertEqual(history.mask(0), 0b111)
+
+        # Playing on from an earlier turn drops the turns after it
+        history.jump(0)
+        history.record(0b101)
+        self.assertEqual((history.turn, history.last_turn), (1, 1))
+        self.assertEqual(history.mask(1), 0b101)
+
+        with self.assertRaises(ValueError):
+            history.redo()
+        with self.assertRaises(ValueError):
+            history.jump(2)
+        with self.assertRaises(ValueError):
+            TurnHistory("abc", 0, turn=5).mask(4)
+
+    def test_History_1_graph(self):
+        g = Graph()
+        for id in "abcd":
+            g.add_vert(Vertex(id, "black"))
+        g.add_edge("a", "b")
+        g.add_edge("b", "c")
+        g.add_edge("c", "d")
+
+        history = TurnHistory.from_graph(g)
+        colors = [[v.color for v in g]]
+        for shot in ("b", "c", "b"):
+            g.get_vert(shot).color = "white"
+            hr_logic.recolor(g)
+            history.record_graph(g)
+            colors.append([v.color for v in g])
+
+        for turn in (1, 3, 0, 2):
+            history.apply(g, turn)
+            self.assertEqual([v.color for v in g], colors[turn])
+
+    def test_History_2_shared_chunks(self):
+        n = 100 * 8 * CHUNK_BYTES
+        rng = random.Random(2)
+        history = TurnHistory(range(n), (1 << n) - 1)
+        masks = [(1 << n) - 1]
+        pickled = len(pickle.dumps(history))
+
+        # 1000 turns, each changing one vertex
+        for _ in range(1000):
+            masks.append(masks[-1] ^ (1 << rng.randrange(n)))
+            history.record(masks[-1])
+
+        # Each turn takes a new chunk and a tuple, not a whole black set
+        whole = 1000 * n // 8
+        self.assertLess(history.memory_footprint(), whole / 20)
+        for turn in (0, 1, 500, 999, 1000):
+            self.assertEqual(history.mask(turn), masks[turn])
+
+        # Chunks stay shared through pickling (as by hr_store.SqliteStore)
+        self.assertLess(len(pickle.dumps(history)) - pickled, whole / 20)
+        self.assertEqual(pickle.loads(pickle.dumps(history)).mask(500),
+                         masks[500])
+
+if __name__ == '__main__':
+    unittest.main()
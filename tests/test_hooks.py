@@ -0,0 +1,171 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import os
+import pstats
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_hooks, hr_io, hr_logic
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+from hunters_and_rabbits.hr_hooks import Hooks, HOOKS, ProfileHook, TimingHook
+from hunters_and_rabbits.hr_metrics import Histogram
+
+def path_graph():
+    """Return the path a-b-c, all black."""
+    g = Graph()
+    for id in "abc":
+        g.add_vert(Vertex(id, "black"))
+    g.add_edge("a", "b")
+    g.add_edge("b", "c")
+
+    return g
+
+def spin(seconds):
+    """Keep the thread busy in Python code for 'seconds'."""
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        pass
+
+def play_turn(g, turn, shots):
+    """Play a turn the way the app's GO button does."""
+    HOOKS.emit(hr_hooks.TURN_START, graph=g, turn=turn)
+    for id in shots:
+        g.get_vert(id).color = "white"
+    HOOKS.emit(hr_hooks.SHOTS_APPLIED, graph=g, turn=turn, shots=shots)
+    hr_logic.recolor(g)
+    HOOKS.emit(hr_hooks.FIGURE_BUILT, graph=g, figure={})
+
+class HooksTest(unittest.TestCase):
+    def tearDown(self):
+        self.assertFalse(HOOKS.active) # Tests clean up after themselves
+
+    def test_Hooks_0_register(self):
+        hooks = Hooks()
+        calls = []
+        handler = lambda event, **args: calls.append((event, args))
+
+        self.assertFalse(hooks.active)
+        hooks.register(hr_hooks.GRAPH_LOADED, handler)
+        self.assertTrue(hooks.active)
+
+        hooks.emit(hr_hooks.GRAPH_LOADED, graph=None, path="p")
+        hooks.emit(hr_hooks.TURN_START, graph=None, turn=1) # Not handled
+        self.assertEqual(calls, [(hr_hooks.GRAPH_LOADED,
+                                  {"graph": None, "path": "p"})])
+
+        hooks.unregister(hr_hooks.GRAPH_LOADED, handler)
+        self.assertFalse(hooks.active)
+
+        with self.assertRaises(KeyError):
+            hooks.unregister(hr_hooks.GRAPH_LOADED, handler)
+        with self.assertRaises(KeyError):
+            hooks.register("no_such_event", handler)
+
+    def test_Hooks_1_emitters(self):
+        calls = []
+        handler = lambda event, **args: calls.append((event, args))
+        g = path_graph()
+        g.get_vert("b").color = "white"
+
+        HOOKS.register(hr_hooks.RECOLOR_DONE, handler)
+        HOOKS.register(hr_hooks.GRAPH_LOADED, handler)
+        try:
+            hr_logic.recolor(g) # a and c turn white, b stays black
+            loaded = hr_io.load_graph("LoadGoodXML_0_normal.xml")
+        finally:
+            HOOKS.unregister(hr_hooks.RECOLOR_DONE, handler)
+            HOOKS.unregister(hr_hooks.GRAPH_LOADED, handler)
+
+        self.assertEqual([v.color for v in g], ["white", "black", "white"])
+        self.assertEqual(calls, [
+            (hr_hooks.RECOLOR_DONE, {"graph": g, "black": 1, "changed": 3}),
+            (hr_hooks.GRAPH_LOADED, {"graph": loaded,
+                                     "path": "LoadGoodXML_0_normal.xml"}),
+        ])
+
+    def test_Hooks_2_timing(self):
+        g = path_graph()
+        histogram = Histogram("t_seconds", "Test", labels=("phase",))
+
+        with TimingHook(histogram) as timing:
+            play_turn(g, 1, ["b"])
+            play_turn(g, 2, ["b"])
+            hr_logic.recolor(g) # Outside a turn: not recorded
+
+        self.assertEqual([(t["turn"], t["black"], t["changed"])
+                          for t in timing.turns], [(1, 1, 3), (2, 0, 0)])
+        for turn in timing.turns:
+            self.assertEqual(sorted(turn), ["black", "changed",
+                                            "figure_seconds", "recolor_seconds",
+                                            "shoot_seconds", "turn"])
+        self.assertEqual(histogram.count("recolor"), 2)
+
+    def test_Hooks_3_profile(self):
+        g = path_graph()
+        profile = ProfileHook(turns=2).install()
+
+        for turn in range(1, 5):
+            play_turn(g, turn, [])
+
+        self.assertEqual(profile.profiled, 2)
+        self.assertIsNone(profile.hooks) # Removed itself
+        self.assertTrue(any(name == "recolor" for _, _, name in
+                            profile.stats().stats))
+
+        with self.assertRaises(ValueError):
+            ProfileHook(end_event=hr_hooks.GRAPH_LOADED)
+        with self.assertRaises(ValueError):
+            ProfileHook(start_event=hr_hooks.SHOTS_APPLIED)
+
+    def test_Hooks_4_profile_headless(self):
+        # Headless play emits only RECOLOR_DONE
+        g = path_graph()
+        profile = ProfileHook(turns=2, start_event=hr_hooks.RECOLOR_DONE,
+                              end_event=hr_hooks.RECOLOR_DONE).install()
+
+        hr_logic.recolor(g) # Starts the first turn
+        self.assertEqual(profile.profiled, 0)
+        for _ in range(3):
+            hr_logic.recolor(g)
+
+        self.assertEqual(profile.profiled, 2)
+        self.assertIsNone(profile.hooks)
+        self.assertTrue(any(name == "recolor" for _, _, name in
+                            profile.stats().stats))
+
+    def test_Hooks_5_sampling(self):
+        g = path_graph()
+
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "profile.out")
+            profile = ProfileHook(turns=2, start_event=hr_hooks.RECOLOR_DONE,
+                                  end_event=hr_hooks.RECOLOR_DONE,
+                                  interval=0.001, path=path).install()
+
+            hr_logic.recolor(g)
+            for _ in range(2):
+                spin(0.1)
+                hr_logic.recolor(g)
+
+            self.assertEqual(profile.profiled, 2)
+            self.assertIsNone(profile.hooks)
+            self.assertIsNone(profile.profile._thread) # Sampling stopped
+            stats = pstats.Stats(path).stats
+
+        spins = [value for (_, _, name), value in stats.items()
+                 if name == "spin"]
+        self.assertEqual(len(spins), 1)
+        samples, _, own, cumulative, callers = spins[0]
+        self.assertGreater(samples, 0)
+        self.assertLessEqual(own, cumulative)
+        self.assertIn("test_Hooks_5_sampling",
+                      [name for _, _, name in callers])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,25 @@
 #
 # Contact: 01101011@tuta.io
 import unittest
+import subprocess
 import sys
 
-sys.path.insert(0, '../hunters_and_rabbits') # Source files
-from hr_graph import Vertex, Graph
-from hr_io import load_graph, save_graph
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_io import load_graph, save_graph, load_schedules, \
+    save_schedules, apply_edits
+
+class LightweightImport(unittest.TestCase):
+    def test_LightweightImport_0_no_gui_modules(self):
+        # The game core must import without pulling in the Dash app.
+        code = "import sys; " +\
+               "import hunters_and_rabbits.hr_io, hunters_and_rabbits.hr_logic; " +\
+               "print(' '.join(m for m in ('dash', 'plotly', 'networkx', " +\
+               "'flask') if m in sys.modules))"
+        out = subprocess.run([sys.executable, "-c", code], cwd="..",
+                             capture_output=True, text=True, check=True)
+
+        self.assertEqual(out.stdout.strip(), "")
 
 class LoadGoodXML(unittest.TestCase):
     def test_LoadGoodXML_0_normal(self):
@@ -118,6 +132,27 @@ class LoadGoodXML(unittest.TestCase):
         self.assertEqual(parsed_g.get_vert(v8.id).color, "black")
         self.assertEqual(parsed_g.get_vert(v9.id).color, "black")
 
+    def test_LoadGoodXML_1_progress(self):
+        calls = []
+
+        parsed_g = load_graph("LoadGoodXML_1_good_color.xml",
+                              progress=lambda phase, f: calls.append((phase, f)))
+
+        self.assertEqual(parsed_g.get_vert_count(), 9)
+        self.assertEqual(calls[0], ("parse", 0.0))
+        self.assertEqual(calls[-1], ("build", 1.0))
+        self.assertIn(("parse", 1.0), calls)
+        self.assertEqual([phase for phase, _ in calls],
+                         sorted(phase for phase, _ in calls)[::-1])
+
+        # Raising from the callback aborts the load
+        def cancel(phase, fraction):
+            if phase == "build":
+                raise InterruptedError
+
+        with self.assertRaises(InterruptedError):
+            parsed_g = load_graph("LoadGoodXML_1_good_color.xml", progress=cancel)
+
     def test_LoadGoodXML_2_bad_graph_repeated_vert(self):
         with self.assertRaises(ValueError):
             parsed_g = load_graph("LoadGoodXML_2_bad_graph_repeated_vert.xml")
@@ -273,5 +308,68 @@ class SaveGraph(unittest.TestCase):
 
         self.assertEqual(saved_xml_str, empty_graph_xml_str)
 
+class Schedules(unittest.TestCase):
+    def test_Schedules_0_load(self):
+        schedules = load_schedules("LoadSchedules_0_normal.xml")
+
+        self.assertEqual(schedules, [
+            ("sweep", [["1"], [], ["1", "2"]]),
+            ("1", [["3"]]),
+            ("2", []),
+        ])
+
+    def test_Schedules_1_missing_shot_id_att(self):
+        self.assertRaises(RuntimeError, load_schedules,
+                          "LoadSchedules_1_missing_shot_id_att.xml")
+
+    def test_Schedules_2_bad_root_elt(self):
+        self.assertRaises(RuntimeError, load_schedules,
+                          "LoadGoodXML_0_normal.xml")
+
+    def test_Schedules_3_save(self):
+        schedules = [("a", [["1", "2"], []]), ("b", [])]
+
+        saved_xml_str = save_schedules(schedules, "SaveSchedules_0_saved.xml")
+
+        self.assertIn('<schedule id="a">', saved_xml_str)
+        self.assertEqual(load_schedules("SaveSchedules_0_saved.xml"), schedules)
+
+
+class Edits(unittest.TestCase):
+    def test_Edits_0_apply(self):
+        g = load_graph("LoadGoodXML_0_normal.xml")
+        ids = [v.id for v in g]
+        edges = g.get_edge_count()
+
+        apply_edits(g, "add x y\nconnect x,y x," + ids[0] + "; disconnect x,y")
+        self.assertEqual(g.get_vert_count(), len(ids) + 2)
+        self.assertEqual(g.get_edge_count(), edges + 1)
+        self.assertEqual(g.get_vert("y").color, "black")
+
+        apply_edits(g, "CONTRACT " + ids[0] + ",x; delete y")
+        self.assertEqual(g.get_vert_count(), len(ids))
+        self.assertEqual(g.get_edge_count(), edges)
+
+        apply_edits(g, "keep " + " ".join(ids[:2]))
+        self.assertEqual([v.id for v in g], ids[:2])
+
+    def test_Edits_1_bad(self):
+        g = load_graph("LoadGoodXML_0_normal.xml")
+        count = g.get_vert_count()
+
+        # Malformed text changes nothing
+        for text in ("add z; frob a", "add z; connect a", "add z; connect a,"):
+            with self.assertRaises(ValueError):
+                apply_edits(g, text)
+            self.assertEqual(g.get_vert_count(), count)
+
+        # Commands before one that fails stay applied
+        with self.assertRaises(KeyError):
+            apply_edits(g, "add z; delete nope")
+        self.assertTrue(g.has_vert("z"))
+
+        with self.assertRaises(KeyError):
+            apply_edits(g, "keep z nope")
+
 if __name__ == "__main__":
     unittest.main()
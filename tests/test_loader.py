@@ -0,0 +1,97 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import sys
+import threading
+import time
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_loader
+from hunters_and_rabbits.hr_store import MemoryStore
+
+def wait_for_job(store, timeout=10.0):
+    for _ in range(int(timeout / 0.01)):
+        with store.session("load") as state:
+            if hr_loader.is_finished(state["load"]):
+                return state["load"]
+        time.sleep(0.01)
+    raise TimeoutError
+
+def three_step_layout(g):
+    for i in range(1, 4):
+        yield dict((v, (i, i)) for v in g), i, 3
+
+class LoadJob(unittest.TestCase):
+    def test_LoadJob_0_normal(self):
+        store = MemoryStore()
+
+        hr_loader.start_load(store, "LoadGoodXML_0_normal.xml", three_step_layout)
+        load = wait_for_job(store)
+
+        self.assertEqual(load["status"], "done")
+        self.assertEqual(load["revision"], 3)
+        self.assertEqual(load["iteration"], (3, 3))
+        with store.session() as state:
+            self.assertEqual(state["graph"].get_vert_count(), 5)
+            self.assertEqual(set(state["positions"].values()), {(3, 3)})
+
+    def test_LoadJob_1_error(self):
+        store = MemoryStore()
+
+        hr_loader.start_load(store, "LoadBadXML_5_bad_root_elt.xml",
+                             three_step_layout)
+        load = wait_for_job(store)
+
+        self.assertEqual(load["status"], "error")
+        self.assertIn("RuntimeError", load["message"])
+        with store.session() as state:
+            self.assertEqual(state["graph"].get_vert_count(), 0)
+
+    def test_LoadJob_2_cancel(self):
+        store = MemoryStore()
+        release = threading.Event()
+
+        def blocked_layout(g):
+            yield dict(), 1, 2
+            release.wait(10)
+            yield dict(), 2, 2
+
+        hr_loader.start_load(store, "LoadGoodXML_0_normal.xml", blocked_layout)
+        # Wait for the coarse layout, then cancel during refinement
+        for _ in range(1000):
+            with store.session("load") as state:
+                if state["load"]["revision"] == 1:
+                    break
+            time.sleep(0.01)
+        hr_loader.cancel_load(store)
+        release.set()
+        load = wait_for_job(store)
+
+        self.assertEqual(load["status"], "cancelled")
+        self.assertEqual(load["revision"], 1)
+
+    def test_LoadJob_3_memory_budget(self):
+        store = MemoryStore()
+
+        hr_loader.start_load(store, "LoadGoodXML_0_normal.xml",
+                             three_step_layout, budget=1000)
+        load = wait_for_job(store)
+
+        self.assertEqual(load["status"], "error")
+        self.assertIn("memory budget", load["message"])
+        self.assertEqual((load["memory"]["vertices"], load["memory"]["edges"]),
+                         (5, 4))
+        self.assertIsNone(load["memory"]["measured"])
+
+        hr_loader.start_load(store, "LoadGoodXML_0_normal.xml",
+                             three_step_layout, budget=1 << 20)
+        load = wait_for_job(store)
+
+        self.assertEqual(load["status"], "done")
+        self.assertGreater(load["memory"]["measured"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,9 +6,9 @@
 import unittest
 import sys
 
-sys.path.insert(0, '../hunters_and_rabbits') # Source files
-from hr_graph import Vertex, Graph
-from hr_logic import recolor
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_logic import recolor, recolor_components
 
 def print_graph_colors(g):
     for vert, _ in g.items():
@@ -218,5 +218,27 @@ class RecolorGraph(unittest.TestCase):
             self.assertTrue(g.get_vert("7").color == spoke_color)
             self.assertTrue(g.get_vert("8").color == spoke_color)
 
+class RecolorComponents(unittest.TestCase):
+    def test_RecolorComponents_0_matches_recolor(self):
+        def two_triangles_and_a_path():
+            g = Graph()
+            for i in range(9):
+                g.add_vert(Vertex(str(i), "black" if i in (0, 7) else "white"))
+            for a, b in [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3),
+                         (6, 7), (7, 8), (8, 8)]:
+                g.add_edge(str(a), str(b))
+            return g
+
+        g = two_triangles_and_a_path()
+        by_component = two_triangles_and_a_path()
+        components = by_component.components()
+
+        for _ in range(4):
+            recolor(g)
+            recolor_components(by_component, components)
+
+            self.assertEqual([(v.id, v.color) for v in g],
+                             [(v.id, v.color) for v in by_component])
+
 if __name__ == "__main__":
     unittest.main()
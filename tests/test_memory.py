@@ -0,0 +1,107 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_memory
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+from hunters_and_rabbits.hr_io import load_compact_graph, load_graph, \
+    save_graph
+from hunters_and_rabbits.hr_memory import Estimate, choose_representation, \
+    estimate_file
+
+def random_graph(n, m, seed):
+    rng = random.Random(seed)
+    g = Graph()
+    for i in range(n):
+        g.add_vert(Vertex(f"v{i}", rng.choice(("black", "white"))))
+
+    edges = set()
+    while len(edges) < m:
+        a, b = sorted(rng.sample(range(n), 2))
+        edges.add((a, b))
+    for a, b in edges:
+        g.add_edge(f"v{a}", f"v{b}")
+
+    return g
+
+class Memory(unittest.TestCase):
+    def test_Memory_0_footprint(self):
+        small = random_graph(50, 60, 0)
+        big = random_graph(200, 400, 0)
+
+        for g in (small, big):
+            cg = CompactGraph.from_graph(g)
+            self.assertGreater(g.memory_footprint(), 2 * cg.memory_footprint())
+        self.assertGreater(big.memory_footprint(), small.memory_footprint())
+
+        # The per-vertex and per-edge rates are in the right range
+        estimate = Estimate(big.get_vert_count(), big.get_edge_count())
+        for footprint, representation in \
+            ((big.memory_footprint(), "graph"),
+             (CompactGraph.from_graph(big).memory_footprint(), "compact")):
+            self.assertLess(abs(estimate.bytes(representation) - footprint),
+                            footprint / 2)
+
+    def test_Memory_1_estimate_file(self):
+        estimate = estimate_file("LoadGoodXML_0_normal.xml")
+        self.assertEqual((estimate.vertices, estimate.edges), (5, 4))
+
+        # Sampled: vertices and edges are listed apart
+        g = random_graph(3000, 6000, 1)
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "g.xml")
+            save_graph(g, path)
+            self.assertGreater(os.path.getsize(path),
+                               hr_memory.SAMPLES * 4096)
+
+            samples = hr_memory.SAMPLE_BYTES
+            hr_memory.SAMPLE_BYTES = 4096
+            try:
+                estimate = estimate_file("\"" + path + "\"")
+            finally:
+                hr_memory.SAMPLE_BYTES = samples
+
+        self.assertLess(abs(estimate.vertices - 3000), 300)
+        self.assertLess(abs(estimate.edges - 6000), 600)
+
+    def test_Memory_2_choose(self):
+        estimate = Estimate(1000, 2000)
+
+        self.assertEqual(choose_representation(estimate, None), "graph")
+        self.assertEqual(choose_representation(estimate,
+                                               estimate.bytes("graph")),
+                         "graph")
+        self.assertEqual(choose_representation(estimate,
+                                               estimate.bytes("compact")),
+                         "compact")
+        with self.assertRaises(RuntimeError):
+            choose_representation(estimate, estimate.bytes("compact") - 1)
+
+    def test_Memory_3_load_compact(self):
+        g = load_graph("LoadGoodXML_1_good_color.xml")
+        cg, black = load_compact_graph("LoadGoodXML_1_good_color.xml")
+        expected = CompactGraph.from_graph(g)
+
+        self.assertEqual(cg.ids, expected.ids)
+        self.assertEqual(cg.indptr.tolist(), expected.indptr.tolist())
+        self.assertEqual(cg.indices.tolist(), expected.indices.tolist())
+        self.assertEqual(black.tolist(), expected.black_mask(g).tolist())
+
+        with self.assertRaises(ValueError):
+            load_compact_graph("LoadGoodXML_2_bad_graph_repeated_vert.xml")
+        with self.assertRaises(ValueError):
+            load_compact_graph("LoadGoodXML_3_bad_graph_repeated_edge.xml")
+        with self.assertRaises(KeyError):
+            load_compact_graph("LoadGoodXML_4_bad_graph_edge_to_missing_vert.xml")
+
+if __name__ == '__main__':
+    unittest.main()
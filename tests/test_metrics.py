@@ -0,0 +1,85 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_logic
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+from hunters_and_rabbits.hr_metrics import Histogram, Registry, REGISTRY
+
+class Metrics(unittest.TestCase):
+    def test_Metrics_0_histogram(self):
+        h = Histogram("t_seconds", "Test", buckets=(1, 2), labels=("kind",))
+        h.observe(0.5, "a")
+        h.observe(1, "a") # Bounds are inclusive
+        h.observe(5, "a")
+        h.observe(2, "b")
+
+        self.assertEqual(h.count("a"), 3)
+        self.assertEqual(h.sum("a"), 6.5)
+        self.assertEqual(h.count("c"), 0)
+        self.assertEqual(list(h.samples()), [
+            "t_seconds_bucket{kind=\"a\",le=\"1.0\"} 2",
+            "t_seconds_bucket{kind=\"a\",le=\"2.0\"} 2",
+            "t_seconds_bucket{kind=\"a\",le=\"+Inf\"} 3",
+            "t_seconds_sum{kind=\"a\"} 6.5",
+            "t_seconds_count{kind=\"a\"} 3",
+            "t_seconds_bucket{kind=\"b\",le=\"1.0\"} 0",
+            "t_seconds_bucket{kind=\"b\",le=\"2.0\"} 1",
+            "t_seconds_bucket{kind=\"b\",le=\"+Inf\"} 1",
+            "t_seconds_sum{kind=\"b\"} 2.0",
+            "t_seconds_count{kind=\"b\"} 1",
+        ])
+
+        with self.assertRaises(ValueError):
+            h.observe(1) # Missing label value
+
+    def test_Metrics_1_time(self):
+        h = Histogram("t_seconds", "Test")
+
+        with h.time():
+            pass
+
+        @h.time()
+        def fail():
+            raise KeyError
+
+        with self.assertRaises(KeyError):
+            fail()
+        self.assertEqual(h.count(), 2)
+
+    def test_Metrics_2_registry(self):
+        registry = Registry()
+        h = registry.histogram("t_seconds", "Test \"help\"\nline",
+                               buckets=(1,), labels=("kind",))
+
+        self.assertIs(registry.histogram("t_seconds", "Again",
+                                         labels=("kind",)), h)
+        with self.assertRaises(ValueError):
+            registry.histogram("t_seconds", "Test")
+
+        h.observe(0.5, "quote\"d")
+        self.assertEqual(registry.render(),
+            "# HELP t_seconds Test \"help\"\\nline\n"
+            "# TYPE t_seconds histogram\n"
+            "t_seconds_bucket{kind=\"quote\\\"d\",le=\"1.0\"} 1\n"
+            "t_seconds_bucket{kind=\"quote\\\"d\",le=\"+Inf\"} 1\n"
+            "t_seconds_sum{kind=\"quote\\\"d\"} 0.5\n"
+            "t_seconds_count{kind=\"quote\\\"d\"} 1\n")
+
+    def test_Metrics_3_recolor(self):
+        g = Graph()
+        g.add_vert(Vertex("a", "black"))
+        before = hr_logic.RECOLOR_SECONDS.count()
+
+        hr_logic.recolor(g)
+
+        self.assertEqual(hr_logic.RECOLOR_SECONDS.count(), before + 1)
+        self.assertIn("# TYPE hr_recolor_seconds histogram", REGISTRY.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_solver import solve
+from hunters_and_rabbits.hr_montecarlo import simulate, recommend_policy
+from graphs import graph_from_edges, cycle_graph
+
+class MonteCarlo(unittest.TestCase):
+    def test_MonteCarlo_0_one_edge(self):
+        # Shooting 0 twice catches a rabbit starting on 0 on turn 1 and one
+        # starting on 1 (which must move to 0) on turn 2.
+        cg = CompactGraph.from_graph(graph_from_edges(2, [(0, 1)]))
+        stats = simulate(cg, [["0"], ["0"]], 10000, seed=3, workers=1)
+
+        self.assertEqual(stats.survivors, 0)
+        self.assertEqual(stats.captures.sum(), 10000)
+        self.assertAlmostEqual(stats.captures[0] / 10000, 0.5, delta=0.05)
+        self.assertEqual(stats.survival()[0], 1.0)
+        self.assertEqual(stats.survival()[-1], 0.0)
+
+    def test_MonteCarlo_1_solver_schedule(self):
+        # A winning schedule catches every rabbit within its turns
+        g = cycle_graph(7)
+        cg = CompactGraph.from_graph(g)
+        schedule = solve(g, 2)
+        stats = simulate(cg, schedule, 20000, seed=1, workers=2,
+                         batch_size=4096)
+
+        self.assertEqual(stats.capture_fraction(), 1.0)
+        self.assertLessEqual(stats.mean_capture_turn(), len(schedule))
+
+    def test_MonteCarlo_2_repeatable(self):
+        cg = CompactGraph.from_graph(cycle_graph(8))
+        a = simulate(cg, [["0"]] * 5, 5000, turns=8, seed=9, workers=1)
+        b = simulate(cg, [["0"]] * 5, 5000, turns=8, seed=9, workers=1)
+
+        self.assertTrue(np.array_equal(a.captures, b.captures))
+        self.assertEqual(a.turns, 8)
+        # No shots after turn 5
+        self.assertTrue(np.all(a.captures[5:] == 0))
+        self.assertGreater(a.survivors, 0)
+
+    def test_MonteCarlo_3_stranded_and_start(self):
+        # Isolated vertex 2: rabbits there are caught on turn 1
+        cg = CompactGraph.from_graph(graph_from_edges(3, [(0, 1)]))
+        stats = simulate(cg, [[]], 100, start=["2"], seed=0, workers=1)
+
+        self.assertEqual(stats.captures.tolist(), [100])
+
+        with self.assertRaises(ValueError):
+            simulate(cg, [[]], 100, start=[])
+
+    def test_MonteCarlo_4_policy(self):
+        g = cycle_graph(6)
+        cg = CompactGraph.from_graph(g)
+        stats = simulate(cg, recommend_policy(2, depth=2), 5000, turns=12,
+                         seed=2, workers=1)
+
+        self.assertEqual(stats.turns, 12)
+        self.assertGreater(stats.capture_fraction(), 0.5)
+
+        with self.assertRaises(ValueError):
+            simulate(cg, recommend_policy(2), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_partition import Block, PartitionedBoard, split
+
+def compact_from_edges(n, edges):
+    g = Graph()
+    for i in range(n):
+        g.add_vert(Vertex(str(i), "black"))
+    for a, b in edges:
+        g.add_edge(str(a), str(b))
+    return CompactGraph.from_graph(g)
+
+class Partition(unittest.TestCase):
+    def test_Partition_0_blocks(self):
+        # Path 0 - 1 - ... - 9
+        cg = compact_from_edges(10, [(i, i + 1) for i in range(9)])
+        bounds = split(cg, 3)
+
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], 10)
+        self.assertEqual(len(bounds), 3)
+        self.assertTrue(all(lo < hi for lo, hi in bounds))
+
+        block = Block(cg, 3, 6)
+        self.assertEqual(block.halo.tolist(), [2, 6])
+
+    def test_Partition_1_matches_neighborhood(self):
+        rng = random.Random(6)
+        n = 300
+        # Random edges, a self-loop and some isolated vertices
+        edges = set((rng.randrange(n - 20), rng.randrange(n - 20))
+                    for _ in range(500))
+        edges = set(tuple(sorted(e)) for e in edges) | {(7, 7)}
+        cg = compact_from_edges(n, edges)
+        np_rng = np.random.default_rng(6)
+
+        for workers in (1, 3):
+            black = np.ones(n, dtype=bool)
+
+            with PartitionedBoard(cg, workers=workers) as board:
+                for _ in range(6):
+                    shots = np_rng.choice(n, size=10, replace=False)
+                    black[shots] = False
+                    black = cg.neighborhood(black)
+                    board.step(shots)
+
+                    self.assertTrue(np.array_equal(board.black, black))
+                self.assertEqual(board.turn, 6)
+
+    def test_Partition_2_empty(self):
+        with PartitionedBoard(compact_from_edges(0, []), workers=2) as board:
+            board.step()
+            self.assertEqual(len(board.black), 0)
+
+if __name__ == "__main__":
+    unittest.main()
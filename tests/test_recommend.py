@@ -0,0 +1,71 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_logic import recolor
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_recommend import shot_scores, recommend_shots
+
+def path_graph(n, color="black"):
+    g = Graph()
+    for i in range(n):
+        g.add_vert(Vertex(str(i), color))
+    for i in range(n - 1):
+        g.add_edge(str(i), str(i + 1))
+    return g
+
+class Recommend(unittest.TestCase):
+    def test_Recommend_0_gains(self):
+        # Path 0-1-2-3-4 with only 1 and 4 black: shooting 1 whitens 0 and 2
+        # next turn, shooting 4 whitens 3.
+        g = path_graph(5, "white")
+        g.get_vert("1").color = "black"
+        g.get_vert("4").color = "black"
+        cg = CompactGraph.from_graph(g)
+
+        scores = shot_scores(cg, cg.black_mask(g))
+
+        self.assertEqual(int(scores[1]), 2)
+        self.assertEqual(int(scores[4]), 1)
+        self.assertEqual(scores[0], -1.0) # White
+        self.assertEqual(recommend_shots(g, 1), ["1"])
+        self.assertEqual(sorted(recommend_shots(g, 2)), ["1", "4"])
+
+    def test_Recommend_1_star(self):
+        # Shooting the center of a black star leaves only the center black
+        g = Graph([Vertex("c", "black")] +
+                  [Vertex(str(i), "black") for i in range(6)])
+        for i in range(6):
+            g.add_edge("c", str(i))
+
+        self.assertEqual(recommend_shots(g, 1), ["c"])
+
+    def test_Recommend_2_lookahead(self):
+        # On a black path 0-1-2, shooting the middle leaves only 1 black, and
+        # shooting it again clears the graph.
+        g = path_graph(3)
+        cg = CompactGraph.from_graph(g)
+
+        for turn in range(2):
+            shots = recommend_shots(g, 1, depth=2, compact=cg)
+            self.assertEqual(shots, ["1"])
+            for id in shots:
+                g.get_vert(id).color = "white"
+            recolor(g)
+
+        self.assertFalse(any(v.color == "black" for v in g))
+
+    def test_Recommend_3_all_white(self):
+        g = path_graph(3, "white")
+
+        self.assertEqual(recommend_shots(g, 2), [])
+        self.assertEqual(recommend_shots(g, 2, depth=3), [])
+
+if __name__ == "__main__":
+    unittest.main()
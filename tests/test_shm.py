@@ -0,0 +1,70 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Vertex, Graph
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_shm import SharedTopology, attach, detach
+
+def graph_from_edges(labels, edges):
+    g = Graph()
+    for label in labels:
+        g.add_vert(Vertex(label, "black"))
+    for a, b in edges:
+        g.add_edge(labels[a], labels[b])
+    return g
+
+def neighborhood_ids(handle, ids):
+    """Worker: recolor from 'ids' on an attached topology."""
+    cg = attach(handle)
+    return cg.ids_from_mask(cg.neighborhood(cg.mask_from_ids(ids)))
+
+class Shm(unittest.TestCase):
+    def setUp(self):
+        # Non-ASCII ids, a self-loop and an isolated vertex
+        self.g = graph_from_edges(["a", "β", "c", "dé", "e"],
+                                  [(0, 1), (1, 2), (2, 3), (3, 3)])
+        self.cg = CompactGraph.from_graph(self.g)
+
+    def test_Shm_0_attach(self):
+        with SharedTopology(self.cg) as shared:
+            handle = pickle.loads(pickle.dumps(shared.handle))
+            cg = attach(handle)
+
+            self.assertIs(attach(handle), cg)
+            self.assertEqual(cg.ids, self.cg.ids)
+            self.assertEqual(cg.index, self.cg.index)
+            self.assertEqual(cg.get_edge_count(), 4)
+            for name in ("indptr", "indices", "degree", "rows"):
+                self.assertTrue(np.array_equal(getattr(cg, name),
+                                               getattr(self.cg, name)))
+            with self.assertRaises(ValueError):
+                cg.indices[0] = 1 # Read-only
+
+            detach(handle)
+            del cg
+
+        # Gone once the parent's done with it
+        with self.assertRaises(FileNotFoundError):
+            attach(handle)
+
+    def test_Shm_1_workers(self):
+        with SharedTopology(self.cg) as shared, \
+             ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(neighborhood_ids,
+                                        [shared.handle] * 4,
+                                        [["a"], ["β"], ["dé"], ["e"]]))
+
+        self.assertEqual(results, [["β"], ["a", "c"], ["c", "dé"], []])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Graph
+from hunters_and_rabbits.hr_logic import recolor
+from hunters_and_rabbits.hr_bitset import BitGraph, ParityBoard, MaskSymmetry
+from hunters_and_rabbits.hr_solver import solve, hunter_number, _Search
+from graphs import graph_from_edges, cycle_graph
+
+def path_graph(n):
+    return graph_from_edges(n, [(i, i + 1) for i in range(n - 1)])
+
+def spider_graph():
+    # Three legs of three edges each around vertex 0; one hunter can't
+    # clear it
+    return graph_from_edges(10, [(0, 1), (1, 2), (2, 3),
+                                 (0, 4), (4, 5), (5, 6),
+                                 (0, 7), (7, 8), (8, 9)])
+
+def grid_graph(rows, columns):
+    edges = []
+    for r in range(rows):
+        for c in range(columns):
+            if c + 1 < columns:
+                edges.append((r * columns + c, r * columns + c + 1))
+            if r + 1 < rows:
+                edges.append((r * columns + c, (r + 1) * columns + c))
+    return graph_from_edges(rows * columns, edges)
+
+def plays_out(g, schedule):
+    """Return whether shooting 'schedule' from all black clears g."""
+    for v in g:
+        v.color = "black"
+
+    for shots in schedule:
+        for id in shots:
+            g.get_vert(id).color = "white"
+        recolor(g)
+
+    return all(v.color == "white" for v in g)
+
+class Solver(unittest.TestCase):
+    def test_Solver_0_hunter_numbers(self):
+        cases = [
+            (path_graph(2), 1),
+            (path_graph(6), 1),
+            (cycle_graph(5), 2),
+            (cycle_graph(6), 2),
+            (spider_graph(), 2),
+            (graph_from_edges(4, [(a, b) for a in range(4)
+                                  for b in range(a + 1, 4)]), 3), # K4
+        ]
+
+        for g, k in cases:
+            solution = hunter_number(g)
+
+            self.assertEqual(solution.k, k)
+            self.assertTrue(plays_out(g, solution.schedule))
+            self.assertTrue(all(len(shots) <= k for shots in solution.schedule))
+
+    def test_Solver_1_no_edges(self):
+        g = graph_from_edges(3, [])
+
+        self.assertEqual(hunter_number(g).k, 0)
+        self.assertEqual(hunter_number(Graph()).k, 0)
+
+    def test_Solver_2_too_few_hunters(self):
+        self.assertIsNone(solve(cycle_graph(6), 1))
+        self.assertIsNone(solve(cycle_graph(7), 1))
+        self.assertTrue(plays_out(cycle_graph(7), solve(cycle_graph(7), 2)))
+
+    def test_Solver_3_parity_mode(self):
+        g = grid_graph(3, 3)
+        full = hunter_number(g, parity=False, cache=False)
+        halves = hunter_number(g, parity=True, cache=False)
+
+        self.assertEqual(full.stats["decided_by"], ["lower bound"])
+        self.assertFalse(full.stats["parity"])
+        self.assertTrue(halves.stats["parity"])
+        self.assertEqual(full.k, halves.k)
+        self.assertTrue(plays_out(g, halves.schedule))
+
+        # Each parity class is searched as a half-size set
+        g = cycle_graph(12)
+        bg = BitGraph.from_graph(g)
+        search = _Search(bg)
+        parity_search = _Search(bg)
+
+        self.assertIsNotNone(search.run(bg.full, 2))
+        self.assertIsNotNone(parity_search.run_parity(bg.sides(g), bg.full, 2))
+        self.assertLess(parity_search.states, search.states)
+
+        with self.assertRaises(ValueError):
+            solve(cycle_graph(5), 2, parity=True)
+        with self.assertRaises(ValueError):
+            hunter_number(cycle_graph(5), parity=True)
+
+    def test_Solver_4_start(self):
+        # A rabbit known to start on an end of a path is caught in one shot
+        # per step towards the other end at most.
+        g = path_graph(5)
+        schedule = solve(g, 1, start=["0"])
+
+        self.assertIsNotNone(schedule)
+        self.assertLessEqual(len(schedule), 4)
+
+    def test_Solver_5_parity_board(self):
+        g = cycle_graph(6)
+        bg = BitGraph.from_graph(g)
+        board = ParityBoard(bg, bg.sides(g), bg.mask_from_ids(["0", "1"]))
+
+        board.shoot(bg.mask_from_ids(["1"]))
+        board.recolor()
+
+        self.assertEqual(board.classes, [bg.mask_from_ids(["1", "5"]), 0])
+        self.assertEqual(sorted(bg.ids_from_mask(board.black)), ["1", "5"])
+
+    def test_Solver_6_components(self):
+        # Two relabeled 5-cycles, a path and an isolated vertex
+        edges = [(i, (i + 1) % 5) for i in range(5)] + \
+            [(5 + i, 5 + (i + 2) % 5) for i in range(5)] + \
+            [(10, 11), (11, 12)]
+        g = graph_from_edges(14, edges)
+        solution = hunter_number(g, cache=False)
+
+        self.assertEqual(solution.k, 2)
+        self.assertEqual(solution.stats["components"], 4)
+        self.assertTrue(plays_out(g, solution.schedule))
+        self.assertTrue(all(len(shots) <= 2 for shots in solution.schedule))
+
+        # Solved components are reused, relabeled, for isomorphic ones
+        hunter_number(g, workers=2)
+        solution = hunter_number(g)
+
+        self.assertEqual(solution.stats["cached"], 4)
+        self.assertEqual(solution.stats["states"], 0)
+        self.assertTrue(plays_out(g, solution.schedule))
+
+    def test_Solver_7_symmetry(self):
+        g = cycle_graph(14)
+        bg = BitGraph.from_graph(g)
+        symmetry = MaskSymmetry.from_graph(bg, g)
+        rotated = [bg.mask_from_ids([str((i + 3) % 14) for i in range(j)])
+                   for j in range(1, 5)]
+
+        self.assertEqual(symmetry.order, 28)
+        for j, mask in enumerate(rotated, 1):
+            self.assertEqual(symmetry.canonical(mask), (1 << j) - 1)
+
+        search = _Search(bg)
+        orbit_search = _Search(bg, symmetry=symmetry)
+        shots = orbit_search.run(bg.full, 2)
+
+        self.assertIsNotNone(search.run(bg.full, 2))
+        self.assertIsNotNone(shots)
+        self.assertLess(orbit_search.states, search.states)
+        self.assertTrue(plays_out(g, [bg.ids_from_mask(s) for s in shots]))
+
+        # Same answers either way
+        petersen = graph_from_edges(10, [(i, (i + 1) % 5) for i in range(5)] +
+                                    [(5 + i, 5 + (i + 2) % 5)
+                                     for i in range(5)] +
+                                    [(i, i + 5) for i in range(5)])
+        plain = hunter_number(petersen, cache=False, symmetry=False)
+        reduced = hunter_number(petersen, cache=False)
+
+        self.assertEqual(plain.k, reduced.k)
+        self.assertEqual(plain.stats["symmetry"], 1)
+        self.assertTrue(plays_out(petersen, reduced.schedule))
+        self.assertIsNone(solve(petersen, reduced.k - 1))
+
+    def test_Solver_8_bounded_memory(self):
+        g = grid_graph(3, 4)
+        bg = BitGraph.from_graph(g)
+        search = _Search(bg)
+        # 64 slots: the table spills a run every 32 new states
+        bounded = _Search(bg, table_bytes=64 * 8 * 2)
+        shots = bounded.run(bg.full, 2)
+
+        self.assertEqual(len(shots), len(search.run(bg.full, 2)))
+        self.assertEqual(bounded.states, search.states)
+        self.assertTrue(plays_out(g, [bg.ids_from_mask(s) for s in shots]))
+        self.assertIsNone(bounded.run(bg.full, 1))
+
+        schedule = solve(grid_graph(3, 3), 2, table_bytes=1 << 12)
+        self.assertTrue(plays_out(grid_graph(3, 3), schedule))
+
+if __name__ == "__main__":
+    unittest.main()
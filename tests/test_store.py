@@ -0,0 +1,147 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_graph import Graph, Vertex
+from hunters_and_rabbits.hr_store import MemoryStore, SqliteStore, default_state
+
+def path_graph():
+    g = Graph()
+    g.add_verts(Vertex(id, "white") for id in "abc")
+    g.add_edges([("a", "b"), ("b", "c")])
+
+    return g
+
+class Store(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "state.db")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_Store_0_memory(self):
+        store = MemoryStore()
+        store.ping()
+
+        with store.session() as state:
+            self.assertEqual(state.keys(), default_state().keys())
+            state["clicked"]["a"] = "black"
+        # Keys are ignored; the live state is handed out
+        with store.session("load") as state:
+            self.assertEqual(state["clicked"], {"a": "black"})
+            self.assertIn("graph", state)
+
+    def test_Store_1_sqlite_shared(self):
+        # Two stores on one file stand in for two server workers
+        writer = SqliteStore(self.path)
+        reader = SqliteStore(self.path)
+        writer.ping()
+
+        with reader.session() as state:
+            self.assertEqual(state["graph"].get_vert_count(), 0)
+            self.assertIsNone(state["load"])
+
+        with writer.session() as state:
+            state["graph"] = path_graph()
+            state["clicked"]["a"] = "black"
+
+        with reader.session() as state:
+            self.assertEqual(state["graph"].get_edge_count(), 2)
+            self.assertTrue(state["graph"].has_edge("b", "c"))
+            self.assertEqual(state["clicked"], {"a": "black"})
+
+    def test_Store_2_sqlite_keys(self):
+        store = SqliteStore(self.path)
+
+        with store.session() as state:
+            state["graph"] = path_graph()
+
+        with store.session("load", "clicked") as state:
+            self.assertEqual(state, {"load": None, "clicked": dict()})
+            state["load"] = {"job": 1}
+        # Keys outside the session are left alone
+        with store.session() as state:
+            self.assertEqual(state["load"], {"job": 1})
+            self.assertEqual(state["graph"].get_vert_count(), 3)
+
+        # Deleted keys are deleted from the file
+        with store.session("load") as state:
+            del state["load"]
+        with store.session("load") as state:
+            self.assertIsNone(state["load"])
+
+    def test_Store_3_sqlite_rollback(self):
+        store = SqliteStore(self.path)
+
+        with store.session() as state:
+            state["clicked"]["a"] = "black"
+
+        with self.assertRaises(ZeroDivisionError):
+            with store.session() as state:
+                state["clicked"]["b"] = "white"
+                state["graph"] = path_graph()
+                1 / 0
+
+        with store.session() as state:
+            self.assertEqual(state["clicked"], {"a": "black"})
+            self.assertEqual(state["graph"].get_vert_count(), 0)
+
+        # The store is still usable after a rollback
+        with store.session("clicked") as state:
+            state["clicked"].clear()
+        with store.session("clicked") as state:
+            self.assertEqual(state["clicked"], dict())
+
+    def test_Store_4_sqlite_reset(self):
+        store = SqliteStore(self.path)
+
+        with store.session() as state:
+            state["graph"] = path_graph()
+            state["extra"] = 1
+        store.reset()
+
+        with store.session() as state:
+            self.assertEqual(state.keys(), default_state().keys())
+            self.assertEqual(state["graph"].get_vert_count(), 0)
+
+    def test_Store_5_sqlite_ping(self):
+        store = SqliteStore(self.path)
+        store.ping()
+
+        store._connect().execute("DROP TABLE state")
+        with self.assertRaises(sqlite3.OperationalError):
+            store.ping()
+
+    def test_Store_6_sqlite_serialized(self):
+        # Sessions in different connections mustn't lose each other's updates
+        stores = [SqliteStore(self.path) for _ in range(4)]
+        with stores[0].session() as state:
+            state["count"] = 0
+
+        def add(store):
+            for _ in range(25):
+                with store.session("count") as state:
+                    state["count"] += 1
+
+        threads = [threading.Thread(target=add, args=(store,))
+                   for store in stores]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with stores[0].session("count") as state:
+            self.assertEqual(state["count"], 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_bitset import BitGraph
+from hunters_and_rabbits.hr_trajectory import Trajectory, WalkDistances
+from graphs import graph_from_edges, cycle_graph
+
+class Trajectories(unittest.TestCase):
+    def test_Trajectory_0_even_cycle(self):
+        bg = BitGraph.from_graph(cycle_graph(6))
+        traj = Trajectory(bg, bg.mask_from_ids(["0"]))
+
+        # {0}, {1, 5}, {0, 2, 4}, {1, 3, 5}, {0, 2, 4}, ...
+        self.assertEqual(traj.preperiod, 2)
+        self.assertEqual(traj.period, 2)
+        self.assertFalse(traj.clears())
+        self.assertEqual(traj.state_at(10 ** 9), bg.mask_from_ids(["0", "2", "4"]))
+        self.assertEqual(traj.state_at(10 ** 9 + 1), bg.mask_from_ids(["1", "3", "5"]))
+        self.assertEqual(traj.state_at(1), bg.mask_from_ids(["1", "5"]))
+
+        with self.assertRaises(ValueError):
+            traj.state_at(-1)
+
+    def test_Trajectory_1_odd_cycle(self):
+        bg = BitGraph.from_graph(cycle_graph(5))
+        traj = Trajectory(bg, bg.mask_from_ids(["0"]))
+
+        self.assertEqual(traj.period, 1)
+        self.assertEqual(traj.cycle(), [bg.full])
+
+    def test_Trajectory_2_clears(self):
+        # An edge and an isolated vertex: everything goes white
+        bg = BitGraph.from_graph(graph_from_edges(3, [(0, 1)]))
+        traj = Trajectory(bg, bg.mask_from_ids(["0", "2"]))
+
+        self.assertFalse(traj.clears())
+
+        traj = Trajectory(bg, bg.mask_from_ids(["2"]))
+
+        self.assertTrue(traj.clears())
+        self.assertEqual(traj.state_at(5), 0)
+
+    def test_WalkDistances_0_matches_stepping(self):
+        rng = random.Random(5)
+
+        for n in (1, 6, 9, 14):
+            edges = [(a, b) for a in range(n) for b in range(a, n)
+                     if rng.random() < 0.15]
+            bg = BitGraph.from_graph(graph_from_edges(n, edges))
+            walks = WalkDistances(bg)
+            start = rng.getrandbits(n)
+            traj = Trajectory(bg, start)
+
+            for t in range(3 * n + 3):
+                self.assertEqual(walks.state_at(start, t), traj.state_at(t))
+
+    def test_WalkDistances_1_distance(self):
+        bg = BitGraph.from_graph(cycle_graph(5))
+        walks = WalkDistances(bg)
+
+        self.assertEqual(walks.distance(0, 2, 0), 2)
+        self.assertEqual(walks.distance(0, 2, 1), 3)
+        self.assertEqual(walks.distance(0, 0, 1), 5)
+
+        bg = BitGraph.from_graph(cycle_graph(4))
+        walks = WalkDistances(bg)
+
+        self.assertIsNone(walks.distance(0, 2, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import os
+import random
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits import hr_ttable
+from hunters_and_rabbits.hr_ttable import MERGE_RUNS, TranspositionTable, \
+    pack, unpack
+
+class TTable(unittest.TestCase):
+    def test_TTable_0_pack(self):
+        states = [0, 1, (1 << 64) - 1, 1 << 64, (5 << 130) | 7]
+
+        self.assertEqual(unpack(pack(states, 3)), states)
+        self.assertEqual(pack([1 << 64 | 2], 2).tolist(), [[1, 2]])
+
+    def test_TTable_1_add_many(self):
+        with TranspositionTable(10) as table:
+            new = table.add_many([3, 5, 3, 0, 0])
+
+            self.assertEqual(new.tolist(), [True, True, False, True, False])
+            self.assertEqual(table.add_many([5, 6]).tolist(), [False, True])
+            self.assertEqual(len(table), 4)
+            self.assertIn(0, table)
+            self.assertIn(6, table)
+            self.assertNotIn(7, table)
+
+        with self.assertRaises(ValueError):
+            TranspositionTable(10, max_bytes=100)
+
+    def test_TTable_2_spill(self):
+        rng = random.Random(4)
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            for bits in (30, 150):
+                seen = set()
+                # 64 slots: runs of 32 states
+                table = TranspositionTable(bits, max_bytes=64 * 8 * 3,
+                                           spill_dir=spill_dir)
+
+                for _ in range(100):
+                    batch = [rng.getrandbits(bits)
+                             for _ in range(rng.randint(0, 40))]
+                    batch += rng.sample(sorted(seen), min(len(seen), 10))
+                    new = table.add_many(batch)
+
+                    expected = []
+                    for state in batch:
+                        expected.append(state not in seen)
+                        seen.add(state)
+                    self.assertEqual(new.tolist(), expected)
+
+                table.join()
+                self.assertEqual(len(table), len(seen))
+                self.assertGreater(table.spilled, 0)
+                # Merged rather than one run per spill, and merged runs'
+                # files deleted
+                self.assertLess(table.run_count(), table.spilled // 32)
+                self.assertEqual(len(os.listdir(table._dir)),
+                                 table.run_count())
+                self.assertTrue(all(state in table for state in seen))
+
+                table.close()
+                self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_TTable_3_stash(self):
+        with TranspositionTable(70, max_bytes=1 << 12) as table:
+            stashed = table.stash([1 << 69, 3])
+
+            self.assertEqual(unpack(stashed), [1 << 69, 3])
+            self.assertEqual(table.stash([]).shape, (0, 2))
+
+    def test_TTable_4_merge_error(self):
+        def full_disk(a, b, path, dtype):
+            open(path, "wb").close()
+            raise OSError(28, "No space left on device")
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            table = TranspositionTable(30, max_bytes=64 * 8 * 3,
+                                       spill_dir=spill_dir)
+            states = MERGE_RUNS * table._limit # Enough to start a merge
+            with mock.patch.object(hr_ttable, "_merge_pair", full_disk):
+                with self.assertRaises(RuntimeError):
+                    for i in range(states + 2):
+                        table.add_many([i + 1])
+                        if table._merger is not None:
+                            table._merger.join()
+
+            # The runs are left as they were, and the partial file's gone
+            self.assertEqual(table.run_count(), MERGE_RUNS)
+            self.assertEqual(len(os.listdir(table._dir)), MERGE_RUNS)
+            self.assertTrue(all(i + 1 in table for i in range(states)))
+            table.close()
+
+if __name__ == "__main__":
+    unittest.main()
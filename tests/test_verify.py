@@ -0,0 +1,91 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+# Contact: 01101011@tuta.io
+import unittest
+import random
+import sys
+
+sys.path.insert(0, '..') # Package root
+from hunters_and_rabbits.hr_logic import recolor
+from hunters_and_rabbits.hr_compact import CompactGraph
+from hunters_and_rabbits.hr_verify import verify
+import hunters_and_rabbits.hr_verify as hr_verify
+from graphs import graph_from_edges
+
+def black_counts(g, turns):
+    """Play a schedule with recolor(); return the black count after each
+    turn, starting with turn 0.
+    """
+    for v in g:
+        v.color = "black"
+    counts = [g.get_vert_count()]
+
+    for shots in turns:
+        for id in shots:
+            g.get_vert(id).color = "white"
+        recolor(g)
+        counts.append(sum(v.color == "black" for v in g))
+
+    return counts
+
+class Verify(unittest.TestCase):
+    def test_Verify_0_path(self):
+        # Path 0-1-2-3: shooting 1, 2, 2, 1 clears it on turn 4
+        g = graph_from_edges(4, [(0, 1), (1, 2), (2, 3)])
+        cg = CompactGraph.from_graph(g)
+        results = verify(cg, [("sweep", [["1"], ["2"], ["2"], ["1"]]),
+                              ("idle", [[], []]),
+                              ("empty", [])], workers=1)
+
+        self.assertEqual([r.schedule_id for r in results],
+                         ["sweep", "idle", "empty"])
+        self.assertTrue(results[0].passed)
+        self.assertEqual(results[0].max_shots, 1)
+        self.assertFalse(results[1].passed)
+        self.assertIsNone(results[1].cleared_turn)
+        self.assertEqual(results[1].stalled_turn, 1)
+        self.assertFalse(results[2].passed)
+
+        with self.assertRaises(ValueError):
+            verify(cg, [("bad", [["9"]])])
+
+    def test_Verify_1_matches_recolor(self):
+        rng = random.Random(7)
+        n = 12
+        edges = [(a, b) for a in range(n) for b in range(a, n)
+                 if rng.random() < 0.2]
+        edges.append((n - 2, n - 2)) # Self-loop; vertex n - 1 is isolated
+        edges = [e for e in edges if n - 1 not in e]
+        g = graph_from_edges(n, edges)
+        cg = CompactGraph.from_graph(g)
+
+        schedules = []
+        for s in range(150): # Spans several words, and chunks below
+            turns = [[str(v) for v in rng.sample(range(n), rng.randint(0, 4))]
+                     for _ in range(rng.randint(0, 10))]
+            schedules.append((s, turns))
+
+        chunk_schedules = hr_verify.CHUNK_SCHEDULES
+        hr_verify.CHUNK_SCHEDULES = 64
+        try:
+            results = verify(cg, schedules, workers=2)
+        finally:
+            hr_verify.CHUNK_SCHEDULES = chunk_schedules
+
+        for (s, turns), result in zip(schedules, results):
+            counts = black_counts(g, turns)
+            cleared = [t for t, c in enumerate(counts) if c == 0]
+            stalled = [t for t in range(1, len(counts))
+                       if counts[t] >= counts[t - 1] > 0]
+
+            self.assertEqual(result.schedule_id, s)
+            self.assertEqual(result.passed, counts[-1] == 0)
+            self.assertEqual(result.cleared_turn,
+                             cleared[0] if cleared else None)
+            self.assertEqual(result.stalled_turn,
+                             stalled[0] if stalled else None)
+
+if __name__ == "__main__":
+    unittest.main()